@@ -0,0 +1,161 @@
+import codecs
+import csv
+import os
+
+import pandas as pd
+
+from headers import CANONICAL_HEADERS, ORDER_NUMBER, WEIGHT, resolve_headers
+from order_search import DataLoader
+from plan_schema import apply_schema
+
+
+# Заголовки, которые читает InfoExtractor; остальные столбцы выгрузки пропускаются
+HEADERS = CANONICAL_HEADERS
+
+DELIMITERS = (';', '\t', ',')
+SAMPLE_SIZE = 64 * 1024
+
+
+def detect_encoding(filename):
+    """
+    Определяет кодировку выгрузки по началу файла: UTF-8 (с BOM или без) или cp1251.
+
+    Args:
+        filename (str): Путь к CSV-файлу.
+
+    Returns:
+        str: 'utf-8-sig' или 'cp1251'.
+    """
+    with open(filename, 'rb') as f:
+        sample = f.read(SAMPLE_SIZE)
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        # final=False: многобайтовый символ, обрезанный концом образца, — не ошибка
+        decoder.decode(sample, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1251'
+
+
+def detect_delimiter(header_line):
+    """
+    Определяет разделитель по строке заголовков.
+
+    Args:
+        header_line (str): Первая строка файла.
+
+    Returns:
+        str: Самый частый из ';', табуляции и ','.
+    """
+    return max(DELIMITERS, key=header_line.count)
+
+
+def _to_weight(values):
+    # В выгрузках из 1С дробная часть отделяется запятой
+    return pd.to_numeric(values.str.replace(',', '.', regex=False).str.strip(), errors='coerce')
+
+
+class CsvDataLoader(DataLoader):
+    """
+    Загрузчик файла раскроя, выгруженного из ERP в CSV/TSV.
+
+    Файл читается C-парсером pandas чанками по CHUNK_SIZE строк, только нужные
+    столбцы и с заданными типами. Поиск заказа останавливается на первом
+    чанке, где заказ найден, и не держит весь файл в памяти.
+    """
+
+    CHUNK_SIZE = 50000
+
+    def __init__(self, filename=None, chunk_size=None):
+        """
+        Инициализация CsvDataLoader.
+
+        Args:
+            filename (str|None): Файл по умолчанию для load_data и find_order.
+            chunk_size (int|None): Строк в чанке (по умолчанию CHUNK_SIZE).
+        """
+        self.filename = filename
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def _file(self, filename):
+        file_to_load = filename or self.filename
+        if not file_to_load:
+            raise ValueError("Не указан файл для загрузки")
+        if not os.path.exists(file_to_load):
+            raise ValueError(f"Файл '{file_to_load}' не найден.")
+        return file_to_load
+
+    def iter_chunks(self, filename=None):
+        """
+        Читает файл чанками.
+
+        Args:
+            filename (str|None): Путь к файлу (по умолчанию self.filename).
+
+        Yields:
+            pd.DataFrame: Очередной чанк с заголовками файла раскроя.
+
+        Raises:
+            ValueError: Если файл не найден или в нём нет столбца '№ Заказа'.
+            RuntimeError: При других ошибках чтения.
+        """
+        file_to_load = self._file(filename)
+        encoding = detect_encoding(file_to_load)
+        with open(file_to_load, 'r', encoding=encoding, newline='') as f:
+            header_line = f.readline()
+        sep = detect_delimiter(header_line)
+        header_map = resolve_headers(next(csv.reader([header_line], delimiter=sep), []))
+        header_map.check(file_to_load)
+        usecols = list(header_map.columns.values())
+
+        try:
+            # Все столбцы читаются как текст: парсер не угадывает типы по каждому чанку,
+            # а номера заказов не превращаются в числа. Вес приводится к float отдельно.
+            reader = pd.read_csv(
+                file_to_load, sep=sep, encoding=encoding, usecols=usecols,
+                dtype={name: str for name in usecols},
+                chunksize=self.chunk_size, engine='c',
+            )
+            with reader:
+                for chunk in reader:
+                    chunk = chunk.rename(columns=header_map.renames)
+                    if WEIGHT in chunk:
+                        chunk[WEIGHT] = _to_weight(chunk[WEIGHT])
+                    yield chunk
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при загрузке данных: {e}")
+
+    def load_data(self, filename=None):
+        """
+        Загружает весь файл.
+
+        Args:
+            filename (str|None): Путь к файлу (по умолчанию self.filename).
+
+        Returns:
+            pd.DataFrame: Загруженные данные с компактными типами (см. plan_schema).
+        """
+        chunks = list(self.iter_chunks(filename))
+        if not chunks:
+            return pd.DataFrame(columns=HEADERS)
+        return apply_schema(pd.concat(chunks, ignore_index=True), filename or self.filename)
+
+    def find_order(self, order_number, filename=None):
+        """
+        Возвращает первую строку заказа, читая файл до первого совпадения.
+
+        Args:
+            order_number (str): Номер заказа.
+            filename (str|None): Путь к файлу (по умолчанию self.filename).
+
+        Returns:
+            pd.Series|None: Строка заказа или None, если заказ не найден.
+        """
+        order_number = str(order_number).strip()
+        for chunk in self.iter_chunks(filename):
+            matches = chunk.index[chunk[ORDER_NUMBER].str.strip() == order_number]
+            if len(matches):
+                return chunk.loc[matches[0]]
+        return None
@@ -0,0 +1,164 @@
+import re
+from functools import lru_cache
+
+from notices import notify
+
+
+# Заголовки файла раскроя, с которыми работают InfoExtractor и загрузчики
+ORDER_NUMBER = '№ Заказа'
+WEIGHT = 'ВЕС, КГ'
+CANONICAL_HEADERS = [
+    ORDER_NUMBER,
+    '№ магазина / заявка',
+    'Клиент',
+    'Наименование',
+    'Корпус',
+    'Профиль /            Доп. Элементы',
+    'Фасад',
+    WEIGHT,
+]
+
+# Другие встречавшиеся в выгрузках названия тех же столбцов
+ALIASES = {
+    ORDER_NUMBER: ['Номер заказа', 'Заказ', 'Заказ №'],
+    '№ магазина / заявка': ['№ магазина', 'Магазин / заявка', 'Номер магазина / заявка', 'Заявка', '№ заявки'],
+    'Клиент': ['Заказчик', 'Покупатель'],
+    'Наименование': ['Наименование изделия', 'Изделие'],
+    'Корпус': ['Цвет корпуса', 'Корпус (цвет)'],
+    'Профиль /            Доп. Элементы': ['Профиль', 'Доп. элементы', 'Профиль / доп. элемент', 'Доп элемент'],
+    'Фасад': ['Фасады', 'Цвет фасада'],
+    WEIGHT: ['Вес', 'Вес (кг)', 'Масса', 'Масса, кг'],
+}
+
+
+def normalize_header(name):
+    """
+    Приводит заголовок к форме для сравнения: без регистра, пробелов,
+    знаков препинания и символа '№', 'ё' → 'е'.
+
+    Args:
+        name: Заголовок столбца (не обязательно строка).
+
+    Returns:
+        str: Нормализованный заголовок.
+    """
+    text = str(name).lower().replace('ё', 'е')
+    return re.sub(r'[^0-9a-zа-я]+', '', text)
+
+
+# Нормализованный заголовок → канонический
+_LOOKUP = {}
+for _header in CANONICAL_HEADERS:
+    for _name in [_header, *ALIASES.get(_header, [])]:
+        _LOOKUP.setdefault(normalize_header(_name), _header)
+
+
+def is_known_header(name):
+    """
+    Проверяет, соответствует ли заголовок одному из нужных столбцов
+    (для usecols, чтобы не читать лишние столбцы).
+
+    Args:
+        name: Заголовок столбца.
+
+    Returns:
+        bool: True, если столбец нужен.
+    """
+    return normalize_header(name) in _LOOKUP
+
+
+class HeaderMap:
+    """
+    Результат сопоставления заголовков файла с каноническими.
+
+    Attributes:
+        columns (dict[str, str]): Канонический заголовок → заголовок в файле.
+        positions (dict[str, int]): Канонический заголовок → номер столбца в файле.
+        missing (list[str]): Канонические заголовки, которых нет в файле.
+    """
+
+    def __init__(self, headers):
+        self._reported = False
+        self.columns = {}
+        self.positions = {}
+        for position, name in enumerate(headers):
+            if name is None:
+                continue
+            canonical = _LOOKUP.get(normalize_header(name))
+            # При повторе берётся первый подходящий столбец, как у поиска по имени в pandas
+            if canonical and canonical not in self.columns:
+                self.columns[canonical] = name
+                self.positions[canonical] = position
+        self.missing = [header for header in CANONICAL_HEADERS if header not in self.columns]
+
+    @property
+    def renames(self):
+        """dict[str, str]: Заголовок в файле → канонический (для DataFrame.rename)."""
+        return {name: canonical for canonical, name in self.columns.items()}
+
+    def check(self, source=''):
+        """
+        Проверяет, что файл пригоден для поиска заказов, и сообщает о ненайденных столбцах.
+
+        Предупреждение о ненайденных столбцах один раз на набор заголовков
+        ставится в очередь окна программы (см. notices.take_notices):
+        эти поля на этикетках будут пустыми.
+
+        Args:
+            source (str): Имя файла для сообщений.
+
+        Returns:
+            str|None: Предупреждение о ненайденных столбцах или None, если найдены все.
+
+        Raises:
+            ValueError: Если нет столбца с номером заказа.
+        """
+        if ORDER_NUMBER in self.missing:
+            raise ValueError(f"В файле {source} нет столбца '{ORDER_NUMBER}'")
+        if not self.missing:
+            return None
+        message = (f"В файле {source} не найдены столбцы: {', '.join(self.missing)}. "
+                   f"Эти данные на этикетках будут пустыми.")
+        if not self._reported:
+            self._reported = True
+            notify(message)
+        return message
+
+
+@lru_cache(maxsize=64)
+def _resolve(headers):
+    return HeaderMap(headers)
+
+
+def resolve_headers(headers):
+    """
+    Сопоставляет заголовки файла с каноническими. Результат кэшируется
+    по набору заголовков, поэтому для файла он вычисляется один раз.
+
+    Args:
+        headers (Iterable): Заголовки в порядке столбцов.
+
+    Returns:
+        HeaderMap: Сопоставление.
+    """
+    return _resolve(tuple(headers))
+
+
+def canonical_frame(df, source=''):
+    """
+    Оставляет в DataFrame только нужные столбцы и называет их каноническими заголовками.
+
+    Args:
+        df (pd.DataFrame): Прочитанные данные.
+        source (str): Имя файла для сообщений.
+
+    Returns:
+        pd.DataFrame: Данные с каноническими заголовками.
+
+    Raises:
+        ValueError: Если нет столбца с номером заказа.
+    """
+    header_map = resolve_headers(df.columns)
+    header_map.check(source)
+    df = df[list(header_map.columns.values())]
+    return df.rename(columns=header_map.renames)
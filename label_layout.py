@@ -0,0 +1,417 @@
+import hashlib
+import json
+import os
+import string
+import sys
+from copy import copy
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils.cell import column_index_from_string, get_column_letter, coordinate_from_string, range_boundaries
+from openpyxl.utils.exceptions import CellCoordinatesException
+
+from notices import notify
+from package_codes import barcode_value
+from text_fit import (CELL_PADDING, DEFAULT_COLUMN_WIDTH, DEFAULT_ROW_HEIGHT, LINE_SPACING, MIN_FONT_SIZE,
+                      column_width_pt, fit_font_size)
+
+
+# Папка программы, а не текущая папка: exe из PyInstaller --onefile распаковывает данные в sys._MEIPASS
+APP_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+LAYOUTS_DIR = os.path.join(APP_DIR, "layouts")
+DEFAULT_LAYOUT = "default"
+
+
+def resolve_path(path):
+    """
+    Находит картинку макета: относительно текущей папки, иначе — относительно папки программы.
+
+    Args:
+        path (str): Путь из описания макета.
+
+    Returns:
+        str: Путь к файлу.
+    """
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    return os.path.join(APP_DIR, path)
+
+
+# Вычисляемые поля, доступные в текстах макета наравне с ключами label_data
+FIELDS = {}
+
+
+def field(name):
+    """
+    Регистрирует функцию, вычисляющую поле макета из данных этикетки.
+
+    Args:
+        name (str): Имя поля в шаблонах текста, например "{color}".
+
+    Returns:
+        callable: Декоратор.
+    """
+    def decorator(func):
+        FIELDS[name] = func
+        return func
+    return decorator
+
+
+@field('label_type')
+def _label_type(data):
+    return data['label_type'].upper()
+
+
+@field('color')
+def _color(data):
+    label_type = data['label_type'].upper()
+    if label_type == "КОРПУС":
+        return data['carcase']
+    if label_type == "ОРГАЛИТ":
+        return "БЕЛЫЙ"
+    if label_type in ["ФАСАДЫ МДФ", "ФАСАДЫ ПЛАСТИК"]:
+        return data.get('facade', '')
+    return data.get('extra_component', '')
+
+
+def _dimension(index):
+    def getter(data):
+        dimensions = data.get('dimensions', (0, 0, 0))
+        return str(dimensions[index]) if len(dimensions) > index else ""
+    return getter
+
+
+# Размеры в наименовании — ширина x высота x глубина
+field('width')(_dimension(0))
+field('height')(_dimension(1))
+field('depth')(_dimension(2))
+
+
+@field('weight_kg')
+def _weight_kg(data):
+    weight = data.get('weight')
+    return str(int(weight)) if weight and weight == weight else ""
+
+
+def label_date():
+    """Дата, которая печатается на этикетке сегодня (через неделю от текущей)."""
+    return (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y")
+
+
+@field('date')
+def _date(data):
+    return label_date()
+
+
+class LabelContext:
+    """Подстановка полей в шаблон: сначала вычисляемые поля, затем ключи label_data."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, name):
+        if name in FIELDS:
+            return FIELDS[name](self.data)
+        return self.data.get(name, '')
+
+
+# Заказы, о которых уже сообщено, что их номер не кодируется Code 128
+_unencodable_reported = set()
+
+
+def _warn_unencodable(order_number):
+    # Одно сообщение на заказ, а не на каждую упаковку
+    if order_number in _unencodable_reported:
+        return
+    _unencodable_reported.add(order_number)
+    notify(f"Номер заказа {order_number} не кодируется Code 128, этикетки печатаются без штрихкода")
+
+
+def _cell(coordinate):
+    col_letter, row = coordinate_from_string(coordinate)
+    return row, column_index_from_string(col_letter)
+
+
+class CompiledLayout:
+    """
+    Макет этикетки, скомпилированный в план отрисовки.
+
+    Координаты переведены в номера строк и столбцов, шрифты и выравнивания
+    созданы один раз на макет, а тексты разобраны на статические и привязанные
+    к полям данных этикетки. При отрисовке этикетки остаётся только подставить значения.
+    """
+
+    def __init__(self, spec, source=None):
+        """
+        Компилирует описание макета.
+
+        Args:
+            spec (dict): Описание макета (см. layouts/default.json).
+            source (str|None): Файл описания, для сообщений об ошибках.
+
+        Raises:
+            ValueError: Если описание макета некорректно.
+        """
+        try:
+            self._compile(spec)
+        except (KeyError, TypeError, ValueError, CellCoordinatesException) as e:
+            raise ValueError(f"Ошибка в макете {source or spec.get('name', '')}: {e}")
+
+    def _compile(self, spec):
+        self.name = spec['name']
+        self.rows = int(spec['rows'])
+        self.columns = int(spec['columns'])
+        self.priority = int(spec.get('priority', 0))
+        self.row_heights = sorted((int(row), float(height)) for row, height in spec.get('row_heights', {}).items())
+        self.column_widths = {col: float(width) for col, width in spec.get('column_widths', {}).items()}
+
+        self.merge_ranges = list(spec.get('merges', []))
+        # (min_row, min_col, max_row, max_col) — как аргументы ws.merge_cells
+        self.merges = []
+        for merge_range in self.merge_ranges:
+            min_col, min_row, max_col, max_row = range_boundaries(merge_range)
+            if max_row > self.rows or max_col > self.columns:
+                raise ValueError(f"диапазон {merge_range} выходит за пределы этикетки")
+            self.merges.append((min_row, min_col, max_row, max_col))
+        side = Side(style=spec.get('border', 'thick'))
+        self.border = Border(left=side, right=side, top=side, bottom=side)
+
+        self.images = []
+        for image in spec.get('images', []):
+            col_letter, row = coordinate_from_string(image['cell'])
+            self.images.append((resolve_path(image['path']), col_letter, row,
+                                float(image['width']), float(image['height'])))
+
+        formatter = string.Formatter()
+        # Штрихкоды: (столбец, строка, шаблон значения, ширина, высота)
+        self.barcodes = []
+        for barcode in spec.get('barcodes', []):
+            col_letter, row = coordinate_from_string(barcode['cell'])
+            list(formatter.parse(barcode['value']))  # ошибка в шаблоне — при загрузке, а не при печати
+            self.barcodes.append((col_letter, row, barcode['value'], float(barcode['width']), float(barcode['height'])))
+
+        font_name = spec.get('font', 'Times New Roman')
+        styles = {}
+        self.texts = []
+        # (строка, столбец) → (ширина, высота в пунктах, наименьший размер, число строк) для текстов с "fit"
+        self.fits = {}
+        self._fit_styles = {}
+        for text in spec.get('texts', []):
+            row, col = _cell(text['cell'])
+            if text.get('fit'):
+                width, height = self._region_size(row, col)
+                if text.get('rotation', 0) in (90, 180):
+                    width, height = height, width
+                self.fits[(row, col)] = (width, height, float(text.get('min_size', MIN_FONT_SIZE)),
+                                         int(text.get('lines', 1)))
+            key = (text['size'], text.get('rotation', 0), text.get('vertical', 'center'))
+            if key not in styles:
+                styles[key] = (
+                    Font(name=font_name, size=text['size'], bold=True),
+                    Alignment(horizontal="center", vertical=key[2], textRotation=key[1]),
+                )
+            template = text['text']
+            fields = tuple(name for _, name, _, _ in formatter.parse(template) if name is not None)
+            # Текст из одного поля берёт значение как есть: пустое значение не выводится
+            single = fields[0] if len(fields) == 1 and template == f"{{{fields[0]}}}" else None
+            self.texts.append((row, col, template, fields, single, *styles[key]))
+        self.package_texts = [entry for entry in self.texts if 'package_num' in entry[3]]
+
+        self._when = self._compile_when(spec.get('when', {}))
+
+    def _region_size(self, row, col):
+        """Размер в пунктах объединённой области, которая начинается в ячейке (row, col)"""
+        min_row, min_col, max_row, max_col = next(
+            (merge for merge in self.merges if merge[:2] == (row, col)), (row, col, row, col))
+        heights = dict(self.row_heights)
+        width = sum(column_width_pt(self.column_widths.get(get_column_letter(c), DEFAULT_COLUMN_WIDTH))
+                    for c in range(min_col, max_col + 1))
+        height = sum(heights.get(r, DEFAULT_ROW_HEIGHT) for r in range(min_row, max_row + 1))
+        return width, height
+
+    def _fitted(self, row, col, value, font, alignment):
+        """Шрифт наибольшего размера, при котором значение помещается в свою область"""
+        width, height, min_size, lines = self.fits[(row, col)]
+        size, wrap = fit_font_size(font.name, font.sz, value, width, height, lines, min_size)
+        if size == font.sz and not wrap:
+            return font, alignment
+        # Одни и те же объекты стиля для одинакового размера — меньше стилей в книге
+        key = (id(font), id(alignment), size, wrap)
+        if key not in self._fit_styles:
+            fitted_alignment = alignment
+            if wrap:
+                fitted_alignment = copy(alignment)
+                fitted_alignment.wrap_text = True
+            self._fit_styles[key] = (Font(name=font.name, size=size, bold=font.b), fitted_alignment)
+        return self._fit_styles[key]
+
+    @staticmethod
+    def _compile_when(when):
+        checks = []
+        if 'label_types' in when:
+            label_types = {name.upper() for name in when['label_types']}
+            checks.append(lambda data: data['label_type'].upper() in label_types)
+        for index, name in enumerate(('width', 'height', 'depth')):
+            for bound, compare in (('min', lambda a, b: a >= b), ('max', lambda a, b: a <= b)):
+                limit = when.get(f"{bound}_{name}")
+                if limit is None:
+                    continue
+
+                def check(data, index=index, limit=limit, compare=compare):
+                    dimensions = data.get('dimensions') or ()
+                    return len(dimensions) > index and compare(dimensions[index], limit)
+                checks.append(check)
+        return checks
+
+    def matches(self, label_data):
+        """
+        Проверяет, подходит ли макет для этикетки (условия "when").
+
+        Args:
+            label_data (dict): Данные этикетки.
+
+        Returns:
+            bool: True, если все условия выполнены.
+        """
+        return all(check(label_data) for check in self._when)
+
+    @staticmethod
+    def _render(template, fields, single, context):
+        if single:
+            value = context[single]
+            if not value:
+                return None
+            return value if isinstance(value, str) else str(value)
+        if not fields:
+            return template
+        return template.format_map(context)
+
+    def render_texts(self, label_data, texts=None):
+        """
+        Подставляет данные этикетки в тексты макета.
+
+        Для текстов с "fit" шрифт уменьшается так, чтобы значение помещалось в свою область.
+
+        Args:
+            label_data (dict): Данные этикетки.
+            texts (list|None): Подмножество self.texts (по умолчанию все).
+
+        Returns:
+            list[tuple]: (строка, столбец, значение, Font, Alignment) для непустых значений.
+        """
+        context = LabelContext(label_data)
+        rendered = []
+        for row, col, template, fields, single, font, alignment in (self.texts if texts is None else texts):
+            value = self._render(template, fields, single, context)
+            if value:
+                if (row, col) in self.fits:
+                    font, alignment = self._fitted(row, col, value, font, alignment)
+                rendered.append((row, col, value, font, alignment))
+        return rendered
+
+    def package_values(self, label_data, package_num):
+        """
+        Возвращает значения ячеек, зависящих от номера упаковки.
+
+        Args:
+            label_data (dict): Данные этикетки.
+            package_num (int): Номер упаковки.
+
+        Returns:
+            dict[tuple[int, int], str]: (строка, столбец) → значение.
+        """
+        data = dict(label_data, package_num=package_num)
+        return {(row, col): value for row, col, value, _, _ in self.render_texts(data, self.package_texts)}
+
+    def barcode_values(self, label_data):
+        """
+        Подставляет данные этикетки в значения штрихкодов макета.
+
+        Значения, которые нельзя закодировать Code 128 (кириллица в номере
+        заказа), пропускаются: этикетка печатается без штрихкода.
+
+        Args:
+            label_data (dict): Данные этикетки.
+
+        Returns:
+            list[tuple]: (столбец, строка, значение, ширина, высота).
+        """
+        context = LabelContext(label_data)
+        values = []
+        for col_letter, row, template, width, height in self.barcodes:
+            raw = template.format_map(context)
+            value = barcode_value(raw)
+            if value is None:
+                _warn_unencodable(label_data.get('order_number', raw))
+                continue
+            values.append((col_letter, row, value, width, height))
+        return values
+
+
+class LayoutSet:
+    """
+    Набор макетов: макет по умолчанию и варианты, выбираемые по условиям
+    (тип этикетки, габариты упаковки).
+    """
+
+    def __init__(self, layouts, fingerprint=''):
+        """
+        Инициализация LayoutSet.
+
+        Args:
+            layouts (list[CompiledLayout]): Макеты; один из них должен называться DEFAULT_LAYOUT.
+            fingerprint (str): Хэш описаний макетов и настроек подбора шрифта (для ключей кэша).
+
+        Raises:
+            ValueError: Если нет макета по умолчанию.
+        """
+        by_name = {layout.name: layout for layout in layouts}
+        if DEFAULT_LAYOUT not in by_name:
+            raise ValueError(f"Не найден макет '{DEFAULT_LAYOUT}'")
+        self.default = by_name.pop(DEFAULT_LAYOUT)
+        self.fingerprint = fingerprint
+        self.variants = sorted(by_name.values(), key=lambda layout: (-layout.priority, layout.name))
+
+    def select(self, label_data):
+        """
+        Выбирает макет для этикетки.
+
+        Args:
+            label_data (dict): Данные этикетки.
+
+        Returns:
+            CompiledLayout: Первый подходящий вариант или макет по умолчанию.
+        """
+        for layout in self.variants:
+            if layout.matches(label_data):
+                return layout
+        return self.default
+
+
+@lru_cache(maxsize=None)
+def get_layouts(directory=LAYOUTS_DIR):
+    """
+    Загружает и компилирует все макеты из папки (один раз на процесс).
+
+    Args:
+        directory (str): Папка с JSON-описаниями макетов.
+
+    Returns:
+        LayoutSet: Скомпилированные макеты.
+
+    Raises:
+        ValueError: Если описание макета некорректно или нет макета по умолчанию.
+    """
+    layouts = []
+    # Готовые книги в кэше зависят от макетов и от параметров подбора размера шрифта
+    digest = hashlib.sha256(repr((MIN_FONT_SIZE, LINE_SPACING, CELL_PADDING)).encode('utf-8'))
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(name.encode('utf-8') + b'\0' + content)
+        layouts.append(CompiledLayout(json.loads(content.decode('utf-8')), source=path))
+    return LayoutSet(layouts, digest.hexdigest())
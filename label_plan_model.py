@@ -0,0 +1,222 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+
+def _dimension(index):
+    def getter(label):
+        dimensions = label.get('dimensions') or ()
+        return dimensions[index] if len(dimensions) > index else 0
+
+    def setter(label, value):
+        dimensions = list(label.get('dimensions') or ())
+        dimensions += [0] * (3 - len(dimensions))
+        dimensions[index] = value
+        label['dimensions'] = tuple(dimensions)
+    return getter, setter
+
+
+def _set_key(key):
+    def setter(label, value):
+        label[key] = value
+    return setter
+
+
+def _to_count(value):
+    count = int(value)
+    if count < 1:
+        raise ValueError("Количество должно быть не меньше 1")
+    return count
+
+
+def _to_size(value):
+    size = int(value)
+    if size < 0:
+        raise ValueError("Размер не может быть отрицательным")
+    return size
+
+
+def _to_weight(value):
+    if value is None or str(value).strip() == '':
+        return None
+    return float(str(value).replace(',', '.'))
+
+
+def _format_weight(label):
+    weight = label.get('weight')
+    return '' if weight is None else f"{weight:g}"
+
+
+# (заголовок, получение значения, запись значения или None, если столбец не редактируется, разбор ввода)
+COLUMNS = [
+    ("Тип", lambda label: label['label_type'], None, None),
+    ("Кол-во", lambda label: label['count'], _set_key('count'), _to_count),
+    ("Наименование", lambda label: label['item_name'], None, None),
+    ("Ширина", *_dimension(0), _to_size),
+    ("Высота", *_dimension(1), _to_size),
+    ("Глубина", *_dimension(2), _to_size),
+    ("Вес, кг", lambda label: label.get('weight'), _set_key('weight'), _to_weight),
+    ("Заказ", lambda label: label['order_number'], None, None),
+]
+WEIGHT_COLUMN = 6
+# Столбцы, которые можно править прямо в таблице и для нескольких строк сразу
+EDITABLE_COLUMNS = [column for column, (_, _, setter, _) in enumerate(COLUMNS) if setter is not None]
+
+
+class LabelPlanModel(QAbstractTableModel):
+    """
+    Модель плана этикеток для QTableView.
+
+    Хранит список позиций в формате LabelSheet и сообщает представлению только
+    об изменившихся строках, поэтому добавление и правка не перестраивают таблицу.
+    Количество, размеры и вес редактируются прямо в ячейках; отклонённый
+    ввод ячейка не принимает, а причина передаётся сигналом value_rejected.
+    """
+
+    # Текст для оператора: какое значение не принято и почему
+    value_rejected = pyqtSignal(str)
+
+    # Больше стольких разрозненных блоков строк удаляется сбросом модели
+    MAX_REMOVE_BLOCKS = 50
+
+    def __init__(self, labels=None, parent=None):
+        """
+        Инициализация LabelPlanModel.
+
+        Args:
+            labels (list[dict]|None): Позиции плана.
+            parent (QObject|None): Родительский объект.
+        """
+        super().__init__(parent)
+        self.labels = labels if labels is not None else []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.labels)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        label = self.labels[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == WEIGHT_COLUMN:
+                return _format_weight(label)
+            value = COLUMNS[column][1](label)
+            return '' if value is None else str(value)
+        if role == Qt.ItemDataRole.EditRole:
+            if column == WEIGHT_COLUMN:
+                return _format_weight(label)
+            return COLUMNS[column][1](label)
+        if role == Qt.ItemDataRole.TextAlignmentRole and column in EDITABLE_COLUMNS:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() in EDITABLE_COLUMNS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def _store(self, row, column, value):
+        """Записывает значение; возвращает None или текст ошибки, если значение не принято."""
+        _, _, setter, parse = COLUMNS[column]
+        try:
+            setter(self.labels[row], parse(value))
+        except (TypeError, ValueError) as e:
+            return f"Некорректное значение '{value}' в столбце '{COLUMNS[column][0]}': {e}"
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid() or index.column() not in EDITABLE_COLUMNS:
+            return False
+        error = self._store(index.row(), index.column(), value)
+        if error:
+            self.value_rejected.emit(error)
+            return False
+        self.dataChanged.emit(index, index)
+        return True
+
+    def set_column_values(self, rows, column, value):
+        """
+        Записывает одно значение в столбец нескольких строк (массовая правка).
+
+        Args:
+            rows (Iterable[int]): Номера строк.
+            column (int): Редактируемый столбец (из EDITABLE_COLUMNS).
+            value: Новое значение в том виде, в каком его ввёл пользователь.
+
+        Returns:
+            int: Сколько строк изменено.
+        """
+        if column not in EDITABLE_COLUMNS:
+            return 0
+        rows = sorted(set(rows))
+        changed = []
+        error = None
+        for row in rows:
+            row_error = self._store(row, column, value)
+            if row_error:
+                error = error or row_error
+            else:
+                changed.append(row)
+        if error:
+            # Одно сообщение на всю правку, а не на каждую строку
+            self.value_rejected.emit(f"{error} (не изменено строк: {len(rows) - len(changed)} из {len(rows)})")
+        if changed:
+            # Одно уведомление на весь диапазон вместо сигнала на каждую строку
+            self.dataChanged.emit(self.index(changed[0], column), self.index(changed[-1], column))
+        return len(changed)
+
+    def append(self, label):
+        """Добавляет позицию в конец плана."""
+        row = len(self.labels)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.labels.append(label)
+        self.endInsertRows()
+
+    def replace(self, row, label):
+        """Заменяет позицию плана (после правки в диалоге)."""
+        self.labels[row] = label
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def remove_rows(self, rows):
+        """Удаляет позиции плана; соседние строки удаляются одним блоком."""
+        rows = sorted(set(rows), reverse=True)
+        blocks = []
+        for row in rows:
+            if blocks and blocks[-1][0] == row + 1:
+                blocks[-1][0] = row
+            else:
+                blocks.append([row, row])
+
+        if len(blocks) > self.MAX_REMOVE_BLOCKS:
+            # Каждое удаление блока пересчитывает выделение представления,
+            # поэтому вразброс удалённые строки дешевле применить одним сбросом
+            removed = set(rows)
+            self.beginResetModel()
+            self.labels = [label for row, label in enumerate(self.labels) if row not in removed]
+            self.endResetModel()
+            return
+
+        for first, last in blocks:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.labels[first:last + 1]
+            self.endRemoveRows()
+
+    def set_labels(self, labels):
+        """Заменяет весь план (например, загруженный для повторной печати)."""
+        self.beginResetModel()
+        self.labels = labels
+        self.endResetModel()
+
+    def clear(self):
+        """Очищает план."""
+        self.set_labels([])
@@ -0,0 +1,228 @@
+import os
+import time
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter, QPen, QPixmap
+from PyQt6.QtWidgets import QLabel, QSizePolicy
+
+from label_layout import get_layouts
+from package_codes import barcode_png
+from text_fit import DEFAULT_COLUMN_WIDTH, DEFAULT_ROW_HEIGHT
+
+
+# Толщина линий рамки в пикселях для стилей рамки макета
+BORDER_WIDTHS = {'thin': 1, 'medium': 2, 'thick': 3}
+MAX_BARCODES = 256
+
+_VERTICAL = {
+    'top': Qt.AlignmentFlag.AlignTop,
+    'bottom': Qt.AlignmentFlag.AlignBottom,
+}
+
+
+def column_width_px(width):
+    """Переводит ширину столбца Excel (в символах) в пиксели, как при 100 % масштабе."""
+    return int(width * 7 + 5)
+
+
+def row_height_px(height):
+    """Переводит высоту строки Excel (в пунктах) в пиксели при 96 dpi."""
+    return int(round(height * 96 / 72))
+
+
+class _StaticLayer:
+    """Сетка макета и всё, что не зависит от данных этикетки: рамки, картинки, постоянные тексты."""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.x = [0]
+        for col in range(1, layout.columns + 1):
+            letter = get_column_letter(col)
+            self.x.append(self.x[-1] + column_width_px(layout.column_widths.get(letter, DEFAULT_COLUMN_WIDTH)))
+        heights = dict(layout.row_heights)
+        self.y = [0]
+        for row in range(1, layout.rows + 1):
+            self.y.append(self.y[-1] + row_height_px(heights.get(row, DEFAULT_ROW_HEIGHT)))
+        self.merged = {(min_row, min_col): (min_row, min_col, max_row, max_col)
+                       for min_row, min_col, max_row, max_col in layout.merges}
+
+        # Тексты без полей рисуются один раз, остальные — при каждом обновлении
+        self.fixed_texts = [text for text in layout.texts if not text[3]]
+        self.field_texts = [text for text in layout.texts if text[3]]
+        self.image = self._draw()
+
+    def rect(self, row, col):
+        min_row, min_col, max_row, max_col = self.merged.get((row, col), (row, col, row, col))
+        return QRectF(self.x[min_col - 1], self.y[min_row - 1],
+                      self.x[max_col] - self.x[min_col - 1], self.y[max_row] - self.y[min_row - 1])
+
+    def _draw(self):
+        image = QImage(self.x[-1] + 1, self.y[-1] + 1, QImage.Format.Format_RGB32)
+        image.fill(QColor('white'))
+        painter = QPainter(image)
+        try:
+            side = self.layout.border.left.style or 'thin'
+            painter.setPen(QPen(QColor('black'), BORDER_WIDTHS.get(side, 1)))
+            for min_row, min_col, _, _ in self.layout.merges:
+                painter.drawRect(self.rect(min_row, min_col))
+
+            for path, col_letter, row, width, height in self.layout.images:
+                picture = QImage(path) if os.path.exists(path) else QImage()
+                if picture.isNull():
+                    continue
+                col = column_index_from_string(col_letter)
+                painter.drawImage(QRectF(self.x[col - 1], self.y[row - 1], width, height), picture)
+
+            draw_texts(painter, self, [(row, col, template, font, alignment)
+                                       for row, col, template, _, _, font, alignment in self.fixed_texts])
+        finally:
+            painter.end()
+        return image
+
+
+def draw_texts(painter, layer, texts):
+    """
+    Рисует тексты макета в их ячейках (объединённых областях).
+
+    Args:
+        painter (QPainter): Рисовальщик на изображении этикетки.
+        layer (_StaticLayer): Геометрия макета.
+        texts (Iterable[tuple]): (строка, столбец, значение, Font, Alignment), как в CompiledLayout.render_texts.
+    """
+    for row, col, value, font, alignment in texts:
+        rect = layer.rect(row, col)
+        qfont = QFont(font.name)
+        qfont.setBold(bool(font.b))
+        qfont.setPixelSize(max(1, int(round(font.sz * 96 / 72))))
+        painter.setFont(qfont)
+        flags = int((Qt.AlignmentFlag.AlignHCenter |
+                     _VERTICAL.get(alignment.vertical, Qt.AlignmentFlag.AlignVCenter)).value)
+        if alignment.wrap_text:
+            flags |= Qt.TextFlag.TextWordWrap.value
+
+        painter.save()
+        painter.setClipRect(rect)
+        rotation = alignment.textRotation or 0
+        if rotation:
+            # В Excel угол поворота отсчитывается против часовой стрелки
+            painter.translate(rect.center())
+            painter.rotate(-rotation)
+            rect = QRectF(-rect.height() / 2, -rect.width() / 2, rect.height(), rect.width())
+        painter.drawText(rect, flags, value)
+        painter.restore()
+
+
+class LabelPreviewRenderer:
+    """
+    Рисует этикетку по макету в изображение в памяти, без создания книги Excel.
+
+    Сетка, рамки, картинки и постоянные тексты каждого макета рисуются один
+    раз и кэшируются; при обновлении копируется готовый фон и поверх него
+    рисуются только тексты с данными этикетки и штрихкод.
+    """
+
+    def __init__(self, layouts=None):
+        """
+        Инициализация LabelPreviewRenderer.
+
+        Args:
+            layouts (LayoutSet|None): Макеты (по умолчанию get_layouts()).
+        """
+        self.layouts = layouts
+        self._layers = {}
+        self._barcodes = {}
+
+    def _layer(self, layout):
+        layer = self._layers.get(id(layout))
+        if layer is None or layer.layout is not layout:
+            layer = self._layers[id(layout)] = _StaticLayer(layout)
+        return layer
+
+    def _barcode(self, value):
+        image = self._barcodes.get(value)
+        if image is None:
+            if len(self._barcodes) >= MAX_BARCODES:
+                self._barcodes.clear()
+            image = self._barcodes[value] = QImage.fromData(barcode_png(value), 'PNG')
+        return image
+
+    def render(self, label_data, package_num=1, package_total=None):
+        """
+        Рисует этикетку одной упаковки.
+
+        Args:
+            label_data (dict): Позиция плана в формате LabelSheet.
+            package_num (int): Номер упаковки на этикетке.
+            package_total (int|None): Всего упаковок (по умолчанию количество позиции).
+
+        Returns:
+            QImage: Изображение этикетки в масштабе 100 %.
+        """
+        data = dict(label_data, package_num=package_num,
+                    package_total=package_total if package_total is not None else label_data.get('count', 1))
+        layout = (self.layouts or get_layouts()).select(data)
+        layer = self._layer(layout)
+
+        image = layer.image.copy()
+        painter = QPainter(image)
+        try:
+            for col_letter, row, value, width, height in layout.barcode_values(data):
+                col = column_index_from_string(col_letter)
+                painter.drawImage(QRectF(layer.x[col - 1], layer.y[row - 1], width, height), self._barcode(value))
+            draw_texts(painter, layer, layout.render_texts(data, layer.field_texts))
+        finally:
+            painter.end()
+        return image
+
+
+class LabelPreviewWidget(QLabel):
+    """Панель предпросмотра этикетки: изображение вписывается в ширину панели."""
+
+    def __init__(self, renderer=None, parent=None):
+        """
+        Инициализация LabelPreviewWidget.
+
+        Args:
+            renderer (LabelPreviewRenderer|None): Общий рисовальщик (кэш фонов макетов).
+            parent (QWidget|None): Родительский виджет.
+        """
+        super().__init__(parent)
+        self.renderer = renderer or LabelPreviewRenderer()
+        self._image = None
+        self.last_render_ms = 0.0
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setMinimumHeight(120)
+        self.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+
+    def show_label(self, label_data, package_total=None):
+        """
+        Показывает этикетку позиции плана (первая упаковка).
+
+        Args:
+            label_data (dict|None): Позиция плана; None очищает панель.
+            package_total (int|None): Всего упаковок в плане.
+        """
+        if label_data is None:
+            self._image = None
+            self.clear()
+            return
+        started = time.perf_counter()
+        try:
+            self._image = self.renderer.render(label_data, package_total=package_total)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Не удалось нарисовать предпросмотр этикетки: {e}")
+            return
+        self._show_scaled()
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+
+    def _show_scaled(self):
+        if self._image is None:
+            return
+        pixmap = QPixmap.fromImage(self._image)
+        self.setPixmap(pixmap.scaled(self.width(), self.height(), Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._show_scaled()
@@ -0,0 +1,303 @@
+import argparse
+import importlib.util
+import json
+import os
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from csv_loader import CsvDataLoader
+from headers import canonical_frame, is_known_header, resolve_headers
+from order_search import DataLoader, InfoExtractor
+from plan_schema import apply_schema
+
+
+# Имя движка → (функция чтения, поддерживаемые расширения, обязательный модуль)
+ENGINES = {}
+
+DEFAULT_ENGINE = 'pandas'
+CONFIG_KEY = 'loader_engine'
+
+
+def register_engine(name, extensions, requires=None):
+    """
+    Регистрирует функцию чтения файла раскроя как движок загрузчика.
+
+    Args:
+        name (str): Имя движка.
+        extensions (tuple[str]): Расширения файлов, которые движок умеет читать.
+        requires (str|None): Модуль, без которого движок недоступен.
+
+    Returns:
+        callable: Декоратор.
+    """
+    def decorator(func):
+        ENGINES[name] = (func, extensions, requires)
+        return func
+    return decorator
+
+
+@register_engine('pandas', ('.xlsx', '.xls'))
+def read_pandas(filename):
+    return apply_schema(canonical_frame(pd.read_excel(filename, usecols=is_known_header), filename), filename)
+
+
+@register_engine('openpyxl', ('.xlsx',))
+def read_openpyxl_values(filename):
+    wb = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header_map = resolve_headers(next(rows, ()))
+        header_map.check(filename)
+        positions = list(header_map.positions.items())
+        df = pd.DataFrame([[values[i] if i < len(values) else None for _, i in positions] for values in rows],
+                          columns=[name for name, _ in positions])
+        # Пустые ячейки — NaN, как у pd.read_excel, а не None
+        return apply_schema(df.fillna(float('nan')), filename)
+    finally:
+        wb.close()
+
+
+@register_engine('calamine', ('.xlsx', '.xls'), requires='python_calamine')
+def read_calamine(filename):
+    df = canonical_frame(pd.read_excel(filename, engine='calamine', usecols=is_known_header), filename)
+    return apply_schema(df, filename)
+
+
+CSV_EXTENSIONS = ('.csv', '.tsv', '.txt')
+
+
+@register_engine('csv', CSV_EXTENSIONS)
+def read_csv(filename):
+    return CsvDataLoader(filename).load_data()
+
+
+def available_engines(filename=None):
+    """
+    Возвращает движки, доступные в текущем окружении.
+
+    Args:
+        filename (str|None): Если указан, только движки, читающие файлы с таким расширением.
+
+    Returns:
+        list[str]: Имена движков.
+    """
+    extension = os.path.splitext(filename)[1].lower() if filename else None
+    names = []
+    for name, (_, extensions, requires) in ENGINES.items():
+        if requires and importlib.util.find_spec(requires) is None:
+            continue
+        if extension and extension not in extensions:
+            continue
+        names.append(name)
+    return names
+
+
+class EngineDataLoader(DataLoader):
+    """
+    Загрузчик данных, читающий файл раскроя выбранным движком из реестра ENGINES.
+    """
+
+    def __init__(self, engine=DEFAULT_ENGINE, filename=None):
+        """
+        Инициализация EngineDataLoader.
+
+        Args:
+            engine (str): Имя движка.
+            filename (str|None): Файл по умолчанию для load_data.
+
+        Raises:
+            ValueError: Если движок неизвестен.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок загрузки '{engine}'")
+        self.engine = engine
+        self.filename = filename
+
+    def load_data(self, filename=None):
+        """
+        Загружает файл раскроя выбранным движком.
+
+        Args:
+            filename (str|None): Путь к файлу (по умолчанию self.filename).
+
+        Returns:
+            pd.DataFrame: Загруженные данные.
+
+        Raises:
+            ValueError: Если файл не указан или не найден.
+            RuntimeError: При других ошибках загрузки.
+        """
+        file_to_load = filename or self.filename
+        if not file_to_load:
+            raise ValueError("Не указан файл для загрузки")
+        try:
+            return ENGINES[self.engine][0](file_to_load)
+        except FileNotFoundError:
+            raise ValueError(f"Файл '{file_to_load}' не найден.")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при загрузке данных ({self.engine}): {e}")
+
+
+def loader_for(filename, engine=DEFAULT_ENGINE):
+    """
+    Возвращает загрузчик для файла раскроя.
+
+    Выгрузки CSV/TSV всегда читаются CsvDataLoader (потоково, с остановкой на
+    найденном заказе), Excel-файлы — выбранным калибровкой движком.
+
+    Args:
+        filename (str): Путь к файлу раскроя.
+        engine (str): Движок для Excel-файлов.
+
+    Returns:
+        DataLoader: Загрузчик с filename по умолчанию.
+    """
+    if os.path.splitext(filename)[1].lower() in CSV_EXTENSIONS:
+        return CsvDataLoader(filename)
+    if engine not in available_engines(filename):
+        engine = DEFAULT_ENGINE
+    return EngineDataLoader(engine, filename)
+
+
+def _order_infos(df, sample_size):
+    keys = df['№ Заказа'].astype(str)
+    first_rows = {}
+    for pos, key in enumerate(keys):
+        if key not in first_rows:
+            first_rows[key] = pos
+            if len(first_rows) >= sample_size:
+                break
+    return {key: InfoExtractor(df.iloc[pos]).extract().to_dict() for key, pos in first_rows.items()}
+
+
+def _normalize(infos):
+    # NaN != NaN, поэтому сравниваем строковые представления значений
+    return {key: {field: repr(value) if not (isinstance(value, float) and value != value) else 'nan'
+                  for field, value in info.items()} for key, info in infos.items()}
+
+
+def calibrate(filename, repeats=1, sample_size=200):
+    """
+    Замеряет скорость всех доступных движков на файле и проверяет,
+    что они дают одинаковые OrderInfo.
+
+    Args:
+        filename (str): Файл раскроя.
+        repeats (int): Сколько раз читать файл каждым движком (берётся лучшее время).
+        sample_size (int): Сколько заказов сравнивать между движками.
+
+    Returns:
+        dict: {'timings': {движок: секунды}, 'mismatched': [движки], 'fastest': имя}.
+
+    Raises:
+        ValueError: Если для файла нет ни одного доступного движка.
+    """
+    engines = available_engines(filename)
+    if not engines:
+        raise ValueError(f"Нет движков для чтения файла '{filename}'")
+
+    timings = {}
+    results = {}
+    errors = {}
+    for name in engines:
+        loader = EngineDataLoader(name)
+        best = None
+        try:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                df = loader.load_data(filename)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            results[name] = _normalize(_order_infos(df, sample_size))
+        except Exception as e:
+            errors[name] = str(e)
+
+    if not timings:
+        raise RuntimeError(f"Ни один движок не смог прочитать файл: {errors}")
+
+    # Эталон — движок по умолчанию, если он доступен, иначе самый первый успешный
+    reference = DEFAULT_ENGINE if DEFAULT_ENGINE in results else next(iter(results))
+    mismatched = [name for name in results if results[name] != results[reference]]
+    candidates = {name: seconds for name, seconds in timings.items() if name not in mismatched}
+    return {
+        'timings': timings,
+        'errors': errors,
+        'mismatched': mismatched,
+        'fastest': min(candidates, key=candidates.get),
+    }
+
+
+def load_engine_choice(config_path):
+    """
+    Возвращает движок, сохранённый калибровкой в файле конфигурации.
+
+    Args:
+        config_path (str): Путь к label_generator_config.json.
+
+    Returns:
+        str: Имя движка (DEFAULT_ENGINE, если калибровка не выполнялась или движок недоступен).
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            engine = json.load(f).get(CONFIG_KEY, DEFAULT_ENGINE)
+    except (OSError, ValueError):
+        return DEFAULT_ENGINE
+    return engine if engine in available_engines() else DEFAULT_ENGINE
+
+
+def save_engine_choice(config_path, engine):
+    """
+    Сохраняет выбранный движок в файл конфигурации, не затирая остальные настройки.
+
+    Args:
+        config_path (str): Путь к label_generator_config.json.
+        engine (str): Имя движка.
+    """
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    config[CONFIG_KEY] = engine
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=4)
+
+
+def main():
+    """
+    Калибровка движков загрузки из командной строки.
+
+    Читает файл раскроя каждым доступным движком, печатает время и
+    запоминает самый быстрый движок с совпадающими результатами.
+    """
+    parser = argparse.ArgumentParser(description="Выбор самого быстрого движка чтения файла раскроя")
+    parser.add_argument('--config', default='label_generator_config.json')
+    parser.add_argument('--file', help="Файл раскроя (по умолчанию из конфигурации)")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    filename = args.file
+    if not filename and os.path.exists(args.config):
+        with open(args.config, 'r', encoding='utf-8') as f:
+            filename = json.load(f).get('excel_file_path')
+    if not filename:
+        print("❌ Не указан файл раскроя")
+        return
+
+    result = calibrate(filename, repeats=args.repeats)
+    for name, seconds in sorted(result['timings'].items(), key=lambda item: item[1]):
+        mark = " ⚠️ результаты отличаются" if name in result['mismatched'] else ""
+        print(f"{name:10} {seconds:.3f} с{mark}")
+    for name, error in result['errors'].items():
+        print(f"{name:10} ❌ {error}")
+
+    save_engine_choice(args.config, result['fastest'])
+    print(f"✅ Выбран движок: {result['fastest']}")
+
+
+if __name__ == "__main__":
+    main()
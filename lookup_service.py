@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib import error as urllib_error
+from urllib import parse as urllib_parse
+from urllib import request as urllib_request
+
+from order_search import ExcelDataLoader, InfoExtractor
+
+
+def _json_default(value):
+    # Значения из DataFrame приходят как типы numpy
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class OrderIndex:
+    """
+    Проиндексированный в памяти файл раскроя.
+
+    Файл читается один раз, строится словарь «номер заказа → первая строка»,
+    а извлечённые OrderInfo кэшируются. При изменении файла на диске
+    индекс перестраивается при следующем запросе.
+    """
+
+    def __init__(self, filename, data_loader=None, check_interval=5.0):
+        """
+        Инициализация OrderIndex.
+
+        Args:
+            filename (str): Путь к файлу раскроя.
+            data_loader (DataLoader|None): Загрузчик данных (по умолчанию ExcelDataLoader).
+            check_interval (float): Как часто (в секундах) проверять, не изменился ли файл.
+        """
+        self.filename = filename
+        self.data_loader = data_loader or ExcelDataLoader()
+        self.check_interval = check_interval
+
+        self._df = None
+        self._positions = {}
+        self._info_cache = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.queries = 0
+
+    def _load(self):
+        started = time.perf_counter()
+        mtime = os.path.getmtime(self.filename)
+        df = self.data_loader.load_data(self.filename)
+        positions = {}
+        for pos, key in enumerate(df['№ Заказа'].astype(str)):
+            positions.setdefault(key, pos)
+        return df, positions, mtime, time.perf_counter() - started
+
+    async def ensure_loaded(self):
+        """
+        Загружает файл, если он ещё не загружен или изменился с прошлой загрузки.
+        Чтение выполняется в отдельном потоке, чтобы не блокировать остальных клиентов.
+        """
+        now = time.monotonic()
+        if self._df is not None and now - self._last_check < self.check_interval:
+            return
+
+        async with self._lock:
+            if self._df is not None and time.monotonic() - self._last_check < self.check_interval:
+                return
+            self._last_check = time.monotonic()
+            if self._df is not None and os.path.getmtime(self.filename) == self._mtime:
+                return
+
+            loop = asyncio.get_running_loop()
+            df, positions, mtime, seconds = await loop.run_in_executor(None, self._load)
+            self._df, self._positions, self._mtime = df, positions, mtime
+            self._info_cache = {}
+            self.loads += 1
+            self.load_seconds += seconds
+
+    async def lookup(self, order_number):
+        """
+        Ищет заказ по номеру.
+
+        Args:
+            order_number (str): Номер заказа.
+
+        Returns:
+            dict|None: Данные OrderInfo в виде словаря или None, если заказ не найден.
+        """
+        await self.ensure_loaded()
+        self.queries += 1
+        key = str(order_number)
+        if key in self._info_cache:
+            return self._info_cache[key]
+
+        pos = self._positions.get(key)
+        if pos is None:
+            return None
+        info = InfoExtractor(self._df.iloc[pos]).extract().to_dict()
+        self._info_cache[key] = info
+        return info
+
+    def stats(self):
+        """
+        Возвращает статистику индекса.
+
+        Returns:
+            dict: Количество строк и заказов, число загрузок и запросов.
+        """
+        return {
+            'filename': self.filename,
+            'rows': 0 if self._df is None else len(self._df),
+            'orders': len(self._positions),
+            'loads': self.loads,
+            'load_seconds': self.load_seconds,
+            'queries': self.queries,
+            'cached_orders': len(self._info_cache),
+        }
+
+
+class LookupServer:
+    """
+    Асинхронный HTTP-сервис поиска заказов.
+
+    GET /orders/<номер> — данные заказа (JSON OrderInfo) или 404.
+    GET /stats          — статистика индекса.
+    """
+
+    def __init__(self, index, host='127.0.0.1', port=8766):
+        """
+        Инициализация LookupServer.
+
+        Args:
+            index (OrderIndex): Индекс файла раскроя.
+            host (str): Адрес для прослушивания.
+            port (int): Порт.
+        """
+        self.index = index
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def _respond(self, writer, status, payload):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}[status]
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('ascii') + body
+        )
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+
+            if len(request_line) < 2 or request_line[0] != 'GET':
+                await self._respond(writer, 400, {'error': 'bad request'})
+                return
+
+            path = urllib_parse.unquote(request_line[1])
+            if path == '/stats':
+                await self._respond(writer, 200, self.index.stats())
+            elif path.startswith('/orders/'):
+                order_number = path[len('/orders/'):].strip()
+                info = await self.index.lookup(order_number)
+                if info is None:
+                    await self._respond(writer, 404, {'error': f"Заказ №{order_number} не найден."})
+                else:
+                    await self._respond(writer, 200, info)
+            else:
+                await self._respond(writer, 404, {'error': 'not found'})
+        except Exception as e:
+            await self._respond(writer, 500, {'error': str(e)})
+        finally:
+            writer.close()
+
+    async def start(self):
+        """
+        Загружает индекс и начинает принимать подключения.
+        """
+        await self.index.ensure_loaded()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class LookupClient:
+    """
+    Клиент сервиса поиска заказов для настольного приложения.
+    """
+
+    def __init__(self, base_url='http://127.0.0.1:8766', timeout=5):
+        """
+        Инициализация LookupClient.
+
+        Args:
+            base_url (str): Адрес сервиса.
+            timeout (float): Таймаут запроса в секундах.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def lookup(self, order_number):
+        """
+        Запрашивает данные заказа.
+
+        Args:
+            order_number (str): Номер заказа.
+
+        Returns:
+            dict|str: Данные OrderInfo или сообщение о том, что заказ не найден.
+
+        Raises:
+            RuntimeError: Если сервис недоступен.
+        """
+        url = f"{self.base_url}/orders/{urllib_parse.quote(str(order_number))}"
+        try:
+            with urllib_request.urlopen(url, timeout=self.timeout) as response:
+                info = json.loads(response.read().decode('utf-8'))
+        except urllib_error.HTTPError as e:
+            if e.code == 404:
+                return json.loads(e.read().decode('utf-8'))['error']
+            raise RuntimeError(f"Ошибка сервиса поиска: {e}")
+        except urllib_error.URLError as e:
+            raise RuntimeError(f"Сервис поиска недоступен: {e.reason}")
+
+        info['dimensions'] = tuple(info.get('dimensions') or ())
+        return info
+
+
+def main():
+    """
+    Запускает сервис поиска заказов из командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Сервис поиска заказов по файлу раскроя")
+    parser.add_argument('--file', required=True, help="Путь к файлу раскроя")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    server = LookupServer(OrderIndex(args.file), args.host, args.port)
+    print(f"Сервис поиска слушает http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
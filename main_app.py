@@ -1,27 +1,62 @@
 import sys
 import os
+import hashlib
+import numbers
 import re
 import json
+import gc
+import time
+import datetime as dt
+import tempfile
+from copy import copy
 from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
 
 import pandas as pd
 from openpyxl import Workbook
-from openpyxl.styles import Border, Side, Alignment, Font
+from openpyxl.cell.cell import Cell, MergedCell
 from openpyxl.drawing.image import Image
-from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.packaging.relationship import get_rels_path
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.worksheet.pagebreak import Break, RowBreak
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import tostring
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel,
     QLineEdit, QPushButton, QComboBox, QSpinBox, QTextEdit, QFileDialog,
-    QMessageBox, QListWidget, QListWidgetItem, QInputDialog, QDialog,
-    QFormLayout, QDialogButtonBox
+    QMessageBox, QTableView, QHeaderView, QAbstractItemView, QInputDialog, QDialog,
+    QFormLayout, QDialogButtonBox, QToolTip
 )
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
+from PyQt6.QtGui import QCursor, QFont
 
 import order_search
+from parse_cache import parse_name, parse_carcase, cache_stats, clear_caches
+from headers import canonical_frame, is_known_header
+from notices import INFO, take_notices
+from plan_schema import apply_schema
+from lookup_service import LookupClient
+from order_store import SQLiteDataLoader
+from loader_engines import DEFAULT_ENGINE, load_engine_choice, loader_for
+from plan_cache import PlanStore, RenderCache, changed_packages, plan_hash
+from label_layout import get_layouts, label_date
+from label_plan_model import COLUMNS as PLAN_COLUMNS, EDITABLE_COLUMNS, LabelPlanModel
+from label_preview import LabelPreviewRenderer, LabelPreviewWidget
+from zpl_backend import render_zpl
+from package_codes import barcode_png, draw_barcode_png, render_batch
+from memory_profile import MemoryProfiler
+from metrics import (CACHE_REQUESTS, LABELS_RENDERED, LOAD_SECONDS, OUTPUT_BYTES, PREGENERATED, RENDER_SECONDS,
+                     SAVE_SECONDS, SEARCH_SECONDS, SEARCHES, MetricsExporter)
+from snapshot import SnapshotCache
+from save_pipeline import STAGING_DIR, SavePipeline
+from scanner_mode import DEFAULT_SCANNER_PLAN, SCANNER_OUTPUT_DIR, MemoryOrderIndex, ScannerWorker, default_plan
+from plan_diff import PREGENERATED_DIR, PlanWatcher
 
 
 # Классы из order_search.py
@@ -30,6 +65,11 @@ class DataLoader(ABC):
     def load_data(self, filename):
         pass
 
+    def find_order(self, order_number, filename=None):
+        df = self.load_data(filename)
+        filtered_rows = df[df['№ Заказа'].astype(str) == str(order_number)]
+        return None if filtered_rows.empty else filtered_rows.iloc[0]
+
 
 class ExcelDataLoader(DataLoader):
     def __init__(self):
@@ -40,7 +80,8 @@ class ExcelDataLoader(DataLoader):
             file_to_load = filename or self.filename
             if not file_to_load:
                 raise ValueError("Не указан файл для загрузки")
-            return pd.read_excel(file_to_load)
+            df = canonical_frame(pd.read_excel(file_to_load, usecols=is_known_header), file_to_load)
+            return apply_schema(df, file_to_load)
         except FileNotFoundError:
             raise ValueError(f"Файл '{file_to_load}' не найден.")
         except Exception as e:
@@ -48,22 +89,36 @@ class ExcelDataLoader(DataLoader):
 
 
 class OrderProcessor:
-    def __init__(self, data_loader: DataLoader):
+    def __init__(self, data_loader: DataLoader, profiler=None):
         self.data_loader = data_loader
+        self.profiler = profiler or MemoryProfiler()
 
     def process_order(self, order_number):
-        df = self.data_loader.load_data()
-        filtered_rows = df[df['№ Заказа'].astype(str) == str(order_number)]
+        with self.profiler.stage("Загрузка данных (load_data)"), LOAD_SECONDS.time():
+            first_row = self.data_loader.find_order(order_number)
 
-        if filtered_rows.empty:
+        if first_row is None:
             return f"Заказ №{order_number} не найден."
 
-        first_row = filtered_rows.iloc[0]
-        info_extractor = InfoExtractor(first_row)
-        extracted_info = info_extractor.extract()
+        with self.profiler.stage("Извлечение данных заказа"):
+            info_extractor = InfoExtractor(first_row)
+            extracted_info = info_extractor.extract()
         return extracted_info
 
 
+class RemoteOrderProcessor:
+    """Ищет заказы через сервис lookup_service вместо чтения Excel на станции"""
+
+    def __init__(self, service_url):
+        self.client = LookupClient(service_url)
+
+    def process_order(self, order_number):
+        info = self.client.lookup(order_number)
+        if isinstance(info, str):
+            return info
+        return OrderInfo(**info)
+
+
 class InfoExtractor:
     def __init__(self, row):
         self.row = row
@@ -92,17 +147,13 @@ class InfoExtractor:
         return self.row.get('Наименование', '')
 
     def _extract_item_name(self):
-        match = re.match(r'(.*?)(\d+)[xхХХ*×]', self.row.get('Наименование', ''))
-        return match.group(1).strip() if match else ''
+        return parse_name(self.row.get('Наименование', ''))[0]
 
     def _extract_dimensions(self):
-        dimensions_match = re.search(r'(\d+)\s*[xхХХ*×]\s*(\d+)\s*[xхХХ*×]\s*(\d+)', self.row.get('Наименование', ''))
-        return tuple(map(int, dimensions_match.groups())) if dimensions_match else ()
+        return parse_name(self.row.get('Наименование', ''))[1]
 
     def _extract_carcase(self):
-        raw_carcase = self.row.get('Корпус', '').split('/')
-        words = {re.match(r'\D+', p.strip()).group().strip() for p in raw_carcase if p.strip()}
-        return '/'.join(words)
+        return parse_carcase(self.row.get('Корпус', ''))
 
     def _extract_extra_component(self):
         component = self.row.get('Профиль /            Доп. Элементы', '')
@@ -114,7 +165,8 @@ class InfoExtractor:
 
     def _extract_weight(self):
         weight = self.row.get('ВЕС, КГ', '')
-        return float(weight) if isinstance(weight, (float, int)) else None
+        # Вес хранится как float32, поэтому округляется до граммов
+        return round(float(weight), 3) if isinstance(weight, numbers.Real) and weight == weight else None
 
 
 class OrderInfo:
@@ -151,20 +203,31 @@ class OrderInfo:
         return "\n".join(output)
 
 
-# Константы для размеров ячеек
-from sizes import row_heights, col_widths
+# Сколько этикеток размещать на одном листе книги по умолчанию
+DEFAULT_LABELS_PER_SHEET = 100
+# Начиная с этого количества этикеток книга создаётся потоково (StreamingLabelSheet)
+STREAMING_THRESHOLD = 2000
+# Этикеток на странице → сетка (этикеток в ряду, рядов на странице)
+NUP_GRIDS = {1: (1, 1), 2: (2, 1), 4: (2, 2)}
 
 
 class LabelEditorDialog(QDialog):
-    def __init__(self, label_data, parent=None):
+    def __init__(self, label_data, parent=None, renderer=None, package_total=None):
         super().__init__(parent)
         self.setWindowTitle("Редактирование данных этикетки")
         self.label_data = label_data
+        self.renderer = renderer
+        self.package_total = package_total
         self.init_ui()
 
     def init_ui(self):
         layout = QFormLayout(self)
 
+        # Предпросмотр перерисовывается при каждой правке полей
+        self.preview = LabelPreviewWidget(self.renderer)
+        self.preview.setMinimumSize(520, 130)
+        layout.addRow(self.preview)
+
         # Поля для редактирования
         self.item_name_edit = QLineEdit(self.label_data['item_name'])
         self.width_edit = QLineEdit(
@@ -202,6 +265,11 @@ class LabelEditorDialog(QDialog):
         layout.addRow("Клиент:", self.client_edit)
         layout.addRow("Компонент:", self.component_edit)
 
+        for edit in (self.item_name_edit, self.width_edit, self.height_edit, self.depth_edit, self.weight_edit,
+                     self.order_number_edit, self.store_number_edit, self.client_edit, self.component_edit):
+            edit.textChanged.connect(self.update_preview)
+        self.update_preview()
+
         # Кнопки
         buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         buttons.accepted.connect(self.accept)
@@ -209,233 +277,761 @@ class LabelEditorDialog(QDialog):
 
         layout.addRow(buttons)
 
+    def update_preview(self):
+        # Правки применяются к копии: исходные данные меняются только по OK
+        self.preview.show_label(self._apply_edits(dict(self.label_data)), self.package_total)
+
     def get_edited_data(self):
+        return self._apply_edits(self.label_data)
+
+    def _apply_edits(self, label_data):
         # Обновляем данные на основе введенных значений
-        self.label_data['item_name'] = self.item_name_edit.text()
+        label_data['item_name'] = self.item_name_edit.text()
 
         try:
             width = int(self.width_edit.text())
             height = int(self.height_edit.text())
             depth = int(self.depth_edit.text())
-            self.label_data['dimensions'] = (width, height, depth)
+            label_data['dimensions'] = (width, height, depth)
         except ValueError:
             pass
 
         try:
-            self.label_data['weight'] = float(self.weight_edit.text())
+            label_data['weight'] = float(self.weight_edit.text())
         except ValueError:
-            self.label_data['weight'] = None
+            label_data['weight'] = None
 
-        self.label_data['store_number'] = self.store_number_edit.text()
-        self.label_data['client'] = self.client_edit.text()
-        self.label_data['order_number'] = self.order_number_edit.text()
+        label_data['store_number'] = self.store_number_edit.text()
+        label_data['client'] = self.client_edit.text()
+        label_data['order_number'] = self.order_number_edit.text()
 
         # Обновляем компонент в зависимости от типа этикетки
-        label_type = self.label_data['label_type'].upper()
+        label_type = label_data['label_type'].upper()
         if label_type == "КОРПУС":
-            self.label_data['carcase'] = self.component_edit.text()
+            label_data['carcase'] = self.component_edit.text()
         elif label_type == "ОРГАЛИТ":
             pass  # Оставляем "БЕЛЫЙ"
         elif label_type in ["ФАСАДЫ МДФ", "ФАСАДЫ ПЛАСТИК"]:
-            self.label_data['facade'] = self.component_edit.text()
+            label_data['facade'] = self.component_edit.text()
         else:
-            self.label_data['extra_component'] = self.component_edit.text()
+            label_data['extra_component'] = self.component_edit.text()
 
-        return self.label_data
+        return label_data
 
 
-class Label:
-    ROWS_PER_LABEL = 17
+def shift_column(col_letter, col_offset):
+    """Сдвигает букву столбца на col_offset столбцов вправо"""
+    return get_column_letter(column_index_from_string(col_letter) + col_offset) if col_offset else col_letter
+
 
-    def __init__(self, ws, start_row, label_data):
+class Label:
+    def __init__(self, ws, start_row, label_data, layout=None, start_col=1):
         self.ws = ws
         self.start_row = start_row
         self.row_offset = start_row - 1
+        self.start_col = start_col
+        self.col_offset = start_col - 1
         self.label_data = label_data
-
-        self.merge_ranges = [
-            "A1:E8", "A9:B12", "C9:E12", "A13:E16", "F1:L4", "M1:O4", "P1:R4", "S1:S16",
-            "F5:I8", "J5:L8", "M5:O8", "P5:R8", "F9:I12", "J9:L12", "M9:O12", "P9:R12",
-            "F13:G14", "H13:I14", "J13:K14", "F15:G16", "H15:I16", "J15:K16", "L13:M16",
-            "N13:N16", "O13:O16", "P13:R16"
-        ]
-
-        self.images_info = [
-            ("images/Logo.png", "A2", 323.62, 108.4615384615385),
-            ("images/EAC.png", "A9", 77.214, 61.53856),
-            ("images/Contacts.png", "C9", 193.035, 65.38455),
-        ]
-
-        self.center_alignment = Alignment(horizontal="center", vertical="center")
-
-        self.thick_border = Border(
-            left=Side(style="thick"),
-            right=Side(style="thick"),
-            top=Side(style="thick"),
-            bottom=Side(style="thick")
-        )
+        self.layout = layout or get_layouts().default
+        self._images = []
 
     def _apply_row_heights(self):
-        for r, h in row_heights.items():
+        for r, h in self.layout.row_heights:
             self.ws.row_dimensions[r + self.row_offset].height = h
 
     def _apply_merge_and_borders(self):
-        for merge_range in self.merge_ranges:
-            start_cell, end_cell = merge_range.split(':')
-            start_col_letter, start_row = coordinate_from_string(start_cell)
-            end_col_letter, end_row = coordinate_from_string(end_cell)
-            start_col = column_index_from_string(start_col_letter)
-            end_col = column_index_from_string(end_col_letter)
+        border = self.layout.border
+        for min_row, min_col, max_row, max_col in self.layout.merges:
+            self.ws.merge_cells(start_row=min_row + self.row_offset, start_column=min_col + self.col_offset,
+                                end_row=max_row + self.row_offset, end_column=max_col + self.col_offset)
 
-            new_start_cell = f"{start_col_letter}{start_row + self.row_offset}"
-            new_end_cell = f"{end_col_letter}{end_row + self.row_offset}"
-            new_merge_range = f"{new_start_cell}:{new_end_cell}"
-
-            self.ws.merge_cells(new_merge_range)
-
-            for row in range(start_row + self.row_offset, end_row + self.row_offset + 1):
-                for col in range(start_col, end_col + 1):
-                    cell = self.ws.cell(row=row, column=col)
-                    cell.border = self.thick_border
+            for row in range(min_row + self.row_offset, max_row + self.row_offset + 1):
+                for col in range(min_col + self.col_offset, max_col + self.col_offset + 1):
+                    self.ws.cell(row=row, column=col).border = border
 
     def _insert_images(self):
-        for path, cell, width, height in self.images_info:
+        for path, col_letter, row_num, width, height in self.layout.images:
             if not os.path.exists(path):
                 continue
 
             try:
-                col_letter, row_num = coordinate_from_string(cell)
-                new_row = row_num + self.row_offset
-                new_cell = f"{col_letter}{new_row}"
-                img = Image(path)
+                img = SharedImage(path)
                 img.width = width
                 img.height = height
-                self.ws.add_image(img, new_cell)
+                self.ws.add_image(img, f"{shift_column(col_letter, self.col_offset)}{row_num + self.row_offset}")
+                self._images.append((img, col_letter, row_num))
             except Exception as e:
                 print(f"Ошибка при вставке изображения {path}: {e}")
 
-    def _set_text_cells(self):
-        data = self.label_data
-        dimensions = data.get('dimensions', (0, 0, 0))
-
-        # Определяем значение для J9
-        label_type = data['label_type'].upper()
-        if label_type == "КОРПУС":
-            j9_value = data['carcase']
-        elif label_type == "ОРГАЛИТ":
-            j9_value = "БЕЛЫЙ"
-        elif label_type in ["ФАСАДЫ МДФ", "ФАСАДЫ ПЛАСТИК"]:
-            j9_value = data.get('facade', '')
-        else:
-            j9_value = data.get('extra_component', '')
-
-        # Формируем текст для M9
-        m9_text = f"{data.get('client', '')}/{data.get('store_number', '')}"
-
-        text_cells = [
-            ("A13", "ГОСТ 16371-2014", 16),
-            ("F1", data.get('item_name', ''), 16),
-            ("F9", data['label_type'].upper(), 24),
-            ("J9", j9_value, 16),
-            ("F15", str(dimensions[1]) if len(dimensions) > 1 else "", 14),
-            ("H15", str(dimensions[0]) if len(dimensions) > 0 else "", 14),
-            ("J15", str(dimensions[2]) if len(dimensions) > 2 else "", 14),
-            ("N13", str(int(data['weight'])) if data.get('weight') else "", 14),
-            ("M1", f"№ {data.get('order_number', '')}", 20),
-            ("M9", m9_text, 14),
-            ("P5", str(data.get('package_total', 1)), 20),
-            ("P13", str(data.get('package_num', 1)), 20),
-            ("F5", "Наименование упаковки", 16),
-            ("J5", "Цвет", 20),
-            ("M5", "ЗАКАЗЧИК", 20),
-            ("P1", "ВСЕГО УПАКОВОК", 14),
-            ("P9", "№ УПАКОВКИ", 14),
-            ("F13", "ВЫСОТА", 14),
-            ("H13", "ШИРИНА", 14),
-            ("J13", "ГЛУБИНА", 14),
-            ("L13", "ВЕС", 14),
-            ("O13", "КГ", 14),
-        ]
-
-        for cell, text, size in text_cells:
-            if not text:
-                continue
+    def _insert_barcodes(self, ws, row_offset, col_offset, label_data):
+        for col_letter, row_num, value, width, height in self.layout.barcode_values(label_data):
+            try:
+                img = BarcodeImage(value)
+                img.width = width
+                img.height = height
+                ws.add_image(img, f"{shift_column(col_letter, col_offset)}{row_num + row_offset}")
+            except Exception as e:
+                print(f"Ошибка при вставке штрихкода {value}: {e}")
 
-            col_letter, row_num = coordinate_from_string(cell)
-            new_row = row_num + self.row_offset
-            new_cell = f"{col_letter}{new_row}"
-
-            self.ws[new_cell] = text
-            self.ws[new_cell].font = Font(name="Times New Roman", size=size, bold=True)
-            self.ws[new_cell].alignment = self.center_alignment
-
-    def _set_date(self):
-        date_cell = f"S{1 + self.row_offset}"
-        label_date = (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y")
-        self.ws[date_cell] = label_date
-        self.ws[date_cell].font = Font(name="Times New Roman", size=26, bold=True)
-        self.ws[date_cell].alignment = Alignment(
-            horizontal="center", vertical="center", textRotation=90
-        )
+    def _set_text_cells(self):
+        for row, col, value, font, alignment in self.layout.render_texts(self.label_data):
+            cell = self.ws.cell(row=row + self.row_offset, column=col + self.col_offset)
+            cell.value = value
+            cell.font = font
+            cell.alignment = alignment
 
     def create(self):
         self._apply_row_heights()
         self._apply_merge_and_borders()
         self._insert_images()
+        self._insert_barcodes(self.ws, self.row_offset, self.col_offset, self.label_data)
         self._set_text_cells()
-        self._set_date()
+
+    def replicate(self, start_row, package_num, ws=None, start_col=1):
+        """
+        Копирует уже созданную этикетку в строки, начиная со start_row,
+        и в столбцы, начиная со start_col, меняя только номер упаковки.
+        Стили, объединения и изображения не строятся заново, а переносятся
+        со смещением. Копия может быть размещена на другом листе той же книги (ws).
+        """
+        ws = ws or self.ws
+        row_offset = start_row - 1
+        col_offset = start_col - 1
+        for r, h in self.layout.row_heights:
+            ws.row_dimensions[r + row_offset].height = h
+
+        # Ячейки шаблона (включая MergedCell с границами) копируются вместе с массивом стилей,
+        # как это делает openpyxl при копировании листа
+        cells = self.ws._cells
+        for row in range(self.start_row, self.start_row + self.layout.rows):
+            target_row = row - self.start_row + start_row
+            for col in range(1, self.layout.columns + 1):
+                source = cells.get((row, col + self.col_offset))
+                if source is None:
+                    continue
+                target_col = col + col_offset
+                if isinstance(source, MergedCell):
+                    target = MergedCell(ws, target_row, target_col)
+                    ws._cells[(target_row, target_col)] = target
+                else:
+                    target = ws.cell(row=target_row, column=target_col)
+                    target._value = source._value
+                    target.data_type = source.data_type
+                target._style = copy(source._style)
+
+        # Диапазоны этикеток не пересекаются, поэтому добавляем их без проверки вхождения
+        for min_row, min_col, max_row, max_col in self.layout.merges:
+            shifted = (f"{get_column_letter(min_col + col_offset)}{min_row + row_offset}:"
+                       f"{get_column_letter(max_col + col_offset)}{max_row + row_offset}")
+            ws.merged_cells.ranges.add(MergedCellRange(ws, shifted))
+
+        for img, col_letter, row_num in self._images:
+            ws.add_image(copy(img), f"{shift_column(col_letter, col_offset)}{row_num + row_offset}")
+        self._insert_barcodes(ws, row_offset, col_offset, dict(self.label_data, package_num=package_num))
+
+        for (row, col), value in self.layout.package_values(self.label_data, package_num).items():
+            ws.cell(row=row + row_offset, column=col + col_offset).value = value
 
 
 class LabelSheet:
-    def __init__(self, labels_data):
+    # Печатная область A4 с полями 0.25" в пунктах (ширина x высота в альбомной ориентации)
+    PRINTABLE_WIDTH_PT = 806
+    PRINTABLE_HEIGHT_PT = 559
+
+    def __init__(self, labels_data, labels_per_sheet=None, split_by_order=False, packages=None, layouts=None,
+                 labels_per_page=1):
+        """
+        labels_per_sheet — сколько этикеток размещать на одном листе (None — все на одном);
+        split_by_order — начинать новый лист при смене номера заказа;
+        packages — номера упаковок для отрисовки (None — все), нумерация n/N сохраняется;
+        layouts — скомпилированные макеты (по умолчанию из папки layouts);
+        labels_per_page — сколько этикеток печатать на одной странице (1, 2 или 4, см. NUP_GRIDS).
+        """
+        if labels_per_page not in NUP_GRIDS:
+            raise ValueError(f"Неподдерживаемое число этикеток на странице: {labels_per_page}")
         self.labels_data = labels_data
+        self.labels_per_sheet = labels_per_sheet
+        self.split_by_order = split_by_order
+        self.packages = set(packages) if packages is not None else None
+        self.layouts = layouts or get_layouts()
+        self.across, self.down = NUP_GRIDS[labels_per_page]
+        # Ширина ячейки сетки в столбцах — по самому широкому макету
+        self.slot_columns = max(layout.columns for layout in (self.layouts.default, *self.layouts.variants))
         self.wb = Workbook()
         self.ws = self.wb.active
+        self._sheet_labels = 0
+        self._sheet_rows = 0
+        self._band_ends = []
+        self._band_layout = None
+        self._band_start = 0
+        self._band_slots = 0
+        self._sheet_order = None
 
     def _set_column_widths(self):
-        for col, width in col_widths.items():
-            self.ws.column_dimensions[col].width = width
+        # Ширины столбцов берутся из макета по умолчанию и повторяются для каждой этикетки в ряду
+        for col, width in self.layouts.default.column_widths.items():
+            for slot in range(self.across):
+                self.ws.column_dimensions[shift_column(col, slot * self.slot_columns)].width = width
+
+    def _page_size_pt(self):
+        # Ширина столбца в пикселях по правилу Excel (~7 px на символ + 5 px), 1 px = 0.75 pt
+        layout = self.layouts.default
+        width_pt = sum((7 * layout.column_widths.get(get_column_letter(col), 8.43) + 5) * 0.75
+                       for col in range(1, self.slot_columns + 1))
+        row_heights = dict(layout.row_heights)
+        height_pt = sum(row_heights.get(row, 15) for row in range(1, layout.rows + 1))
+        return width_pt * self.across, height_pt * self.down
+
+    def _page_setup(self):
+        """Возвращает ориентацию и масштаб, при которых сетка этикеток крупнее всего помещается на страницу"""
+        width_pt, height_pt = self._page_size_pt()
+        options = []
+        for orientation, page_width, page_height in (
+                ('landscape', self.PRINTABLE_WIDTH_PT, self.PRINTABLE_HEIGHT_PT),
+                ('portrait', self.PRINTABLE_HEIGHT_PT, self.PRINTABLE_WIDTH_PT)):
+            scale = min(page_width / width_pt, page_height / height_pt)
+            options.append((scale, orientation == 'landscape', orientation))
+        scale, _, orientation = max(options)
+        return orientation, max(10, min(100, int(scale * 100)))
+
+    def _sheet_title(self, order_number):
+        if self.split_by_order and order_number:
+            base = re.sub(r'[\\/*?:\[\]]', '_', f"Заказ {order_number}")[:28]
+        else:
+            base = "Этикетки"
+        title, n = base, 1
+        while title in self.wb.sheetnames and self.wb[title] is not self.ws:
+            n += 1
+            title = f"{base} {n}"
+        return title
+
+    def _advance(self, layout):
+        # Этикетки ряда стоят рядом и делят высоты строк, поэтому в одном ряду только один макет
+        if self._band_layout is not layout or self._band_slots >= self.across:
+            self._close_band()
+            self._band_start = self._sheet_rows + 1
+            self._sheet_rows += layout.rows
+            self._band_ends.append(self._sheet_rows)
+            self._band_layout = layout
+            self._band_slots = 0
+        start_col = self._band_slots * self.slot_columns + 1
+        self._band_slots += 1
+        self._sheet_labels += 1
+        return self._band_start, start_col
+
+    def _close_band(self):
+        """Вызывается перед началом нового ряда этикеток"""
+
+    def _start_sheet(self):
+        self._sheet_labels = 0
+        self._sheet_rows = 0
+        self._band_ends = []
+        self._band_layout = None
+        self._band_slots = 0
+
+    def _next_position(self, label_info, layout):
+        """
+        Возвращает лист, начальную строку и начальный столбец следующей этикетки
+        с макетом layout, при необходимости начинает новый лист
+        """
+        order_number = label_info.get('order_number')
+        sheet_full = self.labels_per_sheet and self._sheet_labels >= self.labels_per_sheet
+        order_changed = self.split_by_order and self._sheet_labels and order_number != self._sheet_order
+        if sheet_full or order_changed:
+            self._finish_sheet()
+            self.ws = self.wb.create_sheet()
+            self._start_sheet()
+
+        if self._sheet_labels == 0:
+            self._sheet_order = order_number
+            self.ws.title = self._sheet_title(order_number)
+            self._set_column_widths()
+
+        return (self.ws, *self._advance(layout))
+
+    def _finish_sheet(self):
+        """
+        Задаёт область печати и разрывы страниц так, чтобы на каждой странице
+        печаталась одна сетка этикеток (down рядов по across этикеток)
+        """
+        if not self._sheet_labels:
+            return
+        self._close_band()
+        LABELS_RENDERED.inc(self._sheet_labels, format='xlsx')
+        self.ws.print_area = f"A1:{get_column_letter(self.slot_columns * self.across)}{self._sheet_rows}"
+        for band_end in self._band_ends[self.down - 1:-1:self.down]:
+            self.ws.row_breaks.append(Break(id=band_end))
+        orientation, scale = self._page_setup()
+        self.ws.page_setup.orientation = orientation
+        self.ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
+        self.ws.page_setup.scale = scale
+        self.ws.page_margins.left = self.ws.page_margins.right = 0.25
+        self.ws.page_margins.top = self.ws.page_margins.bottom = 0.25
+        self.ws.print_options.horizontalCentered = True
+
+    def _label_data(self, label_info, package_num):
+        return {
+            'label_type': label_info['label_type'],
+            'item_name': label_info['item_name'],
+            'dimensions': label_info['dimensions'],
+            'weight': label_info['weight'],
+            'store_number': label_info['store_number'],
+            'client': label_info['client'],
+            'carcase': label_info['carcase'],
+            'extra_component': label_info['extra_component'],
+            'facade': label_info.get('facade', ''),
+            'order_number': label_info['order_number'],
+            'package_total': self.labels_data['package_total'],
+            'package_num': package_num
+        }
+
+    def _selected_packages(self, first, count):
+        return [n for n in range(first, first + count) if self.packages is None or n in self.packages]
+
+    @staticmethod
+    def _prerender_codes(label_data, layout, numbers):
+        """Рисует штрихкоды всех упаковок позиции одним пакетом до отрисовки этикеток"""
+        if layout.barcodes:
+            render_batch(value for num in numbers
+                         for _, _, value, _, _ in layout.barcode_values(dict(label_data, package_num=num)))
 
     def create_labels(self):
-        self._set_column_widths()
         package_num = 1
 
         for label_info in self.labels_data['labels']:
-            label_type = label_info['label_type']
-            count = label_info['count']
-
-            for _ in range(count):
-                label_data = {
-                    'label_type': label_type,
-                    'item_name': label_info['item_name'],
-                    'dimensions': label_info['dimensions'],
-                    'weight': label_info['weight'],
-                    'store_number': label_info['store_number'],
-                    'client': label_info['client'],
-                    'carcase': label_info['carcase'],
-                    'extra_component': label_info['extra_component'],
-                    'facade': label_info.get('facade', ''),
-                    'order_number': label_info['order_number'],
-                    'package_total': self.labels_data['package_total'],
-                    'package_num': package_num
-                }
-
-                start_row = 1 + (package_num - 1) * Label.ROWS_PER_LABEL
-                label = Label(self.ws, start_row, label_data)
+            numbers = self._selected_packages(package_num, label_info['count'])
+            if numbers:
+                first = self._label_data(label_info, numbers[0])
+                self._prerender_codes(first, self.layouts.select(first), numbers)
+            for num in numbers:
+                label_data = self._label_data(label_info, num)
+                layout = self.layouts.select(label_data)
+                ws, start_row, start_col = self._next_position(label_info, layout)
+                label = Label(ws, start_row, label_data, layout, start_col)
                 label.create()
-                package_num += 1
+            package_num += label_info['count']
+
+        self._finish_sheet()
+
+    def _excel_writer(self, archive):
+        return DedupExcelWriter(self.wb, archive)
 
     def save(self, filename):
+        # Как Workbook.save, но изображения пишутся в архив по одному файлу на источник.
+        # Книга пишется во временный файл и переименовывается, чтобы при ошибке не остался недописанный файл
+        tmp_path = filename + '.tmp'
         try:
-            self.wb.save(filename)
+            if not self.wb.worksheets:
+                self.wb.create_sheet()
+            with SAVE_SECONDS.time(format='xlsx'):
+                with ZipFile(tmp_path, 'w', ZIP_DEFLATED, allowZip64=True) as archive:
+                    self.wb.properties.modified = dt.datetime.now(tz=dt.timezone.utc).replace(tzinfo=None)
+                    self._excel_writer(archive).save()
+                os.replace(tmp_path, filename)
+            OUTPUT_BYTES.inc(os.path.getsize(filename), format='xlsx')
             return True
         except Exception as e:
             print(f"Ошибка при сохранении файла: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
 
 
+class ReplicatedLabelSheet(LabelSheet):
+    """
+    Отрисовывает одну этикетку на каждую позицию плана, а её копии
+    получает тиражированием блока со сменой только номера упаковки.
+    """
+
+    def create_labels(self):
+        package_num = 1
+
+        for label_info in self.labels_data['labels']:
+            numbers = self._selected_packages(package_num, label_info['count'])
+            package_num += label_info['count']
+            if not numbers:
+                continue
+
+            label_data = self._label_data(label_info, numbers[0])
+            layout = self.layouts.select(label_data)
+            self._prerender_codes(label_data, layout, numbers)
+            ws, start_row, start_col = self._next_position(label_info, layout)
+            template = Label(ws, start_row, label_data, layout, start_col)
+            template.create()
+
+            for num in numbers[1:]:
+                ws, start_row, start_col = self._next_position(label_info, layout)
+                template.replicate(start_row, num, ws, start_col)
+
+        self._finish_sheet()
+
+
+class SharedImage(Image):
+    """
+    Изображение, которое читается с диска один раз и попадает в книгу
+    одним файлом на источник, сколько бы этикеток его ни использовали.
+    """
+    _data_cache = {}
+
+    def _data(self):
+        if self.ref not in self._data_cache:
+            self._data_cache[self.ref] = super()._data()
+        return self._data_cache[self.ref]
+
+    @property
+    def path(self):
+        # Хэш полного пути: одноимённые файлы из разных папок не заменяют друг друга
+        source = os.path.abspath(self.ref)
+        name = os.path.splitext(os.path.basename(source))[0]
+        return f"/xl/media/{name}_{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}.{self.format}"
+
+
+class BarcodeImage(SharedImage):
+    """
+    Штрихкод упаковки. Рисуется из кэша package_codes и попадает в книгу
+    одним файлом на значение кода.
+    """
+
+    def __init__(self, value):
+        # Без разбора PNG: формат известен, а размер всегда задаёт макет
+        self.value = value
+        self.ref = value
+        self.format = 'png'
+        self.width = self.height = 0
+
+    def _data(self):
+        return barcode_png(self.value)
+
+    @property
+    def path(self):
+        return f"/xl/media/code_{hashlib.sha1(self.value.encode('utf-8')).hexdigest()[:16]}.png"
+
+
+class DedupExcelWriter(ExcelWriter):
+    """
+    Записывает в архив каждый файл изображения один раз и освобождает
+    изображения листа сразу после записи его рисунка.
+    """
+
+    def _write_drawing(self, drawing):
+        super()._write_drawing(drawing)
+        # Копии SharedImage заменяются одним экземпляром на источник, длина списка
+        # (а значит, и номера обычных изображений) не меняется
+        canonical = {}
+        for i, img in enumerate(self._images):
+            if isinstance(img, SharedImage):
+                self._images[i] = canonical.setdefault(img.path, img)
+        # Якоря и изображения листа уже записаны в архив
+        drawing.images.clear()
+        drawing.oneCellAnchor.clear()
+        drawing.twoCellAnchor.clear()
+        drawing.absoluteAnchor.clear()
+
+    def _write_images(self):
+        written = set()
+        for img in self._images:
+            if img.path not in written:
+                written.add(img.path)
+                self._archive.writestr(img.path[1:], img._data())
+
+
+class SpooledDrawingWriter(DedupExcelWriter):
+    """
+    Записывает книгу StreamingLabelSheet, рисунки листов которой уже
+    сохранены во временные файлы при закрытии листов (см. DrawingSpool).
+    """
+
+    def __init__(self, workbook, archive, spool):
+        super().__init__(workbook, archive)
+        self.spool = spool
+
+    def write_worksheet(self, ws):
+        super().write_worksheet(ws)
+        spooled = self.spool.drawing(ws.title)
+        if spooled is None:
+            return
+        drawing = SpreadsheetDrawing()
+        self._drawings.append(drawing)
+        drawing._id = len(self._drawings)
+        xml, rels = spooled
+        self._archive.writestr(drawing.path[1:], xml)
+        self._archive.writestr(get_rels_path(drawing.path)[1:], rels)
+        self.manifest.append(drawing)
+        for rel in ws._rels:
+            if "drawing" in rel.Type:
+                rel.Target = drawing.path
+
+    def _write_images(self):
+        super()._write_images()
+        for path, data in self.spool.media():
+            self._archive.writestr(path[1:], data)
+
+
+class DrawingSpool:
+    """
+    Временные файлы с рисунками закрытых листов потоковой книги.
+
+    Рисунок листа (якоря картинок и штрихкодов) и новые файлы изображений
+    записываются сюда сразу при закрытии листа, после чего объекты
+    изображений освобождаются. Записи идут подряд с длиной впереди, без
+    оглавления в памяти: в памяти остаются только пути изображений, поэтому
+    расход памяти не растёт с числом этикеток.
+    """
+
+    def __init__(self):
+        self._drawings = tempfile.TemporaryFile()
+        self._media = tempfile.TemporaryFile()
+        # Имя листа → смещение его рисунка во временном файле
+        self._offsets = {}
+        # Пути уже записанных изображений: логотип и штрихкод заказа, этикетки которого
+        # попали на несколько листов, пишутся в архив один раз
+        self._written = set()
+
+    @staticmethod
+    def _write(f, data):
+        f.write(len(data).to_bytes(8, 'big'))
+        f.write(data)
+
+    @staticmethod
+    def _read(f):
+        size = f.read(8)
+        return f.read(int.from_bytes(size, 'big')) if size else None
+
+    def add(self, ws):
+        """Сохраняет рисунок и изображения листа и очищает его список изображений."""
+        images = ws._images
+        if not images:
+            return
+        drawing = SpreadsheetDrawing()
+        drawing.images = images
+        self._drawings.seek(0, os.SEEK_END)
+        self._offsets[ws.title] = self._drawings.tell()
+        self._write(self._drawings, tostring(drawing._write()))
+        self._write(self._drawings, tostring(drawing._write_rels()))
+
+        for img in images:
+            if img.path in self._written:
+                continue
+            self._written.add(img.path)
+            data = draw_barcode_png(img.value) if isinstance(img, BarcodeImage) else img._data()
+            self._write(self._media, img.path.encode('utf-8'))
+            self._write(self._media, data)
+        ws._images = []
+
+    def drawing(self, title):
+        """Возвращает (XML рисунка, XML связей) листа или None, если на листе нет изображений."""
+        offset = self._offsets.get(title)
+        if offset is None:
+            return None
+        self._drawings.seek(offset)
+        return self._read(self._drawings), self._read(self._drawings)
+
+    def media(self):
+        """Перебирает (путь в архиве, данные) всех сохранённых изображений."""
+        self._media.seek(0)
+        while True:
+            path = self._read(self._media)
+            if path is None:
+                return
+            yield path.decode('utf-8'), self._read(self._media)
+
+    def close(self):
+        self._drawings.close()
+        self._media.close()
+
+
+class StreamingLabelSheet(LabelSheet):
+    """
+    Создаёт книгу с ограниченным расходом памяти для больших выгрузок.
+
+    Книга открывается в режиме write_only: строки этикеток сразу уходят
+    во временный файл листа, а каждый лист (chunk_size этикеток) закрывается
+    сразу после заполнения, освобождая объединения и разрывы страниц.
+    В памяти остаются только шаблоны этикеток, лёгкие ссылки на изображения
+    и этикетки текущего ряда, которые записываются вместе, когда ряд заполнен.
+    """
+
+    def __init__(self, labels_data, chunk_size=DEFAULT_LABELS_PER_SHEET, split_by_order=False, packages=None,
+                 layouts=None, labels_per_page=1):
+        super().__init__(labels_data, labels_per_sheet=chunk_size, split_by_order=split_by_order, packages=packages,
+                         layouts=layouts, labels_per_page=labels_per_page)
+        self.wb = Workbook(write_only=True)
+        self.ws = None
+        self._band = []
+        self._spool = DrawingSpool()
+
+    def _template(self, label_data, layout):
+        """
+        Отрисовывает этикетку на черновом листе и превращает её в шаблон строк:
+        ячейки со стилями, зарегистрированными в итоговой книге.
+        """
+        draft = Workbook().active
+        label = Label(draft, 1, label_data, layout)
+        label.create()
+
+        styled = {}
+        rows = []
+        for row in range(1, layout.rows + 1):
+            cells = []
+            for col in range(1, layout.columns + 1):
+                source = draft._cells.get((row, col))
+                if source is None:
+                    cells.append(None)
+                    continue
+                key = tuple(source._style)
+                if key not in styled:
+                    cell = Cell(self.ws)
+                    cell.font, cell.border, cell.alignment = copy(source.font), copy(source.border), copy(source.alignment)
+                    styled[key] = cell._style
+                value = None if isinstance(source, MergedCell) else source.value
+                cells.append((value, styled[key]))
+            rows.append(cells)
+        images = []
+        for path, col_letter, row_num, width, height in layout.images:
+            if not os.path.exists(path):
+                continue
+            img = SharedImage(path)
+            img.width = width
+            img.height = height
+            images.append((img, col_letter, row_num))
+        return rows, label_data, layout, images
+
+    def _next_position(self, label_info, layout):
+        order_number = label_info.get('order_number')
+        sheet_full = self.labels_per_sheet and self._sheet_labels >= self.labels_per_sheet
+        order_changed = self.split_by_order and self._sheet_labels and order_number != self._sheet_order
+        if self.ws is None or sheet_full or order_changed:
+            self._finish_sheet()
+            self.ws = self.wb.create_sheet()
+            self._start_sheet()
+            self._sheet_order = order_number
+            self.ws.title = self._sheet_title(order_number)
+            self._set_column_widths()
+
+        return (self.ws, *self._advance(layout))
+
+    def _write_label(self, template, start_row, start_col, package_num):
+        # Строки листа пишутся только подряд, поэтому этикетка ждёт, пока заполнится её ряд
+        self._band.append((template, start_row, start_col, package_num))
+
+    def _close_band(self):
+        if not self._band:
+            return
+        band, self._band = self._band, []
+        start_row = band[0][1]
+        layout = band[0][0][2]
+        row_offset = start_row - 1
+        row_heights = dict(layout.row_heights)
+        package_values = [template[2].package_values(template[1], package_num)
+                          for template, _, _, package_num in band]
+
+        for r in range(1, layout.rows + 1):
+            if r in row_heights:
+                self.ws.row_dimensions[r + row_offset].height = row_heights[r]
+            values = []
+            for (template, _, start_col, _), label_values in zip(band, package_values):
+                values.extend([None] * (start_col - 1 - len(values)))
+                for col, item in enumerate(template[0][r - 1], 1):
+                    if item is None:
+                        values.append(None)
+                        continue
+                    value, style = item
+                    value = label_values.get((r, col), value)
+                    values.append(Cell(self.ws, row=r + row_offset, column=col + start_col - 1, value=value,
+                                       style_array=copy(style)))
+            self.ws.append(values)
+            # Высота уже записана вместе со строкой
+            self.ws.row_dimensions.pop(r + row_offset, None)
+
+        for (rows, label_data, layout, images), _, start_col, package_num in band:
+            col_offset = start_col - 1
+            for min_row, min_col, max_row, max_col in layout.merges:
+                self.ws.merged_cells.ranges.add(CellRange(
+                    min_col=min_col + col_offset, min_row=min_row + row_offset,
+                    max_col=max_col + col_offset, max_row=max_row + row_offset
+                ))
+
+            for img, col_letter, row_num in images:
+                self.ws.add_image(copy(img), f"{shift_column(col_letter, col_offset)}{row_num + row_offset}")
+            for col_letter, row_num, value, width, height in layout.barcode_values(
+                    dict(label_data, package_num=package_num)):
+                img = BarcodeImage(value)
+                img.width = width
+                img.height = height
+                self.ws.add_image(img, f"{shift_column(col_letter, col_offset)}{row_num + row_offset}")
+
+    def _finish_sheet(self):
+        if self.ws is None:
+            return
+        super()._finish_sheet()
+        self.ws.close()
+        # Объединения, разрывы и размеры уже записаны во временный файл листа, рисунок — в DrawingSpool
+        self.ws.merged_cells = MultiCellRange()
+        self.ws.row_breaks = RowBreak()
+        self.ws.column_dimensions.clear()
+        self.ws.row_dimensions.clear()
+        self._spool.add(self.ws)
+        # Объекты закрытого листа связаны циклическими ссылками: без явной сборки
+        # они копились бы до редкого полного прохода сборщика мусора
+        gc.collect()
+
+    @staticmethod
+    def _prerender_codes(label_data, layout, numbers):
+        # Каждый код нужен потоковой книге один раз: он рисуется при записи листа, без кэша
+        pass
+
+    def _excel_writer(self, archive):
+        return SpooledDrawingWriter(self.wb, archive, self._spool)
+
+    def save(self, filename):
+        try:
+            return super().save(filename)
+        finally:
+            self._spool.close()
+
+    def create_labels(self):
+        package_num = 1
+
+        for label_info in self.labels_data['labels']:
+            numbers = self._selected_packages(package_num, label_info['count'])
+            package_num += label_info['count']
+            if not numbers:
+                continue
+
+            label_data = self._label_data(label_info, numbers[0])
+            layout = self.layouts.select(label_data)
+            self._prerender_codes(label_data, layout, numbers)
+            template = None
+            for num in numbers:
+                ws, start_row, start_col = self._next_position(label_info, layout)
+                if template is None:
+                    template = self._template(label_data, layout)
+                self._write_label(template, start_row, start_col, num)
+
+        self._finish_sheet()
+
+
+def render_labels(labels_data, file_path, packages=None, labels_per_sheet=DEFAULT_LABELS_PER_SHEET, profiler=None,
+                  labels_per_page=1):
+    profiler = profiler or MemoryProfiler()
+    if labels_data['package_total'] >= STREAMING_THRESHOLD:
+        sheet = StreamingLabelSheet(labels_data, chunk_size=labels_per_sheet or DEFAULT_LABELS_PER_SHEET,
+                                    packages=packages, labels_per_page=labels_per_page)
+    else:
+        sheet = ReplicatedLabelSheet(labels_data, labels_per_sheet=labels_per_sheet, packages=packages,
+                                     labels_per_page=labels_per_page)
+    with profiler.stage(f"Создание этикеток ({type(sheet).__name__}.create_labels)"), RENDER_SECONDS.time(format='xlsx'):
+        sheet.create_labels()
+    with profiler.stage("Сохранение книги (save)"):
+        saved = sheet.save(file_path)
+    if not saved:
+        raise RuntimeError("Не удалось сохранить файл")
+
+
 class MainWindow(QMainWindow):
     CONFIG_FILE = "label_generator_config.json"
+    PLANS_DIR = "label_plans"
+    RENDER_CACHE_DIR = "label_cache"
 
     def __init__(self):
         super().__init__()
@@ -443,13 +1039,50 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(800, 600)
 
         self.excel_file_path = None
+        self.lookup_service_url = ''
+        self.order_store_path = ''
+        self.order_store = None
+        self.loader_engine = DEFAULT_ENGINE
+        self.labels_per_sheet = DEFAULT_LABELS_PER_SHEET
+        self.labels_per_page = 1
+        self.memory_profiler = MemoryProfiler()
+        self.snapshot_dir = ''
+        self.metrics_file = ''
+        self.metrics_port = 0
+        self.metrics_interval = 15
+        self.scanner_plan = dict(DEFAULT_SCANNER_PLAN)
+        self.scanner_output_dir = SCANNER_OUTPUT_DIR
+        self.scanner_format = 'xlsx'
+        self._scanner_index = None
+        self.pregenerate = False
+        self.pregenerate_dir = PREGENERATED_DIR
+        self.pregenerate_interval = 30
         self.order_info = None
         self.label_types = ["КОРПУС", "ФАСАДЫ МДФ", "ФАСАДЫ ПЛАСТИК", "Профиль/доп элемент", "ОРГАЛИТ"]
-        self.labels_to_create = []
+        self.labels_model = LabelPlanModel()
+        self.preview_renderer = LabelPreviewRenderer()
+        self.plan_store = PlanStore(self.PLANS_DIR)
+        self.render_cache = RenderCache(self.RENDER_CACHE_DIR)
 
         # Загружаем настройки при запуске
         self.load_settings()
 
+        # Метрики для панели цеха: файл в формате Prometheus и/или локальный адрес /metrics
+        self.metrics_exporter = MetricsExporter(path=self.metrics_file or None, interval=self.metrics_interval,
+                                                port=self.metrics_port or None)
+        try:
+            self.metrics_exporter.start()
+        except OSError as e:
+            print(f"Не удалось запустить экспорт метрик: {e}")
+
+        # Сравнение версий плана раскроя и заранее созданные этикетки для изменившихся заказов
+        self.plan_watcher = PlanWatcher(self._pregenerate_source,
+                                        lambda path: loader_for(path, self.loader_engine).load_data(path),
+                                        self._pregenerate, self._remove_pregenerated,
+                                        interval=self.pregenerate_interval)
+        if self.pregenerate:
+            self.plan_watcher.start()
+
         self.init_ui()
         self.setup_connections()
 
@@ -460,6 +1093,32 @@ class MainWindow(QMainWindow):
                 with open(self.CONFIG_FILE, 'r', encoding='utf-8') as f:
                     config = json.load(f)
                     self.excel_file_path = config.get('excel_file_path', '')
+                    self.lookup_service_url = config.get('lookup_service_url', '')
+                    self.order_store_path = config.get('order_store_path', '')
+                    self.labels_per_sheet = config.get('labels_per_sheet', DEFAULT_LABELS_PER_SHEET)
+                    # Этикеток на одной печатной странице: 1, 2 или 4
+                    self.labels_per_page = config.get('labels_per_page', 1)
+                    if self.labels_per_page not in NUP_GRIDS:
+                        print(f"Неподдерживаемое значение labels_per_page: {self.labels_per_page}, используется 1")
+                        self.labels_per_page = 1
+                    # Отчёт о памяти по этапам сохраняется рядом с файлом этикеток
+                    self.memory_profiler.enabled = bool(config.get('memory_profile', False))
+                    # Папка для локальных снимков файла раскроя с сетевого диска (пусто — читать напрямую)
+                    self.snapshot_dir = config.get('snapshot_dir', '')
+                    # Экспорт метрик: файл .prom (пусто — не писать) и порт HTTP (0 — не запускать)
+                    self.metrics_file = config.get('metrics_file', '')
+                    self.metrics_port = config.get('metrics_port', 0)
+                    self.metrics_interval = config.get('metrics_interval', 15)
+                    # Режим сканера: план по умолчанию (тип этикетки → количество), папка и формат файлов
+                    self.scanner_plan = config.get('scanner_plan', dict(DEFAULT_SCANNER_PLAN))
+                    self.scanner_output_dir = config.get('scanner_output_dir', SCANNER_OUTPUT_DIR)
+                    self.scanner_format = config.get('scanner_format', 'xlsx')
+                    # Заранее создавать этикетки (по плану сканера) для новых и изменённых заказов плана раскроя
+                    self.pregenerate = bool(config.get('pregenerate', False))
+                    self.pregenerate_dir = config.get('pregenerate_dir', PREGENERATED_DIR)
+                    self.pregenerate_interval = config.get('pregenerate_interval', 30)
+                # Движок выбирается калибровкой: python loader_engines.py
+                self.loader_engine = load_engine_choice(self.CONFIG_FILE)
         except Exception as e:
             print(f"Ошибка загрузки настроек: {e}")
 
@@ -467,7 +1126,23 @@ class MainWindow(QMainWindow):
         """Сохраняет текущие настройки в файл конфигурации"""
         try:
             config = {
-                'excel_file_path': self.excel_file_path
+                'excel_file_path': self.excel_file_path,
+                'lookup_service_url': self.lookup_service_url,
+                'order_store_path': self.order_store_path,
+                'loader_engine': self.loader_engine,
+                'labels_per_sheet': self.labels_per_sheet,
+                'labels_per_page': self.labels_per_page,
+                'memory_profile': self.memory_profiler.enabled,
+                'snapshot_dir': self.snapshot_dir,
+                'metrics_file': self.metrics_file,
+                'metrics_port': self.metrics_port,
+                'metrics_interval': self.metrics_interval,
+                'scanner_plan': self.scanner_plan,
+                'scanner_output_dir': self.scanner_output_dir,
+                'scanner_format': self.scanner_format,
+                'pregenerate': self.pregenerate,
+                'pregenerate_dir': self.pregenerate_dir,
+                'pregenerate_interval': self.pregenerate_interval
             }
             with open(self.CONFIG_FILE, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=4)
@@ -506,8 +1181,16 @@ class MainWindow(QMainWindow):
         self.search_btn = QPushButton("Найти заказ")
         search_layout.addWidget(self.search_btn)
 
+        self.scanner_btn = QPushButton("Режим сканера")
+        self.scanner_btn.setCheckable(True)
+        search_layout.addWidget(self.scanner_btn)
+
         self.main_layout.addWidget(self.search_group)
 
+        self.scanner_status = QLabel()
+        self.scanner_status.hide()
+        self.main_layout.addWidget(self.scanner_status)
+
         # Информация о заказе
         self.order_info_text = QTextEdit()
         self.order_info_text.setReadOnly(True)
@@ -536,10 +1219,24 @@ class MainWindow(QMainWindow):
 
         self.main_layout.addWidget(self.label_group)
 
-        # Список добавленных этикеток
-        self.labels_list = QListWidget()
-        self.labels_list.itemDoubleClicked.connect(self.edit_label)
-        self.main_layout.addWidget(self.labels_list)
+        # Таблица добавленных этикеток: количество, размеры и вес правятся прямо в ячейках,
+        # двойной щелчок по остальным столбцам открывает полный редактор
+        self.labels_table = QTableView()
+        self.labels_table.setModel(self.labels_model)
+        self.labels_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.labels_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.labels_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked |
+                                          QAbstractItemView.EditTrigger.EditKeyPressed)
+        # Фиксированная высота строк: представлению не нужно измерять тысячи строк
+        self.labels_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.labels_table.horizontalHeader().setStretchLastSection(True)
+        self.labels_table.doubleClicked.connect(self.edit_label)
+        self.main_layout.addWidget(self.labels_table)
+
+        # Предпросмотр текущей позиции плана (первая упаковка), без создания книги
+        self.label_preview = LabelPreviewWidget(self.preview_renderer)
+        self.label_preview.setMinimumHeight(160)
+        self.main_layout.addWidget(self.label_preview)
 
         # Кнопки управления
         self.control_group = QWidget()
@@ -548,6 +1245,15 @@ class MainWindow(QMainWindow):
         self.clear_btn = QPushButton("Очистить список")
         control_layout.addWidget(self.clear_btn)
 
+        self.bulk_edit_btn = QPushButton("Изменить выделенные")
+        control_layout.addWidget(self.bulk_edit_btn)
+
+        self.remove_btn = QPushButton("Удалить выделенные")
+        control_layout.addWidget(self.remove_btn)
+
+        self.load_plan_btn = QPushButton("Повторная печать")
+        control_layout.addWidget(self.load_plan_btn)
+
         self.create_btn = QPushButton("Создать этикетки")
         self.create_btn.setStyleSheet("background-color: #4CAF50; color: white;")
         control_layout.addWidget(self.create_btn)
@@ -557,9 +1263,26 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
         self.browse_btn.clicked.connect(self.browse_file)
         self.search_btn.clicked.connect(self.search_order)
+        self.scanner_btn.toggled.connect(self.toggle_scanner_mode)
+        self.order_number_edit.returnPressed.connect(self.on_order_entered)
+        self.scanner_worker = ScannerWorker(self._process_scanned, self)
+        self.scanner_worker.processed.connect(self.on_scanned)
+        self.save_pipeline = SavePipeline(STAGING_DIR, parent=self)
+        self.save_pipeline.progress.connect(self.on_save_progress)
+        self.save_pipeline.retrying.connect(self.on_save_retrying)
+        self.save_pipeline.finished.connect(self.on_save_finished)
+        self.labels_table.selectionModel().currentRowChanged.connect(self.update_preview)
+        self.labels_model.value_rejected.connect(self.on_value_rejected)
+        self.labels_model.dataChanged.connect(self.update_preview)
+        self.labels_model.rowsInserted.connect(self.update_preview)
+        self.labels_model.rowsRemoved.connect(self.update_preview)
+        self.labels_model.modelReset.connect(self.update_preview)
         self.add_label_btn.clicked.connect(self.add_label)
         self.edit_types_btn.clicked.connect(self.edit_label_types)
         self.clear_btn.clicked.connect(self.clear_labels)
+        self.bulk_edit_btn.clicked.connect(self.bulk_edit_labels)
+        self.remove_btn.clicked.connect(self.remove_labels)
+        self.load_plan_btn.clicked.connect(self.load_saved_plan)
         self.create_btn.clicked.connect(self.create_labels)
 
     def browse_file(self):
@@ -567,10 +1290,13 @@ class MainWindow(QMainWindow):
             self,
             "Выберите файл раскроя",
             str(Path(self.excel_file_path).parent if self.excel_file_path else ""),  # Начинаем с последней папки
-            "Excel Files (*.xlsx *.xls)"
+            "Cutting Plan Files (*.xlsx *.xls *.csv *.tsv *.txt);;Excel Files (*.xlsx *.xls);;CSV Files (*.csv *.tsv *.txt)"
         )
 
         if file_path:
+            if file_path != self.excel_file_path:
+                # Наименования и корпуса другого плана почти не пересекаются с прежними
+                clear_caches()
             self.file_path_edit.setText(file_path)
             self.excel_file_path = file_path
             self.save_settings()  # Сохраняем новый путь
@@ -581,24 +1307,177 @@ class MainWindow(QMainWindow):
             self.show_error("Введите номер заказа")
             return
 
-        if not self.excel_file_path or not os.path.exists(self.excel_file_path):
+        # Со снимками файл может быть временно недоступен — тогда используется последний снимок
+        file_missing = not self.excel_file_path or (not self.snapshot_dir and not os.path.exists(self.excel_file_path))
+        if not self.lookup_service_url and file_missing:
             self.show_error("Сначала укажите корректный файл раскроя")
             return
 
+        # Отчёт о памяти относится к одному заказу: этапы прошлого поиска забываются
+        self.memory_profiler.reset()
+        started = time.perf_counter()
         try:
-            loader = ExcelDataLoader()
-            loader.filename = self.excel_file_path
-            processor = OrderProcessor(loader)
+            source = self.excel_file_path
+            snapshots = None
+            if self.snapshot_dir and not self.lookup_service_url:
+                # Разбираем локальную копию: сетевой диск занят только на время копирования
+                snapshots = SnapshotCache(self.snapshot_dir)
+                source = snapshots.local_copy(self.excel_file_path)
+
+            if self.lookup_service_url:
+                # Заказы ищет общий сервис, файл раскроя на станции не читается
+                processor = RemoteOrderProcessor(self.lookup_service_url)
+            elif self.order_store_path:
+                # История заказов в SQLite, файл раскроя импортируется только при изменении
+                if self.order_store is None:
+                    self.order_store = SQLiteDataLoader(self.order_store_path)
+                self.order_store.source = source
+                processor = OrderProcessor(self.order_store, self.memory_profiler)
+            else:
+                processor = OrderProcessor(loader_for(source, self.loader_engine), self.memory_profiler)
             self.order_info = processor.process_order(order_number)
+            found = not isinstance(self.order_info, str)
+            SEARCHES.inc(result='found' if found else 'not_found')
+            SEARCH_SECONDS.observe(time.perf_counter() - started)
 
-            if isinstance(self.order_info, str):
+            if not found:
                 self.show_error(self.order_info)
             else:
                 self.order_info_text.setText(self.order_info.format_output())
+                if snapshots is not None and snapshots.stale_since is not None:
+                    # Файл раскроя занят или недоступен: данные могут быть не последними
+                    stale_time = time.strftime('%d.%m.%Y %H:%M', time.localtime(snapshots.stale_since))
+                    self.order_info_text.append(f"\n⚠️ Данные из снимка файла раскроя от {stale_time}")
+                self.statusBar().showMessage(self.cache_status())
                 self.show_info("Данные заказа успешно загружены")
 
         except Exception as e:
+            SEARCHES.inc(result='error')
             self.show_error(f"Ошибка при поиске заказа: {str(e)}")
+        self.show_notices()
+
+    def toggle_scanner_mode(self, enabled):
+        """Включает режим сканера: каждый скан (Enter) ставит заказ в очередь на печать"""
+        self.search_btn.setEnabled(not enabled)
+        self.scanner_status.setVisible(enabled)
+        if enabled:
+            self.scanner_worker.start()
+            self.order_info_text.clear()
+            self._update_scanner_status()
+            self.order_number_edit.setFocus()
+        else:
+            self.scanner_worker.stop()
+
+    def on_order_entered(self):
+        if not self.scanner_btn.isChecked():
+            return
+        # Сканер вводит номер как клавиатура и завершает его Enter
+        self.scanner_worker.submit(self.order_number_edit.text())
+        self.order_number_edit.clear()
+        self._update_scanner_status()
+
+    def _update_scanner_status(self):
+        self.scanner_status.setText(f"Режим сканера: в очереди {self.scanner_worker.queued()}, "
+                                    f"файлы сохраняются в {os.path.abspath(self.scanner_output_dir)}")
+
+    def _scanner_processor(self):
+        if self.lookup_service_url:
+            return RemoteOrderProcessor(self.lookup_service_url)
+        if not self.excel_file_path:
+            raise ValueError("Не указан файл раскроя")
+        source = self.excel_file_path
+        if self.snapshot_dir:
+            source = SnapshotCache(self.snapshot_dir).local_copy(self.excel_file_path)
+        # Файл раскроя загружается в память один раз и перечитывается только после изменения
+        if self._scanner_index is None or self._scanner_index.filename != source:
+            self._scanner_index = MemoryOrderIndex(source, loader_for(source, self.loader_engine))
+        return OrderProcessor(self._scanner_index)
+
+    def _process_scanned(self, order_number):
+        """Находит заказ и создаёт для него этикетки по плану по умолчанию (в фоновом потоке)"""
+        started = time.perf_counter()
+        order_info = self._scanner_processor().process_order(order_number)
+        found = not isinstance(order_info, str)
+        SEARCHES.inc(result='found' if found else 'not_found')
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        if not found:
+            raise ValueError(order_info)
+
+        labels_data, file_path = self._render_default_plan(order_number, order_info, self.scanner_output_dir)
+        self.plan_store.save(order_number, labels_data)
+        return f"{labels_data['package_total']} этик. → {file_path}"
+
+    def _default_plan_path(self, order_number, output_dir):
+        name = re.sub(r'[\\/:*?"<>|]+', '_', order_number)
+        return os.path.join(output_dir, f"{name} Этикетки.{self.scanner_format}")
+
+    def _render_default_plan(self, order_number, order_info, output_dir):
+        """Создаёт файл этикеток заказа по плану по умолчанию (в фоновом потоке)"""
+        labels_data = default_plan(order_number, order_info, self.scanner_plan)
+        if not labels_data['labels']:
+            raise ValueError("по плану по умолчанию нет этикеток для этого заказа")
+
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = self._default_plan_path(order_number, output_dir)
+        if self.scanner_format == 'zpl':
+            with RENDER_SECONDS.time(format='zpl'):
+                render_zpl(labels_data, file_path)
+            LABELS_RENDERED.inc(labels_data['package_total'], format='zpl')
+            OUTPUT_BYTES.inc(os.path.getsize(file_path), format='zpl')
+        else:
+            from_cache = self.render_cache.get_or_render(
+                labels_data, file_path,
+                lambda data, path, selected: render_labels(data, path, selected, self.labels_per_sheet,
+                                                           labels_per_page=self.labels_per_page),
+                None,
+                self._render_options()
+            )
+            CACHE_REQUESTS.inc(result='hit' if from_cache else 'miss')
+        return labels_data, file_path
+
+    def _render_options(self):
+        """Всё, кроме плана, от чего зависит готовая книга: ключ кэша RenderCache"""
+        return {
+            'labels_per_page': self.labels_per_page,
+            'labels_per_sheet': self.labels_per_sheet,
+            # Дата печатается на этикетке, поэтому вчерашняя книга из кэша не годится
+            'date': label_date(),
+            'layouts': get_layouts().fingerprint,
+        }
+
+    def _pregenerate(self, order_number, row):
+        """Заранее создаёт этикетки нового или изменённого заказа (в потоке PlanWatcher)"""
+        order_info = InfoExtractor(row).extract()
+        _, file_path = self._render_default_plan(order_number, order_info, self.pregenerate_dir)
+        PREGENERATED.inc(result='created')
+        print(f"Заказ {order_number}: этикетки созданы заранее → {file_path}")
+
+    def _remove_pregenerated(self, order_number):
+        """Удаляет заранее созданные этикетки заказа, которого больше нет в плане"""
+        file_path = self._default_plan_path(order_number, self.pregenerate_dir)
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                PREGENERATED.inc(result='removed')
+            except OSError as e:
+                print(f"Не удалось удалить {file_path}: {e}")
+
+    def _pregenerate_source(self):
+        """Файл раскроя для PlanWatcher (локальный снимок, если задан snapshot_dir)"""
+        if not self.excel_file_path or self.lookup_service_url:
+            return None
+        if self.snapshot_dir:
+            return SnapshotCache(self.snapshot_dir).local_copy(self.excel_file_path)
+        return self.excel_file_path
+
+    def on_scanned(self, order_number, message, ok):
+        # Результаты выводятся в журнал без модальных окон, чтобы не прерывать сканирование
+        mark = "✅" if ok else "❌"
+        self.order_info_text.append(f"{time.strftime('%H:%M:%S')} {mark} Заказ №{order_number}: {message}")
+        for level, notice in dict.fromkeys(take_notices()):
+            mark = "ℹ️" if level == INFO else "⚠️"
+            self.order_info_text.append(f"{time.strftime('%H:%M:%S')} {mark} {notice}")
+        self._update_scanner_status()
 
     def add_label(self):
         if not self.order_info or isinstance(self.order_info, str):
@@ -624,36 +1503,74 @@ class MainWindow(QMainWindow):
         }
 
         # Открываем диалог редактирования
-        dialog = LabelEditorDialog(label_data, self)
+        dialog = LabelEditorDialog(label_data, self, self.preview_renderer, self._package_total() + count)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             edited_data = dialog.get_edited_data()
-            self.labels_to_create.append(edited_data)
-            self.update_labels_list()
+            self.labels_model.append(edited_data)
+            self.labels_table.selectRow(self.labels_model.rowCount() - 1)
 
             # Сбрасываем счетчик
             self.label_count_spin.setValue(1)
 
-    def edit_label(self, item):
-        # Получаем индекс выбранного элемента
-        index = self.labels_list.row(item)
-        if index < 0 or index >= len(self.labels_to_create):
+    @property
+    def labels_to_create(self):
+        return self.labels_model.labels
+
+    def _selected_rows(self):
+        return sorted(index.row() for index in self.labels_table.selectionModel().selectedRows())
+
+    def _package_total(self):
+        return sum(label['count'] for label in self.labels_to_create)
+
+    def update_preview(self, *args):
+        """Показывает текущую позицию плана (или последнюю добавленную) в панели предпросмотра"""
+        labels = self.labels_to_create
+        if not labels:
+            self.label_preview.show_label(None)
+            return
+        row = self.labels_table.currentIndex().row()
+        label = labels[row] if 0 <= row < len(labels) else labels[-1]
+        self.label_preview.show_label(label, self._package_total())
+
+    def edit_label(self, index):
+        # Редактируемые ячейки правятся в самой таблице
+        if not index.isValid() or index.column() in EDITABLE_COLUMNS:
             return
 
         # Открываем диалог редактирования
-        dialog = LabelEditorDialog(self.labels_to_create[index], self)
+        row = index.row()
+        dialog = LabelEditorDialog(self.labels_to_create[row], self, self.preview_renderer, self._package_total())
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.labels_to_create[index] = dialog.get_edited_data()
-            self.update_labels_list()
-
-    def update_labels_list(self):
-        self.labels_list.clear()
-        for label in self.labels_to_create:
-            item = QListWidgetItem(
-                f"{label['label_type']} - {label['count']} шт. | "
-                f"Название: {label['item_name']} | "
-                f"Размеры: {label['dimensions'][0]}x{label['dimensions'][1]}x{label['dimensions'][2]}"
-            )
-            self.labels_list.addItem(item)
+            self.labels_model.replace(row, dialog.get_edited_data())
+
+    def bulk_edit_labels(self):
+        """Записывает одно значение (количество, размер или вес) во все выделенные строки"""
+        rows = self._selected_rows()
+        if not rows:
+            self.show_error("Выделите строки для изменения")
+            return
+
+        names = [PLAN_COLUMNS[column][0] for column in EDITABLE_COLUMNS]
+        name, ok = QInputDialog.getItem(self, "Изменить выделенные", "Поле:", names, 0, False)
+        if not ok:
+            return
+        value, ok = QInputDialog.getText(self, "Изменить выделенные", f"{name} для {len(rows)} строк:")
+        if not ok:
+            return
+
+        column = EDITABLE_COLUMNS[names.index(name)]
+        # О некорректном значении модель сообщает сама (on_value_rejected)
+        self.labels_model.set_column_values(rows, column, value)
+
+    def on_value_rejected(self, message):
+        """Показывает, почему ввод в таблицу плана не принят: ячейка сохраняет прежнее значение"""
+        self.statusBar().showMessage(message, 10000)
+        QToolTip.showText(QCursor.pos(), message, self.labels_table)
+
+    def remove_labels(self):
+        rows = self._selected_rows()
+        if rows:
+            self.labels_model.remove_rows(rows)
 
     def edit_label_types(self):
         new_type, ok = QInputDialog.getText(
@@ -672,9 +1589,22 @@ class MainWindow(QMainWindow):
             else:
                 self.show_error("Такой тип уже существует")
 
+    def load_saved_plan(self):
+        """Загружает сохранённый план заказа в список для повторной печати"""
+        order_number = self.order_number_edit.text().strip()
+        if not order_number:
+            self.show_error("Введите номер заказа")
+            return
+
+        labels_data = self.plan_store.load(order_number)
+        if labels_data is None:
+            self.show_error(f"Для заказа №{order_number} нет сохранённого плана")
+            return
+
+        self.labels_model.set_labels(labels_data['labels'])
+
     def clear_labels(self):
-        self.labels_to_create = []
-        self.labels_list.clear()
+        self.labels_model.clear()
 
     def create_labels(self):
         if not self.order_info or isinstance(self.order_info, str):
@@ -701,34 +1631,110 @@ class MainWindow(QMainWindow):
             self,
             "Сохранить файл этикеток",
             f" {order_number} Этикетки.xlsx",
-            "Excel Files (*.xlsx)"
+            "Excel Files (*.xlsx);;ZPL Files (*.zpl)"
         )
 
         if not file_path:
             return
 
+        # При повторной печати изменённого плана предлагаем перепечатать только изменившиеся упаковки
+        packages = None
+        previous = self.plan_store.load(order_number)
+        if previous is not None and plan_hash(previous) != plan_hash(labels_data):
+            changed = changed_packages(previous, labels_data)
+            if changed and len(changed) < total_labels:
+                answer = QMessageBox.question(
+                    self,
+                    "Повторная печать",
+                    f"План изменился в {len(changed)} из {total_labels} упаковок. "
+                    f"Создать этикетки только для изменившихся упаковок?"
+                )
+                if answer == QMessageBox.StandardButton.Yes:
+                    packages = changed
+
+        # Файл создаётся локально и доставляется по выбранному пути в фоне (сетевой диск может быть медленным)
+        local_path = self.save_pipeline.stage_path(file_path)
         try:
-            sheet = LabelSheet(labels_data)
-            sheet.create_labels()
-
-            if sheet.save(file_path):
-                self.show_info(f"Файл успешно сохранён с {total_labels} этикетками")
-                self.clear_labels()
+            if file_path.lower().endswith('.zpl'):
+                # ZPL для термопринтера формируется быстрее, чем копируется из кэша
+                with self.memory_profiler.stage("Создание ZPL"), RENDER_SECONDS.time(format='zpl'):
+                    render_zpl(labels_data, local_path, packages)
+                LABELS_RENDERED.inc(len(packages) if packages is not None else total_labels, format='zpl')
+                OUTPUT_BYTES.inc(os.path.getsize(local_path), format='zpl')
+                from_cache = False
             else:
-                self.show_error("Не удалось сохранить файл")
+                from_cache = self.render_cache.get_or_render(
+                    labels_data, local_path,
+                    lambda data, path, selected: render_labels(data, path, selected, self.labels_per_sheet,
+                                                               self.memory_profiler, self.labels_per_page),
+                    packages,
+                    self._render_options()
+                )
+                CACHE_REQUESTS.inc(result='hit' if from_cache else 'miss')
+            self.save_pipeline.submit(local_path, file_path)
+            report_path = self.memory_profiler.write_report(file_path)
+            self.plan_store.save(order_number, labels_data)
+
+            created = len(packages) if packages is not None else total_labels
+            source = " (из кэша)" if from_cache else ""
+            report = f", отчёт о памяти: {report_path}" if report_path else ""
+            # Без модального окна: оператор может сразу переходить к следующему заказу
+            self.statusBar().showMessage(f"Создано {created} этикеток{source}, сохранение: {file_path}{report}")
+            self.clear_labels()
 
         except Exception as e:
+            if os.path.exists(local_path):
+                os.remove(local_path)
             self.show_error(f"Ошибка при создании файла: {str(e)}")
 
+    def on_save_progress(self, destination, percent):
+        self.statusBar().showMessage(f"Сохранение {os.path.basename(destination)}: {percent}%")
+
+    def on_save_retrying(self, destination, attempt, error):
+        self.statusBar().showMessage(f"Не удалось сохранить {os.path.basename(destination)} ({error}), "
+                                     f"повтор {attempt}...")
+
+    def on_save_finished(self, destination, ok, message):
+        if ok:
+            self.statusBar().showMessage(message, 10000)
+        else:
+            self.show_error(message)
+
     def show_error(self, message):
         QMessageBox.critical(self, "Ошибка", message)
 
     def show_info(self, message):
         QMessageBox.information(self, "Информация", message)
 
+    @staticmethod
+    def cache_status():
+        """Строка статистики кэшей разбора наименований и корпусов для строки состояния"""
+        stats_by_cache = cache_stats()
+        parts = []
+        for title, stats in (("наименования", stats_by_cache['name']), ("корпуса", stats_by_cache['carcase'])):
+            parts.append(f"{title} {stats['hits']}/{stats['hits'] + stats['misses']} "
+                         f"({stats['hit_rate']:.0%}, {stats['size']} записей)")
+        return "Кэш разбора — попадания: " + ", ".join(parts)
+
+    def show_notices(self):
+        """Показывает сообщения загрузчиков и фоновых потоков: предупреждения — окном, сведения — в строке состояния"""
+        infos = [self.statusBar().currentMessage()]
+        # PlanWatcher и сканер могут много раз подряд сообщить одно и то же (например, что файл занят)
+        for level, message in dict.fromkeys(take_notices()):
+            if level == INFO:
+                infos.append(message)
+            else:
+                QMessageBox.warning(self, "Предупреждение", message)
+        self.statusBar().showMessage(" | ".join(info for info in infos if info))
+
     def closeEvent(self, event):
         """Сохраняем настройки при закрытии приложения"""
         self.save_settings()
+        self.scanner_worker.stop()
+        self.plan_watcher.stop()
+        # Недоставленные файлы дописываются перед выходом
+        self.save_pipeline.stop(wait=True)
+        self.metrics_exporter.stop()
         event.accept()
 
 
@@ -5,7 +5,7 @@ a = Analysis(
     ['main_app.py'],
     pathex=[],
     binaries=[],
-    datas=[('images', 'images'), ('label_generator_config.json', '.'), ('sizes.py', '.')],
+    datas=[('images', 'images'), ('label_generator_config.json', '.'), ('layouts', 'layouts')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,150 @@
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+# Часть пути модуля → компонент, которому приписываются выделения памяти
+COMPONENTS = [
+    (('pandas', 'numpy'), "DataFrame (pandas/numpy)"),
+    (('openpyxl', 'et_xmlfile', 'xml'), "Ячейки и XML (openpyxl)"),
+    (('PIL',), "Изображения (Pillow)"),
+]
+
+
+def _component(filename):
+    parts = filename.replace('\\', '/').split('/')
+    for names, component in COMPONENTS:
+        if any(name in parts for name in names):
+            return component
+    return "Прочее"
+
+
+def _format_size(size):
+    return f"{size / 1024 / 1024:.2f} МБ"
+
+
+class MemoryProfiler:
+    """
+    Замеряет память по этапам работы (загрузка данных, извлечение,
+    создание этикеток, сохранение) с помощью tracemalloc.
+
+    Выключенный профилировщик ничего не делает и не замедляет работу.
+    Для каждого этапа запоминаются прирост памяти, пик и самые крупные
+    места выделения, а также сводка по компонентам (DataFrame, ячейки, изображения).
+    """
+
+    def __init__(self, enabled=False, top=10):
+        """
+        Инициализация MemoryProfiler.
+
+        Args:
+            enabled (bool): Включить профилирование.
+            top (int): Сколько мест выделения выводить для каждого этапа.
+        """
+        self.enabled = enabled
+        self.top = top
+        self.stages = []
+        # tracemalloc запущен этим профилировщиком (и должен им же остановиться)
+        self._tracing = False
+
+    def stage(self, name):
+        """
+        Контекстный менеджер для замера одного этапа.
+
+        Args:
+            name (str): Название этапа.
+
+        Returns:
+            Контекстный менеджер.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            self._record(name, before, after, current - start_current, peak - start_current, elapsed)
+
+    def _record(self, name, before, after, growth, peak, elapsed):
+        stats = after.compare_to(before, 'lineno')
+        components = {}
+        for stat in stats:
+            component = _component(stat.traceback[0].filename)
+            components[component] = components.get(component, 0) + stat.size_diff
+        self.stages.append({
+            'name': name,
+            'growth': growth,
+            'peak': peak,
+            'elapsed': elapsed,
+            'components': sorted(components.items(), key=lambda item: -item[1]),
+            'top': [(str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+                    for stat in sorted(stats, key=lambda stat: -stat.size_diff)[:self.top]],
+        })
+
+    def reset(self):
+        """
+        Забывает замеренные этапы и останавливает tracemalloc, запущенный профилировщиком.
+
+        Вызывается после отчёта и перед поиском следующего заказа, чтобы в отчёт
+        не попадали этапы предыдущего заказа, а трассировка не замедляла работу между замерами.
+        """
+        self.stages = []
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def report(self):
+        """
+        Формирует текстовый отчёт по замеренным этапам.
+
+        Returns:
+            str: Отчёт.
+        """
+        lines = ["Отчёт о памяти по этапам", ""]
+        for stage in self.stages:
+            lines.append(f"== {stage['name']} ==")
+            lines.append(f"Время: {stage['elapsed']:.2f} с")
+            lines.append(f"Прирост: {_format_size(stage['growth'])}, пик внутри этапа: {_format_size(stage['peak'])}")
+            lines.append("По компонентам:")
+            for component, size in stage['components']:
+                lines.append(f"  {component}: {_format_size(size)}")
+            lines.append("Крупнейшие выделения:")
+            for location, size, count in stage['top']:
+                lines.append(f"  {_format_size(size):>10}  {count:+8d} блоков  {location}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write_report(self, output_path):
+        """
+        Сохраняет отчёт рядом с файлом результата и начинает новый отчёт (см. reset).
+
+        Args:
+            output_path (str): Путь к созданному файлу этикеток.
+
+        Returns:
+            str|None: Путь к отчёту или None, если профилирование выключено.
+        """
+        if not self.enabled or not self.stages:
+            self.reset()
+            return None
+        report_path = os.path.splitext(output_path)[0] + ".memory.txt"
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(self.report())
+        finally:
+            self.reset()
+        return report_path
@@ -0,0 +1,273 @@
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Границы корзин гистограмм длительности по умолчанию, секунды
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонно растущий счётчик, с необязательными метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        Увеличивает счётчик.
+
+        Args:
+            amount (float): На сколько увеличить.
+            **labels: Значения меток, например result='found'.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Возвращает текущее значение счётчика с заданными метками."""
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Гистограмма наблюдений (длительностей) с накопительными корзинами, как в Prometheus."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Добавляет наблюдение.
+
+        Args:
+            value (float): Наблюдаемое значение.
+            **labels: Значения меток.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[key] = (counts, total + value)
+
+    def time(self, **labels):
+        """
+        Контекстный менеджер, который записывает длительность блока.
+
+        Args:
+            **labels: Значения меток.
+        """
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        """Возвращает число наблюдений с заданными метками."""
+        series = self._series.get(tuple(sorted(labels.items())))
+        return series[0][-1] if series else 0
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, counts):
+                    result.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), count))
+                result.append((f"{self.name}_sum", key, total))
+                result.append((f"{self.name}_count", key, counts[-1]))
+        return result
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Набор метрик станции и их вывод в текстовом формате Prometheus.
+
+    Ко всем метрикам добавляется метка station, чтобы на общей панели
+    можно было сравнивать станции между собой.
+    """
+
+    def __init__(self, station=None):
+        """
+        Инициализация MetricsRegistry.
+
+        Args:
+            station (str|None): Имя станции (по умолчанию имя компьютера).
+        """
+        self.station = station or socket.gethostname()
+        self._metrics = {}
+
+    def counter(self, name, documentation):
+        """Возвращает счётчик name, создавая его при первом обращении."""
+        return self._metrics.setdefault(name, Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        """Возвращает гистограмму name, создавая её при первом обращении."""
+        return self._metrics.setdefault(name, Histogram(name, documentation, buckets))
+
+    def render(self):
+        """
+        Формирует текущие значения всех метрик.
+
+        Returns:
+            str: Текст в формате Prometheus text exposition 0.0.4.
+        """
+        station = (('station', self.station),)
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(station + labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Записывает метрики в файл атомарно (для node_exporter textfile collector).
+
+        Args:
+            path (str): Путь к файлу .prom.
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# Метрики приложения; модули записывают события прямо в эти объекты
+REGISTRY = MetricsRegistry()
+
+SEARCHES = REGISTRY.counter('label_searches_total', "Поиски заказа по результату")
+SEARCH_SECONDS = REGISTRY.histogram('label_search_seconds', "Длительность поиска заказа")
+LOAD_SECONDS = REGISTRY.histogram('label_load_seconds', "Длительность загрузки данных заказа")
+CACHE_REQUESTS = REGISTRY.counter('label_cache_requests_total', "Обращения к кэшу готовых книг")
+LABELS_RENDERED = REGISTRY.counter('label_labels_rendered_total', "Созданные этикетки")
+RENDER_SECONDS = REGISTRY.histogram('label_render_seconds', "Длительность создания этикеток")
+SAVE_SECONDS = REGISTRY.histogram('label_save_seconds', "Длительность сохранения файла этикеток")
+OUTPUT_BYTES = REGISTRY.counter('label_output_bytes_total', "Размер созданных файлов этикеток")
+PREGENERATED = REGISTRY.counter('label_pregenerated_total', "Этикетки, заранее созданные или удалённые по изменениям плана")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """
+    Периодически записывает метрики в файл и/или отдаёт их по HTTP
+    на локальном адресе (GET /metrics). Работает в фоновых потоках.
+    """
+
+    def __init__(self, registry=REGISTRY, path=None, interval=15.0, port=None, host='127.0.0.1'):
+        """
+        Инициализация MetricsExporter.
+
+        Args:
+            registry (MetricsRegistry): Метрики для вывода.
+            path (str|None): Файл для записи (None — не записывать).
+            interval (float): Период записи файла в секундах.
+            port (int|None): Порт HTTP (None — не запускать сервер).
+            host (str): Адрес сервера (по умолчанию только локальный).
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self._stop = threading.Event()
+        self._writer = None
+        self._server = None
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Записывает файл метрик сейчас; ошибки записи только выводятся."""
+        if not self.path:
+            return
+        try:
+            self.registry.write(self.path)
+        except OSError as e:
+            print(f"Не удалось записать метрики в {self.path}: {e}")
+
+    def start(self):
+        """Запускает запись файла и HTTP-сервер (если заданы)."""
+        if self.path:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        if self.port:
+            handler = type('BoundMetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Останавливает потоки и записывает итоговые значения."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.write()
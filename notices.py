@@ -0,0 +1,37 @@
+from collections import deque
+
+
+# Уровни сообщений: предупреждение показывается окном, сведения — в строке состояния
+WARNING = 'warning'
+INFO = 'info'
+
+# Сообщения для оператора, которые ещё не показаны в окне программы.
+# exe собирается без консоли, поэтому print их не показал бы; загрузчики
+# и фоновые потоки кладут сообщения сюда, а окно забирает их после загрузки
+_notices = deque()
+
+
+def notify(message, level=WARNING):
+    """
+    Ставит сообщение для оператора в очередь окна программы.
+
+    Args:
+        message (str): Текст сообщения.
+        level (str): WARNING или INFO.
+    """
+    _notices.append((level, message))
+
+
+def take_notices():
+    """
+    Забирает накопленные сообщения (в том числе из фоновых потоков).
+
+    Returns:
+        list[tuple[str, str]]: (уровень, текст) в порядке появления.
+    """
+    notices = []
+    while True:
+        try:
+            notices.append(_notices.popleft())
+        except IndexError:
+            return notices
@@ -1,6 +1,10 @@
+import numbers
 from abc import ABC, abstractmethod
 import pandas as pd
-import re
+
+from parse_cache import parse_name, parse_carcase, cache_stats
+from headers import canonical_frame, is_known_header
+from plan_schema import apply_schema
 
 
 class DataLoader(ABC):
@@ -26,12 +30,31 @@ class DataLoader(ABC):
         """
         pass
 
+    def find_order(self, order_number, filename=None):
+        """
+        Возвращает первую строку заказа.
+
+        Реализация по умолчанию загружает все данные и фильтрует их;
+        загрузчики с индексом (например, SQLiteDataLoader) переопределяют метод.
+
+            Args:
+                order_number (str): Номер заказа.
+                filename (str|None): Путь к файлу с данными.
+
+            Returns:
+                pd.Series|dict|None: Строка заказа или None, если заказ не найден.
+        """
+        df = self.load_data(filename)
+        filtered_rows = df[df['№ Заказа'].astype(str) == str(order_number)]
+        return None if filtered_rows.empty else filtered_rows.iloc[0]
+
 
 class ExcelDataLoader(DataLoader):
     """
     Класс для загрузки данных из Excel-файлов.
 
-    Реализует метод load_data, используя pandas.read_excel.
+    Реализует метод load_data, используя pandas.read_excel. Читаются только
+    нужные столбцы, а их заголовки приводятся к каноническим (см. headers.py).
     """
 
     def load_data(self, filename):
@@ -42,14 +65,14 @@ class ExcelDataLoader(DataLoader):
             filename (str): Путь к Excel-файлу.
 
         Returns:
-            pd.DataFrame: Загруженные данные.
+            pd.DataFrame: Загруженные данные с каноническими заголовками.
 
         Raises:
             ValueError: Если файл не найден.
             RuntimeError: При других ошибках загрузки.
         """
         try:
-            return pd.read_excel(filename)
+            return apply_schema(canonical_frame(pd.read_excel(filename, usecols=is_known_header), filename), filename)
         except FileNotFoundError:
             raise ValueError(f"Файл '{filename}' не найден.")
         except Exception as e:
@@ -74,13 +97,11 @@ class OrderProcessor:
         self.data_loader = data_loader
 
     def process_order(self, order_number):
-        df = self.data_loader.load_data('РАСКРОЙ 2025.xlsx')
-        filtered_rows = df[df['№ Заказа'].astype(str) == str(order_number)]
+        first_row = self.data_loader.find_order(order_number, 'РАСКРОЙ 2025.xlsx')
 
-        if filtered_rows.empty:
+        if first_row is None:
             return f"Заказ №{order_number} не найден."
 
-        first_row = filtered_rows.iloc[0]
         info_extractor = InfoExtractor(first_row)
         extracted_info = info_extractor.extract()
         return extracted_info.format_output()
@@ -156,39 +177,36 @@ class InfoExtractor:
         """
         Извлекает наименование изделия без размеров.
 
-        Использует регулярное выражение для поиска текста до размеров.
+        Использует закэшированный разбор строки (см. parse_cache.parse_name).
 
         Returns:
             str: Наименование изделия или пустая строка.
         """
-        match = re.match(r'(.*?)(\d+)[xхХХ*×]', self.row.get('Наименование', ''))
-        return match.group(1).strip() if match else ''
+        return parse_name(self.row.get('Наименование', ''))[0]
 
     def _extract_dimensions(self):
         """
         Извлекает размеры изделия (ширина, высота, глубина) в миллиметрах.
 
-        Использует регулярное выражение для поиска трех чисел, разделённых символами 'x', 'х', '*', '×' и др.
+        Ищет три числа, разделённых символами 'x', 'х', '*', '×' и др.
+        Разбор строки кэшируется (см. parse_cache.parse_name).
 
         Returns:
             tuple[int, int, int]: Кортеж из трёх целых чисел или пустой кортеж.
         """
-        dimensions_match = re.search(r'(\d+)\s*[xхХХ*×]\s*(\d+)\s*[xхХХ*×]\s*(\d+)', self.row.get('Наименование', ''))
-        return tuple(map(int, dimensions_match.groups())) if dimensions_match else ()
+        return parse_name(self.row.get('Наименование', ''))[1]
 
     def _extract_carcase(self):
         """
         Извлекает информацию о корпусе.
 
         Разделяет по '/' и извлекает только буквенную часть каждого элемента.
+        Результат кэшируется (см. parse_cache.parse_carcase).
 
         Returns:
             str: Объединённая строка с корпусом.
         """
-        raw_carcase = self.row.get('Корпус', '').split('/')
-        # Для каждого элемента берём только последовательность букв в начале
-        words = {re.match(r'\D+', p.strip()).group().strip() for p in raw_carcase}
-        return '/'.join(words)
+        return parse_carcase(self.row.get('Корпус', ''))
 
     def _extract_extra_component(self):
         """
@@ -219,12 +237,13 @@ class InfoExtractor:
         Извлекает вес изделия.
 
         Преобразует к float, если возможно, иначе возвращает None.
+        Вес хранится как float32, поэтому округляется до граммов.
 
         Returns:
             float|None: Вес или None.
         """
         weight = self.row.get('ВЕС, КГ', '')
-        return float(weight) if isinstance(weight, (float, int)) else None
+        return round(float(weight), 3) if isinstance(weight, numbers.Real) and weight == weight else None
 
 
 class OrderInfo:
@@ -259,6 +278,25 @@ class OrderInfo:
         self.facade = kwargs.get('facade', None)
         self.weight = kwargs.get('weight', None)
 
+    def to_dict(self):
+        """
+        Возвращает данные заказа в виде словаря, пригодного для JSON.
+
+        Returns:
+            dict: Поля OrderInfo (размеры — списком).
+        """
+        return {
+            'store_application_number': self.store_application_number,
+            'client': self.client,
+            'full_name': self.full_name,
+            'item_name': self.item_name,
+            'dimensions': list(self.dimensions),
+            'carcase': self.carcase,
+            'extra_component': self.extra_component,
+            'facade': self.facade,
+            'weight': self.weight,
+        }
+
     def format_output(self):
         """
         Форматирует информацию о заказе для вывода пользователю.
@@ -293,13 +331,16 @@ def main():
 
     Создаёт загрузчик данных Excel, процессор заказов,
     запрашивает у пользователя номер заказа и выводит информацию.
-    Поддерживает выход по команде 'q'.
+    Поддерживает выход по команде 'q', при выходе печатает статистику кэша разбора.
     """
     loader = ExcelDataLoader()
     processor = OrderProcessor(loader)
     while True:
         order_number = input("🔍 Введите номер заказа (или введите 'q' для выхода): ")
         if order_number.lower() == 'q':
+            stats = cache_stats()
+            print(f"ℹ️ Кэш наименований: {stats['name']['hit_rate']:.0%} попаданий, "
+                  f"кэш корпусов: {stats['carcase']['hit_rate']:.0%} попаданий")
             break
         try:
             result = processor.process_order(order_number)
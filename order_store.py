@@ -0,0 +1,279 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from headers import resolve_headers
+from order_search import DataLoader
+
+
+# Заголовок файла раскроя → столбец таблицы orders
+COLUMNS = [
+    ('№ Заказа', 'order_number'),
+    ('№ магазина / заявка', 'store_application'),
+    ('Клиент', 'client'),
+    ('Наименование', 'full_name'),
+    ('Корпус', 'carcase'),
+    ('Профиль /            Доп. Элементы', 'extra_component'),
+    ('Фасад', 'facade'),
+    ('ВЕС, КГ', 'weight'),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_number      TEXT NOT NULL,
+    line_no           INTEGER NOT NULL,
+    store_application TEXT,
+    client            TEXT,
+    full_name         TEXT,
+    carcase           TEXT,
+    extra_component   TEXT,
+    facade            TEXT,
+    weight,
+    row_hash          TEXT NOT NULL,
+    updated_at        REAL NOT NULL,
+    PRIMARY KEY (order_number, line_no)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_orders_client ON orders (client);
+CREATE INDEX IF NOT EXISTS idx_orders_store_application ON orders (store_application);
+CREATE TABLE IF NOT EXISTS imports (
+    source      TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    rows        INTEGER NOT NULL,
+    imported_at REAL NOT NULL
+);
+"""
+
+
+def normalize_order_number(value):
+    """
+    Приводит номер заказа к строке так же, как это делает поиск по DataFrame.
+
+    Args:
+        value: Значение ячейки «№ Заказа».
+
+    Returns:
+        str|None: Номер заказа или None для пустой ячейки.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+class SQLiteDataLoader(DataLoader):
+    """
+    Загрузчик данных, хранящий историю заказов в локальной базе SQLite.
+
+    Файл раскроя импортируется в базу пакетно и инкрементально: строки
+    заказа сопоставляются по (номер заказа, порядковый номер строки в заказе)
+    и обновляются, только если их содержимое изменилось. Поиск заказа —
+    параметризованный запрос по первичному ключу, без загрузки всей таблицы в память.
+    """
+
+    BATCH_SIZE = 5000
+
+    def __init__(self, db_path, source=None):
+        """
+        Инициализация SQLiteDataLoader.
+
+        Args:
+            db_path (str): Путь к файлу базы SQLite.
+            source (str|None): Файл раскроя, который импортируется при изменении.
+        """
+        self.db_path = db_path
+        self.source = source
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _is_imported(self, filename, stat):
+        row = self.connection.execute(
+            "SELECT size, mtime FROM imports WHERE source = ?", (os.path.abspath(filename),)
+        ).fetchone()
+        return row is not None and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime
+
+    @staticmethod
+    def _iter_csv_values(filename):
+        # Выгрузка CSV читается тем же потоковым загрузчиком, что и в приложении
+        from csv_loader import CsvDataLoader
+
+        yield tuple(header for header, _ in COLUMNS)
+        for chunk in CsvDataLoader(filename).iter_chunks():
+            chunk = chunk.reindex(columns=[header for header, _ in COLUMNS])
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            yield from chunk.itertuples(index=False, name=None)
+
+    def _iter_rows(self, filename):
+        wb = None
+        if os.path.splitext(filename)[1].lower() in ('.csv', '.tsv', '.txt'):
+            rows = self._iter_csv_values(filename)
+        else:
+            wb = load_workbook(filename, read_only=True, data_only=True)
+            rows = wb.active.iter_rows(values_only=True)
+        try:
+            header_map = resolve_headers(next(rows, None) or ())
+            header_map.check(filename)
+            positions = header_map.positions
+
+            line_numbers = {}
+            for values in rows:
+                record = [values[positions[name]] if name in positions and positions[name] < len(values) else None
+                          for name, _ in COLUMNS]
+                order_number = normalize_order_number(record[0])
+                if order_number is None:
+                    continue
+                record[0] = order_number
+                line_no = line_numbers.get(order_number, 0)
+                line_numbers[order_number] = line_no + 1
+                row_hash = hashlib.sha1(repr(record).encode('utf-8')).hexdigest()
+                yield record, line_no, row_hash
+        finally:
+            if wb is not None:
+                wb.close()
+
+    def import_workbook(self, filename, force=False):
+        """
+        Импортирует файл раскроя в базу.
+
+        Если размер и время изменения файла совпадают с последним импортом,
+        файл не читается.
+
+        Args:
+            filename (str): Путь к Excel-файлу или выгрузке CSV/TSV.
+            force (bool): Импортировать, даже если файл не менялся.
+
+        Returns:
+            int: Количество прочитанных строк (0, если импорт пропущен).
+
+        Raises:
+            ValueError: Если файл не найден или в нём нет столбца с номером заказа.
+            RuntimeError: При других ошибках импорта.
+        """
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            raise ValueError(f"Файл '{filename}' не найден.")
+        if not force and self._is_imported(filename, stat):
+            return 0
+
+        names = [column for _, column in COLUMNS]
+        updates = ', '.join(f"{column} = excluded.{column}" for column in names[1:])
+        sql = (
+            f"INSERT INTO orders ({', '.join(names)}, line_no, row_hash, updated_at) "
+            f"VALUES ({', '.join('?' * len(names))}, ?, ?, ?) "
+            f"ON CONFLICT (order_number, line_no) DO UPDATE SET {updates}, "
+            f"row_hash = excluded.row_hash, updated_at = excluded.updated_at "
+            f"WHERE orders.row_hash != excluded.row_hash"
+        )
+
+        now = time.time()
+        total = 0
+        batch = []
+        try:
+            with self.connection:
+                for record, line_no, row_hash in self._iter_rows(filename):
+                    batch.append((*record, line_no, row_hash, now))
+                    if len(batch) >= self.BATCH_SIZE:
+                        self.connection.executemany(sql, batch)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    self.connection.executemany(sql, batch)
+                    total += len(batch)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO imports (source, size, mtime, rows, imported_at) VALUES (?, ?, ?, ?, ?)",
+                    (os.path.abspath(filename), stat.st_size, stat.st_mtime, total, now)
+                )
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при импорте данных: {e}")
+        return total
+
+    def _sync(self, filename=None):
+        filename = filename or self.source
+        if filename:
+            self.import_workbook(filename)
+
+    @staticmethod
+    def _to_row(row):
+        # Строка базы в виде словаря с заголовками файла раскроя, как у pd.Series
+        record = {}
+        for header, column in COLUMNS:
+            value = row[column]
+            record[header] = '' if value is None and column != 'weight' else value
+        return record
+
+    def load_data(self, filename=None):
+        """
+        Возвращает всю историю заказов в виде DataFrame с заголовками файла раскроя.
+
+        Args:
+            filename (str|None): Файл раскроя, который нужно предварительно импортировать.
+
+        Returns:
+            pd.DataFrame: Данные всех заказов.
+        """
+        self._sync(filename)
+        rows = self.connection.execute("SELECT * FROM orders ORDER BY order_number, line_no")
+        return pd.DataFrame([self._to_row(row) for row in rows], columns=[header for header, _ in COLUMNS])
+
+    def find_order(self, order_number, filename=None):
+        """
+        Возвращает первую строку заказа.
+
+        Args:
+            order_number (str): Номер заказа.
+            filename (str|None): Файл раскроя, который нужно предварительно импортировать.
+
+        Returns:
+            dict|None: Строка с заголовками файла раскроя или None.
+        """
+        self._sync(filename)
+        row = self.connection.execute(
+            "SELECT * FROM orders WHERE order_number = ? ORDER BY line_no LIMIT 1",
+            (normalize_order_number(order_number),)
+        ).fetchone()
+        return self._to_row(row) if row else None
+
+    def find_orders_by_client(self, client):
+        """
+        Возвращает номера заказов клиента.
+
+        Args:
+            client (str): Клиент.
+
+        Returns:
+            list[str]: Номера заказов.
+        """
+        rows = self.connection.execute(
+            "SELECT DISTINCT order_number FROM orders WHERE client = ? ORDER BY order_number", (client,)
+        )
+        return [row['order_number'] for row in rows]
+
+    def find_orders_by_store_application(self, store_application):
+        """
+        Возвращает номера заказов по номеру магазина / заявке.
+
+        Args:
+            store_application (str): Номер магазина / заявка.
+
+        Returns:
+            list[str]: Номера заказов.
+        """
+        rows = self.connection.execute(
+            "SELECT DISTINCT order_number FROM orders WHERE store_application = ? ORDER BY order_number",
+            (store_application,)
+        )
+        return [row['order_number'] for row in rows]
@@ -0,0 +1,145 @@
+import io
+from functools import lru_cache
+
+from PIL import Image as PILImage
+
+
+# Ширины штрихов и пробелов символов Code 128 (значения 0–106), в модулях
+CODE128_PATTERNS = [
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312", "132212", "221213",
+    "221312", "231212", "112232", "122132", "122231", "113222", "123122", "123221", "223211", "221132",
+    "221231", "213212", "223112", "312131", "311222", "321122", "321221", "312212", "322112", "322211",
+    "212123", "212321", "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121", "313121", "211331",
+    "231131", "213113", "213311", "213131", "311123", "311321", "331121", "312113", "312311", "332111",
+    "314111", "221411", "431111", "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112", "421211", "212141",
+    "214121", "412121", "111143", "111341", "131141", "114113", "114311", "411113", "411311", "113141",
+    "114131", "311141", "411131", "211412", "211214", "211232", "2331112",
+]
+START_B = 104
+STOP = 106
+QUIET_ZONE = 10
+
+# Символ → строка модулей ('1' — штрих, '0' — пробел), вычисляется один раз
+_MODULES = []
+for _pattern in CODE128_PATTERNS:
+    _MODULES.append(''.join(('1' if i % 2 == 0 else '0') * int(width) for i, width in enumerate(_pattern)))
+
+
+def package_code(order_number, package_num, package_total):
+    """
+    Возвращает значение кода упаковки: номер заказа и номер упаковки n/N.
+
+    Args:
+        order_number (str): Номер заказа.
+        package_num (int): Номер упаковки.
+        package_total (int): Всего упаковок.
+
+    Returns:
+        str: Например '3120-2/5'.
+    """
+    return f"{order_number}-{package_num}/{package_total}"
+
+
+def code128_modules(value):
+    """
+    Кодирует строку в Code 128 (набор B) с контрольным символом.
+
+    Args:
+        value (str): Печатные символы ASCII.
+
+    Returns:
+        str: Модули символа без тихих зон ('1' — штрих, '0' — пробел).
+
+    Raises:
+        ValueError: Если строка содержит символы вне набора B.
+    """
+    codes = []
+    for char in value:
+        code = ord(char) - 32
+        if not 0 <= code <= 94:
+            raise ValueError(f"Символ {char!r} не кодируется Code 128")
+        codes.append(code)
+    checksum = (START_B + sum(i * code for i, code in enumerate(codes, 1))) % 103
+    return ''.join(_MODULES[code] for code in (START_B, *codes, checksum, STOP))
+
+
+def barcode_value(value):
+    """
+    Приводит значение к виду, который кодируется Code 128 (набор B).
+
+    Знак '№' и пробелы в номере заказа только оформление и отбрасываются.
+    Если после этого остаются символы вне набора (например, кириллица),
+    штрихкод не печатается: урезанный номер мог бы совпасть с другим заказом.
+
+    Args:
+        value (str): Значение штрихкода из макета.
+
+    Returns:
+        str|None: Кодируемое значение или None, если штрихкод нужно пропустить.
+    """
+    value = ''.join(char for char in value if char != '№' and not char.isspace())
+    if value and all(32 <= ord(char) <= 126 for char in value):
+        return value
+    return None
+
+
+def draw_barcode_png(value, module_width=2, height=60):
+    """
+    Рисует штрихкод Code 128 в PNG без кэширования (для потоковой записи,
+    где каждый код нужен один раз).
+
+    Args:
+        value (str): Кодируемая строка.
+        module_width (int): Ширина модуля в пикселях.
+        height (int): Высота штрихов в пикселях.
+
+    Returns:
+        bytes: Монохромное PNG-изображение.
+    """
+    modules = '0' * QUIET_ZONE + code128_modules(value) + '0' * QUIET_ZONE
+    # В режиме '1' единичный бит — белый пиксель, поэтому штрих кодируется нулями
+    bits = modules.translate({ord('1'): '0' * module_width, ord('0'): '1' * module_width})
+    width = len(bits)
+    bits += '1' * (-width % 8)
+    row = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+    # Строка в один пиксель растягивается по высоте без перерисовки
+    image = PILImage.frombytes('1', (width, 1), row).resize((width, height), PILImage.NEAREST)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=8192)
+def barcode_png(value, module_width=2, height=60):
+    """
+    Рисует штрихкод Code 128 в PNG. Результат кэшируется по значению.
+
+    Args:
+        value (str): Кодируемая строка.
+        module_width (int): Ширина модуля в пикселях.
+        height (int): Высота штрихов в пикселях.
+
+    Returns:
+        bytes: Монохромное PNG-изображение.
+    """
+    return draw_barcode_png(value, module_width, height)
+
+
+def render_batch(values, module_width=2, height=60):
+    """
+    Рисует штрихкоды для набора значений (например, всех упаковок заказа) за один проход.
+
+    Повторяющиеся значения рисуются один раз.
+
+    Args:
+        values (Iterable[str]): Кодируемые строки.
+        module_width (int): Ширина модуля в пикселях.
+        height (int): Высота штрихов в пикселях.
+
+    Returns:
+        dict[str, bytes]: Значение → PNG.
+    """
+    return {value: barcode_png(value, module_width, height) for value in dict.fromkeys(values)}
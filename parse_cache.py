@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from threading import Lock
+import re
+
+
+# Регулярные выражения компилируются один раз при импорте модуля
+ITEM_NAME_PATTERN = re.compile(r'(.*?)(\d+)[xхХХ*×]')
+DIMENSIONS_PATTERN = re.compile(r'(\d+)\s*[xхХХ*×]\s*(\d+)\s*[xхХХ*×]\s*(\d+)')
+CARCASE_WORD_PATTERN = re.compile(r'\D+')
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру кэш с вытеснением давно не использованных записей.
+
+    Ведёт счётчики попаданий и промахов, чтобы можно было оценить
+    эффективность кэширования на реальном файле раскроя.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Инициализация LRUCache.
+
+        Args:
+            maxsize (int): Максимальное количество хранимых записей.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_compute(self, key, func):
+        """
+        Возвращает значение из кэша или вычисляет и сохраняет его.
+
+        Args:
+            key: Ключ кэша (исходная строка).
+            func (callable): Функция, вычисляющая значение по ключу.
+
+        Returns:
+            Закэшированное или только что вычисленное значение.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = func(key)
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Очищает кэш и обнуляет счётчики.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Возвращает статистику использования кэша.
+
+        Returns:
+            dict: Попадания, промахи, доля попаданий и текущий размер.
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+
+name_cache = LRUCache()
+carcase_cache = LRUCache()
+
+
+def _parse_name(full_name):
+    item_match = ITEM_NAME_PATTERN.match(full_name)
+    item_name = item_match.group(1).strip() if item_match else ''
+    dimensions_match = DIMENSIONS_PATTERN.search(full_name)
+    dimensions = tuple(map(int, dimensions_match.groups())) if dimensions_match else ()
+    return item_name, dimensions
+
+
+def _parse_carcase(raw_carcase):
+    words = []
+    for part in raw_carcase.split('/'):
+        part = part.strip()
+        if not part:
+            continue
+        match = CARCASE_WORD_PATTERN.match(part)
+        if match:
+            words.append(match.group().strip())
+    # Убираем повторы, сохраняя порядок материалов из исходной строки
+    return '/'.join(dict.fromkeys(words))
+
+
+def parse_name(full_name):
+    """
+    Разбирает строку «Наименование» на наименование изделия и размеры.
+
+    Args:
+        full_name (str): Полное наименование, например «Шкаф 800x2100x600».
+
+    Returns:
+        tuple[str, tuple]: Наименование без размеров и кортеж из трёх чисел
+        (или пустой кортеж, если размеры не найдены).
+    """
+    if not isinstance(full_name, str):
+        return '', ()
+    return name_cache.get_or_compute(full_name, _parse_name)
+
+
+def parse_carcase(raw_carcase):
+    """
+    Нормализует строку «Корпус»: оставляет только буквенную часть каждого материала.
+
+    Args:
+        raw_carcase (str): Значение столбца «Корпус», материалы разделены '/'.
+
+    Returns:
+        str: Материалы корпуса через '/' без повторов.
+    """
+    if not isinstance(raw_carcase, str):
+        return ''
+    return carcase_cache.get_or_compute(raw_carcase, _parse_carcase)
+
+
+def cache_stats():
+    """
+    Возвращает статистику кэшей разбора.
+
+    Returns:
+        dict: Статистика по ключам 'name' и 'carcase'.
+    """
+    return {
+        'name': name_cache.stats(),
+        'carcase': carcase_cache.stats(),
+    }
+
+
+def clear_caches():
+    """
+    Очищает кэши разбора, например после загрузки другого файла раскроя.
+    """
+    name_cache.clear()
+    carcase_cache.clear()
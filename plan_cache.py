@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+
+def _canonical(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def plan_hash(labels_data, packages=None):
+    """
+    Вычисляет хэш содержимого плана этикеток.
+
+    Кортежи и списки дают одинаковый хэш, поэтому план, прочитанный из JSON,
+    совпадает с планом, собранным в приложении.
+
+    Args:
+        labels_data (dict): План в формате LabelSheet.
+        packages (Iterable[int]|None): Номера упаковок, если отрисовываются не все.
+
+    Returns:
+        str: Хэш SHA-256 в шестнадцатеричном виде.
+    """
+    payload = {'labels': labels_data['labels'], 'package_total': labels_data['package_total']}
+    if packages is not None:
+        payload['packages'] = sorted(packages)
+    return hashlib.sha256(_canonical(payload).encode('utf-8')).hexdigest()
+
+
+def package_hashes(labels_data):
+    """
+    Вычисляет хэш содержимого каждой упаковки плана.
+
+    Args:
+        labels_data (dict): План в формате LabelSheet.
+
+    Returns:
+        dict[int, str]: Номер упаковки → хэш данных её этикетки.
+    """
+    hashes = {}
+    package_num = 1
+    for label_info in labels_data['labels']:
+        entry = {key: value for key, value in label_info.items() if key != 'count'}
+        entry['package_total'] = labels_data['package_total']
+        entry_hash = hashlib.sha256(_canonical(entry).encode('utf-8')).hexdigest()
+        for _ in range(label_info['count']):
+            hashes[package_num] = entry_hash
+            package_num += 1
+    return hashes
+
+
+def changed_packages(previous, current):
+    """
+    Находит упаковки, этикетки которых отличаются от предыдущего плана.
+
+    Args:
+        previous (dict|None): Ранее сохранённый план.
+        current (dict): Новый план.
+
+    Returns:
+        list[int]: Номера изменившихся (или новых) упаковок.
+    """
+    current_hashes = package_hashes(current)
+    if previous is None:
+        return sorted(current_hashes)
+    previous_hashes = package_hashes(previous)
+    return [num for num, value in sorted(current_hashes.items()) if previous_hashes.get(num) != value]
+
+
+def _safe_name(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)).strip('_') or 'без_номера'
+
+
+class PlanStore:
+    """
+    Хранилище планов этикеток в JSON-файлах: по одному файлу на заказ.
+
+    Сохранённый план переживает очистку списка в приложении и используется
+    для повторной печати.
+    """
+
+    def __init__(self, directory):
+        """
+        Инициализация PlanStore.
+
+        Args:
+            directory (str): Папка для JSON-файлов планов.
+        """
+        self.directory = directory
+
+    def _path(self, order_number):
+        return os.path.join(self.directory, f"{_safe_name(order_number)}.json")
+
+    def save(self, order_number, labels_data):
+        """
+        Сохраняет план заказа, заменяя предыдущий.
+
+        Args:
+            order_number (str): Номер заказа.
+            labels_data (dict): План в формате LabelSheet.
+
+        Returns:
+            str: Путь к файлу плана.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(order_number)
+        record = {
+            'order_number': order_number,
+            'saved_at': time.time(),
+            'hash': plan_hash(labels_data),
+            'labels_data': labels_data,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=4, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, order_number):
+        """
+        Загружает последний сохранённый план заказа.
+
+        Args:
+            order_number (str): Номер заказа.
+
+        Returns:
+            dict|None: План в формате LabelSheet или None, если план не сохранялся.
+        """
+        path = self._path(order_number)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            labels_data = json.load(f)['labels_data']
+        for label_info in labels_data['labels']:
+            label_info['dimensions'] = tuple(label_info.get('dimensions') or ())
+        return labels_data
+
+
+class RenderCache:
+    """
+    Кэш готовых книг этикеток, адресуемый хэшем содержимого плана.
+
+    Повторная печать неизменённого плана копирует файл из кэша без отрисовки.
+    При переполнении удаляются давно не использованные файлы. Кэшем можно
+    пользоваться из нескольких потоков (сканер, заранее создаваемые этикетки).
+    """
+
+    def __init__(self, directory, max_entries=200):
+        """
+        Инициализация RenderCache.
+
+        Args:
+            directory (str): Папка кэша.
+            max_entries (int): Максимальное число хранимых книг.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.xlsx")
+
+    def get(self, key):
+        """
+        Возвращает путь к закэшированной книге или None.
+
+        Args:
+            key (str): Хэш плана.
+
+        Returns:
+            str|None: Путь к файлу в кэше.
+        """
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        return None
+
+    def put(self, key, source_path):
+        """
+        Помещает готовую книгу в кэш.
+
+        Args:
+            key (str): Хэш плана.
+            source_path (str): Путь к готовой книге.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + '.tmp'
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+
+    def _evict(self):
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.xlsx')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            os.remove(path)
+
+    def get_or_render(self, labels_data, path, render, packages=None, options=None):
+        """
+        Сохраняет книгу этикеток по пути path, беря её из кэша, если план не менялся.
+
+        Args:
+            labels_data (dict): План в формате LabelSheet.
+            path (str): Куда сохранить книгу.
+            render (callable): Функция render(labels_data, path, packages), создающая книгу.
+            packages (Iterable[int]|None): Отрисовать только эти упаковки.
+            options (dict|None): Всё остальное, от чего зависит книга: настройки
+                листа, печатаемая дата, отпечаток макетов.
+
+        Returns:
+            bool: True, если книга взята из кэша.
+        """
+        key = plan_hash(labels_data, packages)
+        if options:
+            key = hashlib.sha256(f"{key}{_canonical(options)}".encode('utf-8')).hexdigest()
+        with self._lock:
+            cached = self.get(key)
+            if cached:
+                self.hits += 1
+                shutil.copyfile(cached, path)
+                return True
+
+        with self._lock:
+            self.misses += 1
+        render(labels_data, path, packages)
+        self.put(key, path)
+        return False
@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from headers import ORDER_NUMBER
+from order_store import normalize_order_number
+
+
+# Отпечатки заказов последней прочитанной версии плана раскроя
+FINGERPRINTS_FILE = "plan_fingerprints.json"
+PREGENERATED_DIR = "pregenerated_labels"
+
+
+def order_fingerprints(df):
+    """
+    Считает отпечаток каждого заказа плана раскроя.
+
+    Отпечаток заказа — хэш всех его строк с учётом их порядка, поэтому
+    изменение любой ячейки, добавление или удаление строки заказа меняет
+    отпечаток. Хэши строк считаются векторно (pd.util.hash_pandas_object).
+
+    Args:
+        df (pd.DataFrame): План раскроя с каноническими заголовками.
+
+    Returns:
+        tuple[dict, dict]: Номер заказа → отпечаток (hex) и номер заказа → позиция первой строки.
+    """
+    if df.empty:
+        return {}, {}
+    keys = pd.Series([None if pd.isna(value) else normalize_order_number(value) for value in df[ORDER_NUMBER]],
+                     dtype=object)
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    present = keys.notna().to_numpy()
+    keys = keys[present].reset_index(drop=True)
+    rows = rows[present]
+    positions = np.flatnonzero(present)
+
+    # Хэш строки умножается на её порядковый номер внутри заказа (нечётный множитель),
+    # чтобы перестановка строк тоже меняла отпечаток; переполнение uint64 допустимо
+    line_no = keys.groupby(keys, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        weighted = rows * (line_no * np.uint64(2) + np.uint64(1))
+    combined = pd.Series(weighted).groupby(keys.to_numpy(), sort=False).sum()
+
+    first = pd.Series(positions).groupby(keys.to_numpy(), sort=False).first()
+    fingerprints = {order: format(int(value) & 0xFFFFFFFFFFFFFFFF, '016x') for order, value in combined.items()}
+    return fingerprints, {order: int(pos) for order, pos in first.items()}
+
+
+class PlanDiff:
+    """Заказы, добавленные, изменённые и удалённые между двумя версиями плана раскроя."""
+
+    def __init__(self, added=(), changed=(), removed=()):
+        self.added = list(added)
+        self.changed = list(changed)
+        self.removed = list(removed)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self):
+        return f"PlanDiff(добавлено={len(self.added)}, изменено={len(self.changed)}, удалено={len(self.removed)})"
+
+
+def diff_fingerprints(old, new):
+    """
+    Сравнивает отпечатки заказов двух версий плана.
+
+    Args:
+        old (dict): Отпечатки предыдущей версии.
+        new (dict): Отпечатки новой версии.
+
+    Returns:
+        PlanDiff: Различия; порядок заказов — как в новом (для удалённых — в старом) плане.
+    """
+    added = [order for order in new if order not in old]
+    changed = [order for order, fingerprint in new.items() if order in old and old[order] != fingerprint]
+    removed = [order for order in old if order not in new]
+    return PlanDiff(added, changed, removed)
+
+
+def load_fingerprints(path):
+    """
+    Читает сохранённые отпечатки.
+
+    Args:
+        path (str): Файл отпечатков.
+
+    Returns:
+        tuple[str|None, dict]: Файл раскроя, для которого они посчитаны, и отпечатки
+            (None и пустой словарь, если файла нет или он повреждён).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state['source'], state['orders']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, {}
+
+
+def save_fingerprints(path, source, fingerprints):
+    """
+    Атомарно сохраняет отпечатки заказов.
+
+    Args:
+        path (str): Файл отпечатков.
+        source (str): Файл раскроя.
+        fingerprints (dict): Номер заказа → отпечаток.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'source': source, 'orders': fingerprints}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class PlanWatcher:
+    """
+    Следит за файлом раскроя и заранее создаёт этикетки для новых и изменённых заказов.
+
+    Когда время изменения файла меняется, файл перечитывается, отпечатки
+    заказов сравниваются с предыдущей версией (она хранится в state_path и
+    переживает перезапуск программы), и для добавленных и изменённых заказов
+    в фоновом потоке вызывается generate. Для удалённых заказов вызывается
+    remove. Первая версия файла только запоминается: без предыдущей версии
+    нельзя понять, что изменилось, а создавать этикетки на весь план незачем.
+    Отпечаток заказа запоминается только после успешной обработки, поэтому
+    заказы сверх max_orders, прерванные остановкой и завершившиеся ошибкой
+    обрабатываются при следующей проверке.
+    """
+
+    def __init__(self, source, load_data, generate, remove=None, state_path=FINGERPRINTS_FILE,
+                 interval=30.0, max_orders=500):
+        """
+        Инициализация PlanWatcher.
+
+        Args:
+            source (callable): source() → путь к файлу раскроя для чтения или None, если файл не задан.
+            load_data (callable): load_data(path) → DataFrame с каноническими заголовками.
+            generate (callable): generate(order_number, row) для добавленного или изменённого заказа.
+            remove (callable|None): remove(order_number) для удалённого заказа.
+            state_path (str): Файл отпечатков предыдущей версии.
+            interval (float): Как часто проверять файл, секунды.
+            max_orders (int): Больше стольких заказов за одну проверку заранее не создаётся.
+        """
+        self.source = source
+        self.load_data = load_data
+        self.generate = generate
+        self.remove = remove
+        self.state_path = state_path
+        self.interval = interval
+        self.max_orders = max_orders
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """
+        Проверяет файл раскроя один раз (вызывается из фонового потока).
+
+        Returns:
+            PlanDiff|None: Различия с предыдущей версией или None, если файл не менялся
+                или это первая версия.
+        """
+        path = self.source()
+        if not path or not os.path.exists(path):
+            return None
+        mtime = os.path.getmtime(path)
+        if mtime == self._mtime:
+            return None
+
+        started = time.perf_counter()
+        df = self.load_data(path)
+        fingerprints, positions = order_fingerprints(df)
+        key = os.path.abspath(path)
+        previous_source, previous = load_fingerprints(self.state_path)
+        if previous_source != key:
+            save_fingerprints(self.state_path, key, fingerprints)
+            self._mtime = mtime
+            print(f"План раскроя {path}: запомнено {len(fingerprints)} заказов")
+            return None
+
+        diff = diff_fingerprints(previous, fingerprints)
+        print(f"План раскроя {path}: {diff!r} за {time.perf_counter() - started:.2f} с")
+        # Отпечаток заказа обновляется только после того, как его этикетки созданы (или он удалён):
+        # отложенные, прерванные и неудачные заказы остаются в различиях и повторяются при следующей проверке
+        state = dict(previous)
+        orders = diff.added + diff.changed
+        if len(orders) > self.max_orders:
+            print(f"Заранее создаются этикетки только для первых {self.max_orders} из {len(orders)} заказов")
+        try:
+            for order_number in orders[:self.max_orders]:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.generate(order_number, df.iloc[positions[order_number]])
+                except Exception as e:
+                    print(f"Не удалось заранее создать этикетки заказа {order_number}: {e}")
+                    continue
+                state[order_number] = fingerprints[order_number]
+            for order_number in diff.removed:
+                if self._stop.is_set():
+                    break
+                if self.remove is not None:
+                    try:
+                        self.remove(order_number)
+                    except Exception as e:
+                        print(f"Не удалось удалить заранее созданные этикетки заказа {order_number}: {e}")
+                        continue
+                del state[order_number]
+        finally:
+            save_fingerprints(self.state_path, key, state)
+        if state == fingerprints:
+            # Пока есть необработанные заказы, файл проверяется снова, даже если он не менялся
+            self._mtime = mtime
+        return diff
+
+    def _run(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                # Файл перезаписывается или сетевой диск недоступен — повторим позже
+                print(f"Ошибка проверки плана раскроя: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Запускает фоновую проверку файла."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Останавливает проверку; начатый заказ доделывается."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+
+import pandas as pd
+
+from headers import ORDER_NUMBER, WEIGHT
+from notices import INFO, notify
+
+
+# Текстовые столбцы с повторяющимися значениями (цвета, клиенты) — категории
+CATEGORY_COLUMNS = ['№ магазина / заявка', 'Клиент', 'Корпус', 'Профиль /            Доп. Элементы', 'Фасад']
+# Столбец переводится в категорию, только если уникальных значений не больше этой доли строк
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+# Уникальные в основном строки — строки Arrow, если установлен pyarrow
+ARROW_STRING_COLUMNS = ['Наименование']
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# Версии файлов (путь, размер, время изменения), об экономии памяти которых уже сообщено
+_reported = set()
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+def _file_version(source):
+    try:
+        stat = os.stat(source)
+    except (OSError, TypeError, ValueError):
+        return source
+    return os.path.abspath(source), stat.st_size, stat.st_mtime
+
+
+def _compact_order_numbers(values):
+    present = values.dropna()
+    numeric = pd.to_numeric(present, errors='coerce')
+    if present.empty or numeric.isna().any() or (numeric < 0).any() or (numeric % 1 != 0).any():
+        return values
+    # Номер должен однозначно восстанавливаться из числа: без ведущих нулей и пробелов
+    if present.dtype == object and not (numeric.astype('int64').astype(str) == present.astype(str)).all():
+        return values
+    dtype = pd.to_numeric(numeric.astype('int64'), downcast='unsigned').dtype
+    # Пустые ячейки остаются пустыми (pd.NA) в целочисленном столбце с пропусками
+    return pd.to_numeric(values, errors='coerce').astype(f"UInt{dtype.itemsize * 8}")
+
+
+def _compact_weight(values):
+    if values.dtype == object:
+        # В выгрузках из 1С дробная часть отделяется запятой
+        values = values.map(lambda value: value.replace(',', '.').strip() if isinstance(value, str) else value)
+    return pd.to_numeric(values, errors='coerce').astype('float32')
+
+
+def apply_schema(df, source=''):
+    """
+    Приводит столбцы плана раскроя к компактным типам и сообщает об экономии памяти.
+
+    Повторяющиеся текстовые столбцы становятся категориями, вес — float32,
+    номер заказа — беззнаковым целым наименьшей разрядности (если все номера
+    числовые), наименование — строками Arrow (при установленном pyarrow).
+
+    Размер таблицы до и после (полный проход memory_usage(deep=True)) считается
+    один раз на версию файла и уходит в строку состояния окна (notices), а не
+    при каждом поиске заказа, который перечитывает файл.
+
+    Args:
+        df (pd.DataFrame): Данные с каноническими заголовками.
+        source (str): Имя файла для сообщения.
+
+    Returns:
+        pd.DataFrame: Данные с компактными типами.
+    """
+    version = _file_version(source)
+    measure = version not in _reported
+    before = _memory_mb(df) if measure else None
+    df = df.copy(deep=False)
+
+    if ORDER_NUMBER in df:
+        df[ORDER_NUMBER] = _compact_order_numbers(df[ORDER_NUMBER])
+    if WEIGHT in df:
+        df[WEIGHT] = _compact_weight(df[WEIGHT])
+    for column in CATEGORY_COLUMNS:
+        if column in df and df[column].dtype == object:
+            if df[column].nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(df):
+                df[column] = df[column].astype('category')
+    if HAS_PYARROW:
+        for column in ARROW_STRING_COLUMNS:
+            if column in df and df[column].dtype == object:
+                df[column] = df[column].astype('string[pyarrow]')
+
+    if measure:
+        _reported.add(version)
+        notify(f"План раскроя {os.path.basename(str(source))}: {len(df)} строк, "
+               f"в памяти {before:.1f} МБ → {_memory_mb(df):.1f} МБ", INFO)
+    return df
@@ -0,0 +1,462 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urllib_request
+
+
+def validate_labels_data(labels_data):
+    """
+    Проверяет план этикеток, пришедший от станции, и дополняет package_total.
+
+    Args:
+        labels_data (dict): План в формате LabelSheet: {'labels': [...], 'package_total': N}.
+
+    Returns:
+        dict: Проверенный план.
+
+    Raises:
+        ValueError: Если план не содержит списка этикеток или в нём нет обязательных полей.
+    """
+    if not isinstance(labels_data, dict) or not isinstance(labels_data.get('labels'), list):
+        raise ValueError("План должен содержать список 'labels'")
+
+    required = ('label_type', 'count', 'item_name', 'dimensions', 'weight',
+                'store_number', 'client', 'carcase', 'extra_component', 'order_number')
+    for i, label_info in enumerate(labels_data['labels']):
+        if not isinstance(label_info, dict):
+            raise ValueError(f"Этикетка №{i + 1} должна быть объектом")
+        missing = [key for key in required if key not in label_info]
+        if missing:
+            raise ValueError(f"В этикетке №{i + 1} нет полей: {', '.join(missing)}")
+        if not isinstance(label_info['count'], int) or label_info['count'] < 1:
+            raise ValueError(f"В этикетке №{i + 1} некорректное количество")
+
+    if 'package_total' not in labels_data:
+        labels_data['package_total'] = sum(label['count'] for label in labels_data['labels'])
+    return labels_data
+
+
+def _safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|]+', '_', str(name)).strip() or 'Этикетки'
+
+
+def render_batch(batch, output_dir):
+    """
+    Отрисовывает пачку заданий в одном рабочем процессе.
+
+    Каждое задание сохраняется в отдельный файл через LabelSheet.save: файл
+    сначала пишется во временный, а затем переименовывается, чтобы в выходной
+    папке никогда не появлялись недописанные книги.
+
+    Args:
+        batch (list[tuple[str, str, dict]]): Задания (job_id, имя файла, план этикеток).
+        output_dir (str): Папка для готовых файлов.
+
+    Returns:
+        list[dict]: Результат по каждому заданию: путь, число этикеток, ошибка, время отрисовки.
+    """
+    # Импорт внутри функции: рабочий процесс загружает openpyxl один раз на пачку
+    from main_app import ReplicatedLabelSheet, DEFAULT_LABELS_PER_SHEET
+
+    results = []
+    for job_id, name, labels_data in batch:
+        started = time.perf_counter()
+        path = os.path.join(output_dir, f"{_safe_filename(name)}.xlsx")
+        try:
+            sheet = ReplicatedLabelSheet(labels_data, labels_per_sheet=DEFAULT_LABELS_PER_SHEET, split_by_order=True)
+            sheet.create_labels()
+            # LabelSheet.save сам пишет во временный файл и записывает каждое изображение один раз
+            if not sheet.save(path):
+                raise RuntimeError("Не удалось сохранить файл")
+            results.append({'job_id': job_id, 'output_path': path, 'error': None,
+                            'labels': labels_data['package_total'],
+                            'render_seconds': time.perf_counter() - started})
+        except Exception as e:
+            results.append({'job_id': job_id, 'output_path': None, 'error': str(e),
+                            'labels': 0, 'render_seconds': time.perf_counter() - started})
+    return results
+
+
+class PrintJobQueue:
+    """
+    Очередь заданий печати этикеток от нескольких упаковочных станций.
+
+    Задания, накопившиеся за batch_window секунд (но не более batch_size),
+    объединяются в пачку и отдаются пулу рабочих процессов. Готовые файлы
+    складываются в output_dir.
+    """
+
+    def __init__(self, output_dir, workers=2, batch_size=8, batch_window=0.5, use_processes=True):
+        """
+        Инициализация PrintJobQueue.
+
+        Args:
+            output_dir (str): Папка для готовых файлов этикеток.
+            workers (int): Количество рабочих процессов отрисовки.
+            batch_size (int): Максимальное число заданий в одной пачке.
+            batch_window (float): Сколько секунд ждать дополнительных заданий для пачки.
+            use_processes (bool): Отрисовывать в процессах (True) или потоках (False).
+        """
+        self.output_dir = output_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.use_processes = use_processes
+
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._dispatcher = None
+        self._stopping = threading.Event()
+
+        self._started_at = None
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'batches': 0,
+            'labels_rendered': 0,
+            'render_seconds': 0.0,
+        }
+        self._in_flight = 0
+
+    def start(self):
+        """
+        Запускает пул отрисовки и поток формирования пачек.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=self.workers)
+        self._started_at = time.monotonic()
+        self._stopping.clear()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def stop(self, wait=True):
+        """
+        Останавливает приём пачек и дожидается завершения уже отданных в работу.
+
+        Args:
+            wait (bool): Ждать ли окончания отрисовки текущих пачек.
+        """
+        self._stopping.set()
+        if self._dispatcher:
+            self._dispatcher.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    def submit(self, labels_data, name=None):
+        """
+        Ставит план этикеток в очередь.
+
+        Args:
+            labels_data (dict): План в формате LabelSheet.
+            name (str|None): Имя выходного файла без расширения; к нему добавляется
+                начало идентификатора задания, чтобы станции с одинаковым именем
+                не перезаписывали файлы друг друга.
+
+        Returns:
+            str: Идентификатор задания.
+
+        Raises:
+            ValueError: Если план некорректен.
+        """
+        labels_data = validate_labels_data(labels_data)
+        job_id = uuid.uuid4().hex
+        if not name:
+            order_number = labels_data['labels'][0].get('order_number', '') if labels_data['labels'] else ''
+            name = f"{order_number} Этикетки"
+        name = f"{name} {job_id[:8]}".strip()
+
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'name': name,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'finished_at': None,
+                'output_path': None,
+                'error': None,
+            }
+            self._counters['submitted'] += 1
+        self._queue.put((job_id, name, labels_data))
+        return job_id
+
+    def status(self, job_id):
+        """
+        Возвращает состояние задания.
+
+        Args:
+            job_id (str): Идентификатор задания.
+
+        Returns:
+            dict|None: Состояние задания или None, если задание неизвестно.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout=None, poll_interval=0.05):
+        """
+        Ждёт завершения задания.
+
+        Args:
+            job_id (str): Идентификатор задания.
+            timeout (float|None): Максимальное время ожидания в секундах.
+            poll_interval (float): Период опроса состояния.
+
+        Returns:
+            dict|None: Итоговое состояние задания.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.status(job_id)
+            if job is None or job['status'] in ('done', 'failed'):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def stats(self):
+        """
+        Возвращает метрики очереди: глубину, пропускную способность и счётчики.
+
+        Returns:
+            dict: Метрики очереди.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        finished = counters['completed'] + counters['failed']
+        return {
+            **counters,
+            'queue_depth': self._queue.qsize(),
+            'in_flight': in_flight,
+            'uptime_seconds': uptime,
+            'jobs_per_minute': finished / uptime * 60 if uptime else 0.0,
+            'labels_per_second': counters['labels_rendered'] / uptime if uptime else 0.0,
+            'avg_batch_size': finished / counters['batches'] if counters['batches'] else 0.0,
+            'avg_render_seconds': counters['render_seconds'] / finished if finished else 0.0,
+        }
+
+    def _collect_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while not self._stopping.is_set() or not self._queue.empty():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            with self._lock:
+                for job_id, _, _ in batch:
+                    self._jobs[job_id]['status'] = 'rendering'
+                self._in_flight += len(batch)
+                self._counters['batches'] += 1
+
+            future = self._executor.submit(render_batch, batch, self.output_dir)
+            future.add_done_callback(lambda f, b=batch: self._on_batch_done(f, b))
+
+    def _on_batch_done(self, future, batch):
+        try:
+            results = future.result()
+        except Exception as e:
+            results = [{'job_id': job_id, 'output_path': None, 'error': str(e),
+                        'labels': 0, 'render_seconds': 0.0} for job_id, _, _ in batch]
+
+        with self._lock:
+            for result in results:
+                job = self._jobs[result['job_id']]
+                job['finished_at'] = time.time()
+                job['output_path'] = result['output_path']
+                job['error'] = result['error']
+                job['status'] = 'failed' if result['error'] else 'done'
+                self._counters['failed' if result['error'] else 'completed'] += 1
+                self._counters['labels_rendered'] += result['labels']
+                self._counters['render_seconds'] += result['render_seconds']
+            self._in_flight -= len(batch)
+
+
+class PrintQueueHandler(BaseHTTPRequestHandler):
+    """
+    HTTP-обработчик очереди печати.
+
+    POST /jobs       — поставить план в очередь (тело: {"labels_data": {...}, "name": "..."}).
+    GET  /jobs/<id>  — состояние задания.
+    GET  /stats      — метрики очереди.
+    """
+
+    job_queue = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+            job_id = self.job_queue.submit(payload.get('labels_data'), payload.get('name'))
+        except (ValueError, AttributeError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(202, {'job_id': job_id})
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.job_queue.stats())
+        elif self.path.startswith('/jobs/'):
+            job = self.job_queue.status(self.path[len('/jobs/'):])
+            if job is None:
+                self._send_json(404, {'error': 'job not found'})
+            else:
+                self._send_json(200, job)
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(job_queue, host='127.0.0.1', port=8765):
+    """
+    Создаёт HTTP-сервер очереди печати.
+
+    Args:
+        job_queue (PrintJobQueue): Запущенная очередь заданий.
+        host (str): Адрес для прослушивания (по умолчанию только локальный).
+        port (int): Порт.
+
+    Returns:
+        ThreadingHTTPServer: Сервер, готовый к serve_forever().
+    """
+    handler = type('BoundPrintQueueHandler', (PrintQueueHandler,), {'job_queue': job_queue})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class PrintQueueClient:
+    """
+    Клиент очереди печати для упаковочных станций (HTTP).
+    """
+
+    def __init__(self, base_url='http://127.0.0.1:8765', timeout=10):
+        """
+        Инициализация PrintQueueClient.
+
+        Args:
+            base_url (str): Адрес сервиса очереди.
+            timeout (float): Таймаут HTTP-запросов в секундах.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        req = urllib_request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        with urllib_request.urlopen(req, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def submit(self, labels_data, name=None):
+        return self._request('POST', '/jobs', {'labels_data': labels_data, 'name': name})['job_id']
+
+    def status(self, job_id):
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def stats(self):
+        return self._request('GET', '/stats')
+
+    def wait(self, job_id, timeout=None, poll_interval=0.1):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.status(job_id)
+            if job['status'] in ('done', 'failed'):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                return job
+            time.sleep(poll_interval)
+
+
+class LocalPrintQueueClient:
+    """
+    Клиент с тем же интерфейсом, что и PrintQueueClient, но без сети:
+    обращается к очереди в текущем процессе. Удобен для проверки станций.
+    """
+
+    def __init__(self, job_queue):
+        self.job_queue = job_queue
+
+    def submit(self, labels_data, name=None):
+        return self.job_queue.submit(labels_data, name)
+
+    def status(self, job_id):
+        return self.job_queue.status(job_id)
+
+    def stats(self):
+        return self.job_queue.stats()
+
+    def wait(self, job_id, timeout=None, poll_interval=0.05):
+        return self.job_queue.wait(job_id, timeout, poll_interval)
+
+
+def main():
+    """
+    Запускает сервис очереди печати из командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Очередь печати этикеток для нескольких станций")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', default='labels_out', help="Папка для готовых файлов")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--batch-window', type=float, default=0.5)
+    args = parser.parse_args()
+
+    job_queue = PrintJobQueue(args.output, workers=args.workers,
+                              batch_size=args.batch_size, batch_window=args.batch_window)
+    job_queue.start()
+    server = create_server(job_queue, args.host, args.port)
+    print(f"Очередь печати слушает http://{args.host}:{args.port}, файлы: {os.path.abspath(args.output)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        job_queue.stop()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,165 @@
+import os
+import queue
+import threading
+import time
+import uuid
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+STAGING_DIR = "label_outbox"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class SavePipeline(QObject):
+    """
+    Фоновая доставка готовых файлов этикеток в папку назначения.
+
+    Файл сначала целиком создаётся в локальной папке staging_dir, а затем
+    в фоновом потоке копируется рядом с местом назначения во временный файл
+    '<имя>.part' и переименовывается (os.replace). Поэтому на сетевом диске
+    никогда не остаётся недописанного файла, а интерфейс не ждёт записи.
+    При ошибках копирование повторяется с нарастающей паузой; если доставить
+    файл так и не удалось, локальная копия остаётся в staging_dir.
+    """
+
+    # (путь назначения, процент)
+    progress = pyqtSignal(str, int)
+    # (путь назначения, номер попытки, ошибка)
+    retrying = pyqtSignal(str, int, str)
+    # (путь назначения, успешно ли, сообщение)
+    finished = pyqtSignal(str, bool, str)
+
+    def __init__(self, staging_dir=STAGING_DIR, retries=5, backoff=0.5, max_backoff=10.0, parent=None):
+        """
+        Инициализация SavePipeline.
+
+        Args:
+            staging_dir (str): Локальная папка для готовых файлов.
+            retries (int): Сколько раз повторять доставку после ошибки.
+            backoff (float): Первая пауза между попытками, секунды.
+            max_backoff (float): Максимальная пауза, секунды.
+            parent (QObject|None): Родительский объект.
+        """
+        super().__init__(parent)
+        self.staging_dir = staging_dir
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stage_path(self, destination):
+        """
+        Возвращает локальный путь, в который нужно сохранить файл для destination.
+
+        Args:
+            destination (str): Итоговый путь файла.
+
+        Returns:
+            str: Путь в staging_dir с тем же расширением.
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return os.path.join(self.staging_dir, f"{uuid.uuid4().hex}{os.path.splitext(destination)[1]}")
+
+    def start(self):
+        """Запускает фоновый поток доставки."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit(self, local_path, destination):
+        """
+        Ставит готовый локальный файл в очередь на доставку.
+
+        Args:
+            local_path (str): Файл, созданный в stage_path().
+            destination (str): Итоговый путь.
+        """
+        self.start()
+        with self._lock:
+            self._pending += 1
+        self._queue.put((local_path, destination))
+
+    def pending(self):
+        """Возвращает число файлов, которые ещё не доставлены."""
+        with self._lock:
+            return self._pending
+
+    def stop(self, wait=True):
+        """
+        Останавливает доставку.
+
+        Args:
+            wait (bool): Дождаться доставки уже поставленных файлов.
+        """
+        if self._thread is None:
+            return
+        if wait:
+            self._queue.join()
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None or self._stop.is_set():
+                    return
+                local_path, destination = item
+                ok, message = self._deliver(local_path, destination)
+                with self._lock:
+                    self._pending -= 1
+                self.finished.emit(destination, ok, message)
+            finally:
+                self._queue.task_done()
+
+    def _copy(self, local_path, destination):
+        part_path = destination + '.part'
+        total = os.path.getsize(local_path)
+        copied = 0
+        reported = -1
+        try:
+            with open(local_path, 'rb') as src, open(part_path, 'wb') as dst:
+                while True:
+                    chunk = src.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    copied += len(chunk)
+                    percent = copied * 100 // total if total else 100
+                    # Сигнал не чаще, чем раз в 5 %
+                    if percent // 5 != reported // 5:
+                        reported = percent
+                        self.progress.emit(destination, percent)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(part_path, destination)
+        except OSError:
+            if os.path.exists(part_path):
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+            raise
+
+    def _deliver(self, local_path, destination):
+        delay = self.backoff
+        for attempt in range(1, self.retries + 2):
+            try:
+                self._copy(local_path, destination)
+                os.remove(local_path)
+                return True, f"Файл сохранён: {destination}"
+            except OSError as e:
+                # Сетевой диск недоступен или файл открыт в Excel
+                if attempt > self.retries or self._stop.is_set():
+                    return False, f"Не удалось сохранить {destination}: {e}. Файл остался в {os.path.abspath(local_path)}"
+                self.retrying.emit(destination, attempt, str(e))
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
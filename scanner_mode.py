@@ -0,0 +1,226 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from headers import ORDER_NUMBER
+from order_search import DataLoader
+from order_store import normalize_order_number
+
+
+# План по умолчанию для отсканированного заказа: тип этикетки → количество.
+# Типы, для которых у заказа нет компонента (например, нет фасада), пропускаются.
+DEFAULT_SCANNER_PLAN = {"КОРПУС": 1, "ФАСАДЫ МДФ": 1, "Профиль/доп элемент": 1}
+SCANNER_OUTPUT_DIR = "scanned_labels"
+
+# Код упаковки с этикетки: <номер заказа>-<n>/<N>
+_PACKAGE_CODE = re.compile(r'^(?P<order>.+)-\d+/\d+$')
+
+
+def parse_scan(text):
+    """
+    Возвращает номер заказа из отсканированной строки.
+
+    Сканер может прислать как номер заказа, так и код упаковки с этикетки
+    (см. package_codes.package_code); управляющие символы отбрасываются.
+
+    Args:
+        text (str): Строка от сканера.
+
+    Returns:
+        str|None: Номер заказа или None для пустой строки.
+    """
+    value = ''.join(char for char in text if char.isprintable()).strip()
+    match = _PACKAGE_CODE.match(value)
+    return (match.group('order') if match else value) or None
+
+
+def _component(label_type, order_info):
+    label_type = label_type.upper()
+    if label_type == "КОРПУС":
+        return order_info.carcase
+    if label_type == "ОРГАЛИТ":
+        return "БЕЛЫЙ"
+    if label_type in ["ФАСАДЫ МДФ", "ФАСАДЫ ПЛАСТИК"]:
+        return order_info.facade
+    return order_info.extra_component
+
+
+def default_plan(order_number, order_info, plan=None):
+    """
+    Составляет план этикеток для заказа без участия оператора.
+
+    Args:
+        order_number (str): Номер заказа.
+        order_info (OrderInfo): Данные заказа.
+        plan (dict|None): Тип этикетки → количество (по умолчанию DEFAULT_SCANNER_PLAN).
+
+    Returns:
+        dict: План в формате LabelSheet (может не содержать позиций).
+    """
+    labels = []
+    for label_type, count in (DEFAULT_SCANNER_PLAN if plan is None else plan).items():
+        if count < 1 or _component(label_type, order_info) in (None, '', '-'):
+            continue
+        labels.append({
+            'label_type': label_type,
+            'count': count,
+            'item_name': order_info.item_name,
+            'dimensions': order_info.dimensions,
+            'weight': order_info.weight,
+            'store_number': order_info.store_application_number,
+            'client': order_info.client,
+            'carcase': order_info.carcase,
+            'extra_component': order_info.extra_component,
+            'facade': order_info.facade,
+            'order_number': order_number,
+        })
+    return {'labels': labels, 'package_total': sum(label['count'] for label in labels)}
+
+
+class MemoryOrderIndex(DataLoader):
+    """
+    Файл раскроя, загруженный в память со словарём «номер заказа → первая строка».
+
+    Файл читается один раз и перечитывается, только если изменилось время
+    его изменения (проверяется не чаще check_interval секунд), поэтому
+    каждый следующий заказ находится без чтения файла.
+    """
+
+    def __init__(self, filename, data_loader, check_interval=5.0):
+        """
+        Инициализация MemoryOrderIndex.
+
+        Args:
+            filename (str): Путь к файлу раскроя.
+            data_loader (DataLoader): Загрузчик файла (см. loader_engines.loader_for).
+            check_interval (float): Как часто проверять изменение файла, секунды.
+        """
+        self.filename = filename
+        self.data_loader = data_loader
+        self.check_interval = check_interval
+        self._df = None
+        self._positions = {}
+        self._mtime = None
+        self._last_check = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._df is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        mtime = os.path.getmtime(self.filename)
+        if self._df is not None and mtime == self._mtime:
+            return
+        df = self.data_loader.load_data(self.filename)
+        positions = {}
+        for pos, value in enumerate(df[ORDER_NUMBER]):
+            key = normalize_order_number(value)
+            if key is not None:
+                positions.setdefault(key, pos)
+        self._df, self._positions, self._mtime = df, positions, mtime
+
+    def load_data(self, filename=None):
+        self._refresh()
+        return self._df
+
+    def find_order(self, order_number, filename=None):
+        self._refresh()
+        pos = self._positions.get(str(order_number).strip())
+        return None if pos is None else self._df.iloc[pos]
+
+
+class ScannerWorker(QObject):
+    """
+    Очередь заказов от сканера штрихкодов.
+
+    Строки сканера ставятся в очередь и обрабатываются по одной в фоновом
+    потоке: поиск заказа, план по умолчанию и создание файла этикеток.
+    Результат каждого заказа сообщается сигналом processed, без модальных окон.
+    """
+
+    # (номер заказа, сообщение, успешно ли)
+    processed = pyqtSignal(str, str, bool)
+
+    def __init__(self, process, parent=None):
+        """
+        Инициализация ScannerWorker.
+
+        Args:
+            process (callable): Функция process(order_number) → сообщение о результате;
+                выполняется в фоновом потоке и сообщает об ошибке исключением.
+            parent (QObject|None): Родительский объект.
+        """
+        super().__init__(parent)
+        self.process = process
+        self._queue = deque()
+        self._pending = set()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Запускает фоновый поток обработки."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает обработку; уже начатый заказ доделывается."""
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._pending.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, text):
+        """
+        Ставит отсканированную строку в очередь.
+
+        Повторный скан заказа, который ещё ждёт обработки (например, код
+        другой упаковки того же заказа), не добавляет его второй раз.
+
+        Args:
+            text (str): Строка от сканера.
+
+        Returns:
+            str|None: Номер заказа в очереди или None, если строка пуста или заказ уже в очереди.
+        """
+        order_number = parse_scan(text)
+        if order_number is None:
+            return None
+        with self._condition:
+            if order_number in self._pending:
+                return None
+            self._pending.add(order_number)
+            self._queue.append(order_number)
+            self._condition.notify()
+        return order_number
+
+    def queued(self):
+        """Возвращает число заказов, ожидающих обработки."""
+        return len(self._queue)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                order_number = self._queue.popleft()
+            try:
+                message, ok = self.process(order_number), True
+            except Exception as e:
+                message, ok = str(e), False
+            with self._condition:
+                self._pending.discard(order_number)
+            self.processed.emit(order_number, message, ok)
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from notices import INFO, notify
+
+
+class SnapshotCache:
+    """
+    Локальные снимки файла раскроя, лежащего на сетевом диске.
+
+    Файл копируется в локальную папку, только если на шаре изменились его
+    размер или время изменения (и, по желанию, хэш начала и конца файла).
+    Разбор выполняется по локальной копии, поэтому сетевой диск занят
+    только на время копирования. Если файл заблокирован (открыт в Excel),
+    а снимок уже есть, сразу возвращается он, а копирование с нарастающей
+    задержкой повторяется в фоновом потоке. Без снимка повторы идут сразу.
+    """
+
+    RANGE_SIZE = 64 * 1024
+
+    # Снимки, которые сейчас обновляются в фоне (общие для всех экземпляров)
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
+    def __init__(self, directory, retries=5, backoff=0.2, max_backoff=5.0, verify_ranges=False):
+        """
+        Инициализация SnapshotCache.
+
+        Args:
+            directory (str): Локальная папка для снимков.
+            retries (int): Сколько раз повторять копирование при блокировке.
+            backoff (float): Первая задержка между попытками, секунды.
+            max_backoff (float): Максимальная задержка, секунды.
+            verify_ranges (bool): Дополнительно сравнивать хэш начала и конца файла
+                (для шар, где время изменения ненадёжно).
+        """
+        self.directory = directory
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.verify_ranges = verify_ranges
+        # Время копирования устаревшего снимка, который вернул последний local_copy
+        # (файл занят или недоступен), или None, если снимок актуален
+        self.stale_since = None
+
+    def _paths(self, source):
+        key = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+        name = f"{key}{os.path.splitext(source)[1]}"
+        return os.path.join(self.directory, name), os.path.join(self.directory, name + '.json')
+
+    def _range_hash(self, path, size):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            digest.update(f.read(self.RANGE_SIZE))
+            if size > self.RANGE_SIZE:
+                f.seek(max(self.RANGE_SIZE, size - self.RANGE_SIZE))
+                digest.update(f.read(self.RANGE_SIZE))
+        return digest.hexdigest()
+
+    def _signature(self, source):
+        stat = os.stat(source)
+        signature = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        if self.verify_ranges:
+            signature['ranges'] = self._range_hash(source, stat.st_size)
+        return signature
+
+    @staticmethod
+    def _load_meta(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _with_retries(self, action):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return action()
+            except FileNotFoundError:
+                raise
+            except OSError as e:
+                # PermissionError и ошибки сети — файл открыт в Excel или шара недоступна
+                if attempt == self.retries:
+                    raise
+                print(f"Файл раскроя занят ({e}), повтор через {delay:.1f} с")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def _temp_path(self):
+        # Свой временный файл на каждый вызов: снимок одновременно обновляют GUI, сканер и PlanWatcher
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return tmp_path
+
+    def _copy(self, source, local_path, meta_path):
+        signature = self._signature(source)
+        tmp_path = self._temp_path()
+        try:
+            shutil.copyfile(source, tmp_path)
+            # Файл сохранили во время копирования — копия может быть несогласованной
+            if self._signature(source) != signature:
+                raise OSError("файл изменился во время копирования")
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        tmp_path = self._temp_path()
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(signature, source=os.path.abspath(source), copied_at=time.time()), f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+        return local_path
+
+    def _refresh_in_background(self, source, local_path, meta_path):
+        with self._refreshing_lock:
+            if local_path in self._refreshing:
+                return
+            self._refreshing.add(local_path)
+
+        def refresh():
+            try:
+                self._with_retries(lambda: self._copy(source, local_path, meta_path))
+                notify(f"Снимок файла раскроя {os.path.basename(source)} обновлён", INFO)
+            except OSError as e:
+                notify(f"Не удалось обновить снимок файла раскроя {os.path.basename(source)}: {e}. "
+                       f"Этикетки создаются по прежнему снимку.")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(local_path)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def local_copy(self, source):
+        """
+        Возвращает путь к актуальному локальному снимку файла.
+
+        Если файл занят, а снимок уже есть, возвращает снимок сразу и
+        обновляет его в фоне: ждать сетевой диск дольше самого копирования
+        не приходится. Время устаревшего снимка запоминается в stale_since
+        и сообщается окну программы (notices).
+
+        Args:
+            source (str): Путь к файлу на сетевом диске.
+
+        Returns:
+            str: Путь к локальной копии.
+
+        Raises:
+            ValueError: Если файл не найден и снимка нет.
+            RuntimeError: Если файл не удалось скопировать и снимка нет.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        local_path, meta_path = self._paths(source)
+        meta = self._load_meta(meta_path)
+        have_snapshot = meta is not None and os.path.exists(local_path)
+
+        if not have_snapshot:
+            try:
+                self._with_retries(lambda: self._signature(source))
+                return self._with_retries(lambda: self._copy(source, local_path, meta_path))
+            except FileNotFoundError:
+                raise ValueError(f"Файл '{source}' не найден.")
+            except OSError as e:
+                raise RuntimeError(f"Не удалось скопировать файл раскроя: {e}")
+
+        self.stale_since = None
+        try:
+            signature = self._signature(source)
+            if all(meta.get(key) == value for key, value in signature.items()):
+                return local_path
+            return self._copy(source, local_path, meta_path)
+        except FileNotFoundError:
+            self._use_stale(meta, f"Файл {os.path.basename(source)} недоступен,")
+            return local_path
+        except OSError as e:
+            self._use_stale(meta, f"Файл {os.path.basename(source)} занят ({e}), обновление в фоне;")
+            self._refresh_in_background(source, local_path, meta_path)
+            return local_path
+
+    def _use_stale(self, meta, reason):
+        self.stale_since = meta['copied_at']
+        notify(f"{reason} используется снимок от {time.strftime('%d.%m.%Y %H:%M', time.localtime(self.stale_since))}",
+               INFO)
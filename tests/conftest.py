@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(autouse=True)
+def app_dir(monkeypatch):
+    """Тесты запускаются из папки приложения, как и сама программа"""
+    monkeypatch.chdir(ROOT)
+    return ROOT
+
+
+def make_label(order_number='3000', count=2, label_type='КОРПУС', **overrides):
+    label = {
+        'label_type': label_type,
+        'count': count,
+        'item_name': 'Шкаф 800x2100x600',
+        'dimensions': (800, 2100, 600),
+        'weight': 80.0,
+        'store_number': 'М2/2',
+        'client': 'Петров',
+        'carcase': 'Дуб сонома 16',
+        'extra_component': 'Профиль Gola',
+        'facade': 'МДФ Белый',
+        'order_number': order_number,
+    }
+    label.update(overrides)
+    return label
+
+
+def make_plan(*labels):
+    return {'labels': list(labels), 'package_total': sum(label['count'] for label in labels)}
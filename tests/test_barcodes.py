@@ -0,0 +1,78 @@
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+import main_app
+from conftest import make_label, make_plan
+from label_layout import get_layouts
+from notices import WARNING, take_notices
+from package_codes import barcode_value, code128_modules
+
+
+def test_barcode_value_drops_number_sign():
+    assert barcode_value('№12345-1/2') == '12345-1/2'
+    assert barcode_value('3000-1/2') == '3000-1/2'
+
+
+def test_barcode_value_skips_cyrillic():
+    assert barcode_value('А123-1/2') is None
+
+
+def test_code128_rejects_non_ascii():
+    with pytest.raises(ValueError):
+        code128_modules('№1')
+
+
+@pytest.mark.parametrize('sheet_class', [main_app.LabelSheet, main_app.ReplicatedLabelSheet,
+                                         main_app.StreamingLabelSheet])
+@pytest.mark.parametrize('order_number, barcodes', [('№12345', 2), ('ЗК-77', 0)])
+def test_non_ascii_order_number_renders(tmp_path, sheet_class, order_number, barcodes):
+    sheet = sheet_class(make_plan(make_label(order_number)))
+    sheet.create_labels()
+    path = str(tmp_path / 'labels.xlsx')
+    assert sheet.save(path)
+
+    ws = load_workbook(path).worksheets[0]
+    assert ws['M1'].value == f"№ {order_number}"
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+    assert len(names) == len(set(names))
+    # Логотипы есть всегда, штрихкоды — только если номер кодируется
+    assert len(ws._images) == 3 * 2 + barcodes
+
+
+def test_unencodable_order_is_reported_once():
+    take_notices()
+    layout = get_layouts().default
+    for package_num in (1, 2, 3):
+        assert layout.barcode_values(dict(make_label('ЗК-78', count=3), package_num=package_num,
+                                          package_total=3)) == []
+    notices = take_notices()
+    assert len(notices) == 1
+    assert notices[0][0] == WARNING and 'ЗК-78' in notices[0][1]
+
+
+def test_print_queue_output_has_unique_media(tmp_path):
+    from print_queue import render_batch
+
+    plan = make_plan(make_label('3000', count=3), make_label('3001', count=2, label_type='ФАСАДЫ МДФ'))
+    [result] = render_batch([('job1', 'Станция 1', plan)], str(tmp_path))
+    assert result['error'] is None
+    with zipfile.ZipFile(result['output_path']) as archive:
+        names = archive.namelist()
+        assert archive.testzip() is None
+    assert len(names) == len(set(names))
+
+
+def test_shared_images_with_same_name_do_not_collide(tmp_path):
+    from PIL import Image as PILImage
+
+    paths = []
+    for folder, color in (('a', 'red'), ('b', 'blue')):
+        (tmp_path / folder).mkdir()
+        path = str(tmp_path / folder / 'Logo.png')
+        PILImage.new('RGB', (4, 4), color).save(path)
+        paths.append(path)
+    first, second = (main_app.SharedImage(path) for path in paths)
+    assert first.path != second.path
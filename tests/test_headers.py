@@ -0,0 +1,24 @@
+import pytest
+
+from headers import ORDER_NUMBER, WEIGHT, resolve_headers
+from notices import WARNING, take_notices
+
+
+def test_missing_columns_are_queued_for_the_window_once():
+    take_notices()
+    header_map = resolve_headers([ORDER_NUMBER, 'Наименование изделия', WEIGHT, 'Примечание'])
+
+    message = header_map.check('plan.xlsx')
+    assert 'Клиент' in message and 'plan.xlsx' in message
+    assert take_notices() == [(WARNING, message)]
+
+    # Тот же набор заголовков при следующем чтении файла не повторяет окно
+    assert resolve_headers([ORDER_NUMBER, 'Наименование изделия', WEIGHT, 'Примечание']).check('plan.xlsx') == message
+    assert take_notices() == []
+
+
+def test_missing_order_column_is_an_error():
+    with pytest.raises(ValueError):
+        resolve_headers(['Клиент', WEIGHT]).check('plan.xlsx')
+    assert resolve_headers(
+        [ORDER_NUMBER, '№ магазина', 'Клиент', 'Изделие', 'Корпус', 'Профиль', 'Фасад', WEIGHT]).check() is None
@@ -0,0 +1,29 @@
+from PyQt6.QtCore import Qt
+
+from conftest import make_label
+from label_plan_model import LabelPlanModel, WEIGHT_COLUMN
+
+
+def _model():
+    model = LabelPlanModel([make_label(count=2), make_label(count=3)])
+    rejected = []
+    model.value_rejected.connect(rejected.append)
+    return model, rejected
+
+
+def test_invalid_cell_input_is_reported_and_kept():
+    model, rejected = _model()
+    assert not model.setData(model.index(0, 1), '0', Qt.ItemDataRole.EditRole)
+    assert model.labels[0]['count'] == 2
+    assert len(rejected) == 1 and "'0'" in rejected[0] and 'Кол-во' in rejected[0]
+
+    assert model.setData(model.index(0, WEIGHT_COLUMN), '12,5', Qt.ItemDataRole.EditRole)
+    assert model.labels[0]['weight'] == 12.5
+    assert len(rejected) == 1
+
+
+def test_bulk_edit_reports_rejected_value_once():
+    model, rejected = _model()
+    assert model.set_column_values([0, 1], 1, 'много') == 0
+    assert [label['count'] for label in model.labels] == [2, 3]
+    assert len(rejected) == 1 and '2 из 2' in rejected[0]
@@ -0,0 +1,14 @@
+import os
+
+from label_layout import get_layouts
+
+
+def test_layouts_load_outside_app_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    get_layouts.cache_clear()
+    try:
+        layouts = get_layouts()
+        assert layouts.default.images
+        assert all(os.path.exists(path) for path, _, _, _, _ in layouts.default.images)
+    finally:
+        get_layouts.cache_clear()
@@ -0,0 +1,35 @@
+import tracemalloc
+
+from memory_profile import MemoryProfiler
+
+
+def test_report_stops_tracing_and_starts_a_new_report(tmp_path):
+    profiler = MemoryProfiler(enabled=True)
+    with profiler.stage("Первый заказ"):
+        data = [bytes(1024) for _ in range(100)]
+    assert tracemalloc.is_tracing()
+
+    report_path = profiler.write_report(str(tmp_path / 'labels.xlsx'))
+    assert report_path.endswith('labels.memory.txt')
+    assert not tracemalloc.is_tracing()
+    assert profiler.stages == []
+
+    with profiler.stage("Второй заказ"):
+        data.clear()
+    profiler.write_report(str(tmp_path / 'second.xlsx'))
+    with open(tmp_path / 'second.memory.txt', encoding='utf-8') as f:
+        report = f.read()
+    assert "Второй заказ" in report and "Первый заказ" not in report
+
+
+def test_reset_keeps_tracing_started_elsewhere():
+    tracemalloc.start()
+    try:
+        profiler = MemoryProfiler(enabled=True)
+        with profiler.stage("Этап"):
+            pass
+        profiler.reset()
+        assert tracemalloc.is_tracing()
+        assert profiler.stages == []
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,34 @@
+from conftest import make_label, make_plan
+from label_layout import get_layouts, label_date
+from plan_cache import RenderCache
+
+
+def _render(calls):
+    def render(labels_data, path, packages):
+        calls.append(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('книга')
+    return render
+
+
+def test_options_are_part_of_cache_key(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    plan = make_plan(make_label())
+    calls = []
+    options = {'labels_per_page': 1, 'labels_per_sheet': 100, 'date': label_date(),
+               'layouts': get_layouts().fingerprint}
+
+    assert not cache.get_or_render(plan, str(tmp_path / 'a.xlsx'), _render(calls), None, options)
+    assert cache.get_or_render(plan, str(tmp_path / 'b.xlsx'), _render(calls), None, dict(options))
+    for changed in ({'date': '01.01.2000'}, {'labels_per_sheet': 50}, {'layouts': 'другой'}):
+        assert not cache.get_or_render(plan, str(tmp_path / 'c.xlsx'), _render(calls), None,
+                                       dict(options, **changed))
+    assert len(calls) == 4
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_layout_fingerprint_is_stable():
+    fingerprint = get_layouts().fingerprint
+    assert len(fingerprint) == 64
+    get_layouts.cache_clear()
+    assert get_layouts().fingerprint == fingerprint
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+
+from headers import ORDER_NUMBER, WEIGHT
+from plan_diff import PlanWatcher, load_fingerprints
+
+
+def _watcher(tmp_path, frames, generate, **kwargs):
+    plan_path = tmp_path / 'plan.xlsx'
+    plan_path.write_bytes(b'')
+    state = {'mtime': 1_000_000}
+
+    def touch(df):
+        frames.append(df)
+        state['mtime'] += 10
+        os.utime(plan_path, (state['mtime'], state['mtime']))
+
+    watcher = PlanWatcher(lambda: str(plan_path), lambda path: frames[-1], generate,
+                          state_path=str(tmp_path / 'state.json'), **kwargs)
+    return watcher, touch
+
+
+def test_failed_and_cut_off_orders_are_retried(tmp_path):
+    frames = []
+    generated = []
+    failing = {'102'}
+
+    def generate(order_number, row):
+        if order_number in failing:
+            raise OSError('диск недоступен')
+        generated.append(order_number)
+
+    watcher, touch = _watcher(tmp_path, frames, generate, max_orders=2)
+    touch(pd.DataFrame({ORDER_NUMBER: ['100'], WEIGHT: [1.0]}))
+    assert watcher.check() is None
+
+    touch(pd.DataFrame({ORDER_NUMBER: ['100', '101', '102', '103'], WEIGHT: [1.0, 2.0, 3.0, 4.0]}))
+    diff = watcher.check()
+    assert diff.added == ['101', '102', '103']
+    assert generated == ['101']
+    _, saved = load_fingerprints(str(tmp_path / 'state.json'))
+    assert sorted(saved) == ['100', '101']
+
+    # Файл не менялся, но необработанные заказы повторяются
+    failing.clear()
+    diff = watcher.check()
+    assert diff.added == ['102', '103']
+    assert generated == ['101', '102', '103']
+    assert watcher.check() is None
+
+
+def test_stopped_watcher_keeps_orders_pending(tmp_path):
+    frames = []
+    generated = []
+    watcher, touch = _watcher(tmp_path, frames, lambda order_number, row: generated.append(order_number))
+    touch(pd.DataFrame({ORDER_NUMBER: ['100'], WEIGHT: [1.0]}))
+    watcher.check()
+
+    touch(pd.DataFrame({ORDER_NUMBER: ['100'], WEIGHT: [5.0]}))
+    watcher._stop.set()
+    watcher.check()
+    assert generated == []
+    _, saved = load_fingerprints(str(tmp_path / 'state.json'))
+
+    watcher._stop.clear()
+    assert watcher.check().changed == ['100']
+    assert generated == ['100']
+    _, updated = load_fingerprints(str(tmp_path / 'state.json'))
+    assert updated != saved
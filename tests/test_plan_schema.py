@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from headers import ORDER_NUMBER, WEIGHT
+from notices import INFO, take_notices
+from plan_schema import apply_schema
+
+
+def _plan():
+    return pd.DataFrame({ORDER_NUMBER: ['3000', '3001', '3002', '3003'],
+                         WEIGHT: ['1,5', '2', None, '4.25'],
+                         'Клиент': ['Петров', 'Петров', 'Петров', 'Иванов']})
+
+
+def test_schema_compacts_columns():
+    df = apply_schema(_plan())
+    assert str(df[ORDER_NUMBER].dtype) == 'UInt16'
+    assert str(df[WEIGHT].dtype) == 'float32'
+    assert df[WEIGHT].iloc[0] == 1.5
+    assert str(df['Клиент'].dtype) == 'category'
+
+
+def test_memory_saving_is_reported_once_per_file_version(tmp_path):
+    source = tmp_path / 'plan.xlsx'
+    source.write_bytes(b'v1')
+    take_notices()
+
+    apply_schema(_plan(), str(source))
+    apply_schema(_plan(), str(source))
+    notices = take_notices()
+    assert len(notices) == 1
+    level, message = notices[0]
+    assert level == INFO and 'plan.xlsx' in message and '4 строк' in message
+
+    source.write_bytes(b'version 2')
+    os.utime(source, (1_000_000, 1_000_000))
+    apply_schema(_plan(), str(source))
+    assert len(take_notices()) == 1
@@ -0,0 +1,35 @@
+import threading
+from urllib import error as urllib_error
+
+import pytest
+
+from conftest import make_label, make_plan
+from print_queue import PrintJobQueue, PrintQueueClient, create_server, validate_labels_data
+
+
+def test_non_dict_label_is_rejected():
+    with pytest.raises(ValueError):
+        validate_labels_data({'labels': ['3000']})
+
+
+def test_http_rejects_malformed_plan_with_400(tmp_path):
+    server = create_server(PrintJobQueue(str(tmp_path)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = PrintQueueClient(f'http://127.0.0.1:{server.server_address[1]}')
+        with pytest.raises(urllib_error.HTTPError) as e:
+            client.submit({'labels': [None]})
+        assert e.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_same_name_from_two_stations_gives_two_files(tmp_path):
+    job_queue = PrintJobQueue(str(tmp_path))
+    first = job_queue.submit(make_plan(make_label()), 'Заказ 3000')
+    second = job_queue.submit(make_plan(make_label()), 'Заказ 3000')
+    names = {job_queue.status(first)['name'], job_queue.status(second)['name']}
+    assert len(names) == 2
+    assert all(name.startswith('Заказ 3000 ') for name in names)
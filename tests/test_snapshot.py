@@ -0,0 +1,95 @@
+import os
+import shutil
+import threading
+import time
+
+import snapshot
+from notices import INFO, WARNING, take_notices
+from snapshot import SnapshotCache
+
+
+def _wait_for_refresh(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while SnapshotCache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_locked_source_returns_snapshot_and_refreshes_in_background(tmp_path, monkeypatch):
+    source = tmp_path / 'plan.xlsx'
+    source.write_bytes(b'v1')
+    cache = SnapshotCache(str(tmp_path / 'snapshots'), backoff=0.3)
+    local_path = cache.local_copy(str(source))
+    take_notices()
+
+    source.write_bytes(b'version 2')
+    locked = {'attempts': 2}
+    copyfile = shutil.copyfile
+
+    def locked_copyfile(src, dst):
+        if locked['attempts']:
+            locked['attempts'] -= 1
+            raise PermissionError('файл открыт в Excel')
+        return copyfile(src, dst)
+
+    monkeypatch.setattr(snapshot.shutil, 'copyfile', locked_copyfile)
+    started = time.perf_counter()
+    assert cache.local_copy(str(source)) == local_path
+    assert time.perf_counter() - started < 0.25
+    with open(local_path, 'rb') as f:
+        assert f.read() == b'v1'
+    assert cache.stale_since is not None
+
+    _wait_for_refresh()
+    with open(local_path, 'rb') as f:
+        assert f.read() == b'version 2'
+    assert cache.local_copy(str(source)) == local_path
+    assert cache.stale_since is None
+    assert locked['attempts'] == 0
+    notices = take_notices()
+    assert [level for level, _ in notices] == [INFO, INFO]
+    assert 'используется снимок от' in notices[0][1]
+
+
+def test_failed_background_refresh_warns_the_operator(tmp_path, monkeypatch):
+    source = tmp_path / 'plan.xlsx'
+    source.write_bytes(b'v1')
+    cache = SnapshotCache(str(tmp_path / 'snapshots'), retries=1, backoff=0.01)
+    cache.local_copy(str(source))
+    source.write_bytes(b'version 2')
+
+    def locked_copyfile(src, dst):
+        raise PermissionError('файл открыт в Excel')
+
+    monkeypatch.setattr(snapshot.shutil, 'copyfile', locked_copyfile)
+    take_notices()
+    cache.local_copy(str(source))
+    _wait_for_refresh()
+    levels = [level for level, _ in take_notices()]
+    assert levels == [INFO, WARNING]
+
+
+def test_concurrent_copies_use_their_own_temp_files(tmp_path):
+    source = tmp_path / 'plan.xlsx'
+    source.write_bytes(os.urandom(256 * 1024))
+    cache = SnapshotCache(str(tmp_path / 'snapshots'))
+    local_path, meta_path = cache._paths(str(source))
+    os.makedirs(cache.directory)
+    errors = []
+
+    def copy():
+        try:
+            cache._copy(str(source), local_path, meta_path)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=copy) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(local_path, 'rb') as f:
+        assert f.read() == source.read_bytes()
+    assert sorted(os.listdir(cache.directory)) == sorted([os.path.basename(local_path),
+                                                          os.path.basename(meta_path)])
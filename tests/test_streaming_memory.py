@@ -0,0 +1,27 @@
+import tracemalloc
+
+from conftest import make_label, make_plan
+from main_app import StreamingLabelSheet
+
+
+def _peak(tmp_path, orders, chunk_size=10):
+    plan = make_plan(*[make_label(str(3000 + i), count=3) for i in range(orders)])
+    tracemalloc.start()
+    try:
+        sheet = StreamingLabelSheet(plan, chunk_size=chunk_size)
+        sheet.create_labels()
+        assert sheet.save(str(tmp_path / f'{orders}.xlsx'))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_peak_does_not_grow_with_label_count(tmp_path):
+    # Прогрев: шрифты, макеты и кэши модулей не должны попасть в сравнение
+    _peak(tmp_path, 2)
+    small = _peak(tmp_path, 10)
+    large = _peak(tmp_path, 60)
+
+    # Впятеро больше этикеток — пик почти тот же: изображения и рисунки
+    # закрытых листов уходят во временные файлы
+    assert large < small * 1.5, (small, large)
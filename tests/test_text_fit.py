@@ -0,0 +1,31 @@
+from text_fit import CELL_PADDING, LINE_SPACING, MIN_FONT_SIZE, fit_font_size, text_width, wrap_lines
+
+FONT = 'Times New Roman'
+LONG_NAME = 'Шкаф-купе трёхдверный с зеркалом и антресолью 2400x2600x650'
+
+
+def test_short_text_keeps_layout_size():
+    assert fit_font_size(FONT, 20, 'Шкаф', 300, 40) == (20, False)
+
+
+def test_long_name_shrinks_to_fit_one_line():
+    size, wrap = fit_font_size(FONT, 20, LONG_NAME, 400, 40)
+    assert MIN_FONT_SIZE <= size < 20
+    assert not wrap
+    assert text_width(FONT, size, LONG_NAME) <= 400 - CELL_PADDING
+
+
+def test_long_name_wraps_when_lines_allowed():
+    size, wrap = fit_font_size(FONT, 20, LONG_NAME, 300, 60, max_lines=2)
+    single_line, _ = fit_font_size(FONT, 20, LONG_NAME, 300, 60)
+    assert wrap
+    # Перенос позволяет оставить шрифт крупнее, чем в одну строку
+    assert single_line < size < 20
+    lines = wrap_lines(FONT, size, LONG_NAME, 300 - CELL_PADDING)
+    assert len(lines) == 2
+    assert len(lines) * size * LINE_SPACING <= 60 - CELL_PADDING
+
+
+def test_text_that_never_fits_stops_at_min_size():
+    assert fit_font_size(FONT, 20, LONG_NAME * 4, 100, 20)[0] == MIN_FONT_SIZE
+    assert fit_font_size(FONT, 20, LONG_NAME, 100, 20, min_size=10)[0] == 10
@@ -0,0 +1,37 @@
+import label_layout
+from conftest import make_label, make_plan
+from zpl_backend import ZplRenderer
+
+# Эталон термоэтикетки: изменение раскладки FIELDS/BARCODES должно быть осознанным
+EXPECTED = (
+    "^XA^CI28^PW799^LL1199"
+    "^FO20,20^XGR:LOGO.GRF,1,1^FS"
+    "^FO650,30^XGR:EAC.GRF,1,1^FS"
+    "^FO20,1060^XGR:CONTACTS.GRF,1,1^FS"
+    "^FO20,210^A0N,60,60^FH^FD№ 3000_5FA^FS"
+    "^FO20,290^A0N,40,40^FB772,2,0,L^FH^FDШкаф 800x2100x600^FS"
+    "^FO20,390^A0N,50,50^FH^FDКОРПУС^FS"
+    "^FO20,460^A0N,36,36^FB772,2,0,L^FH^FDЦвет: Дуб сонома 16^FS"
+    "^FO20,560^A0N,36,36^FB772,2,0,L^FH^FDЗаказчик: Петров/М2/2^FS"
+    "^FO20,660^A0N,36,36^FH^FDВ x Ш x Г: 2100 x 800 x 600 мм^FS"
+    "^FO20,720^A0N,36,36^FH^FDВес: 80 кг^FS"
+    "^FO20,800^A0N,90,90^FH^FD2 / 3^FS"
+    "^FO20,1010^A0N,36,36^FH^FD01.01.2026^FS"
+    "^FO420,1010^A0N,30,30^FH^FDГОСТ 16371-2014^FS"
+    "^FO20,900^BY2^BCN,70,Y,N,N^FH^FD3000_5FA-2/3^FS"
+    "^XZ\n"
+)
+
+
+def test_label_matches_golden_zpl(monkeypatch):
+    monkeypatch.setattr(label_layout, 'label_date', lambda: '01.01.2026')
+    label = dict(make_label(order_number='3000_A', count=2), package_num=2, package_total=3)
+    assert ZplRenderer().render_label(label) == EXPECTED
+
+
+def test_plan_zpl_repeats_golden_label_per_package(monkeypatch):
+    monkeypatch.setattr(label_layout, 'label_date', lambda: '01.01.2026')
+    plan = make_plan(make_label(order_number='3000_A', count=1, label_type='ФАСАДЫ МДФ'),
+                     make_label(order_number='3000_A', count=2))
+    chunks = list(ZplRenderer().iter_zpl(plan, packages=[3]))
+    assert chunks[1:] == [EXPECTED.replace("^FD2 / 3^", "^FD3 / 3^").replace("-2/3^", "-3/3^")]
@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+from PIL import ImageFont
+
+
+# Файлы полужирных шрифтов по имени шрифта макета: Windows, затем аналоги с Linux
+FONT_FILES = {
+    'times new roman': ('timesbd.ttf', 'Times New Roman Bold.ttf', 'LiberationSerif-Bold.ttf',
+                        'DejaVuSerif-Bold.ttf'),
+    'arial': ('arialbd.ttf', 'Arial Bold.ttf', 'LiberationSans-Bold.ttf', 'DejaVuSans-Bold.ttf'),
+}
+MIN_FONT_SIZE = 8
+# Межстрочный интервал Excel относительно размера шрифта
+LINE_SPACING = 1.2
+# Поля ячейки по горизонтали (с двух сторон) и по вертикали, пункты
+CELL_PADDING = 4.0
+DEFAULT_COLUMN_WIDTH = 8.43
+DEFAULT_ROW_HEIGHT = 15.0
+
+
+def column_width_pt(width):
+    """Переводит ширину столбца Excel (в символах) в пункты: 7 пикселей на символ плюс 5 пикселей полей."""
+    return (width * 7 + 5) * 0.75
+
+
+@lru_cache(maxsize=None)
+def _font(name, size):
+    for filename in FONT_FILES.get(name.lower(), (name,)):
+        try:
+            return ImageFont.truetype(filename, size)
+        except OSError:
+            continue
+    # Шрифта нет в системе: встроенный шрифт Pillow даёт близкие, но не точные размеры
+    print(f"Шрифт {name} не найден, размеры текста приблизительные")
+    return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=65536)
+def text_width(name, size, text):
+    """
+    Ширина строки в пунктах; измеряется один раз для каждого (шрифт, размер, текст).
+
+    Args:
+        name (str): Имя шрифта.
+        size (float): Размер шрифта, пункты.
+        text (str): Строка.
+
+    Returns:
+        float: Ширина строки в пунктах.
+    """
+    return _font(name, size).getlength(text)
+
+
+def wrap_lines(name, size, text, width):
+    """
+    Разбивает текст на строки по словам так, как это делает перенос в Excel.
+
+    Args:
+        name (str): Имя шрифта.
+        size (float): Размер шрифта, пункты.
+        text (str): Текст.
+        width (float): Доступная ширина, пункты.
+
+    Returns:
+        list[str]: Строки; слово длиннее ширины остаётся в своей строке целиком.
+    """
+    lines = []
+    for word in text.split():
+        candidate = f"{lines[-1]} {word}" if lines else word
+        if lines and text_width(name, size, candidate) <= width:
+            lines[-1] = candidate
+        else:
+            lines.append(word)
+    return lines
+
+
+def _fits(name, size, text, width, height, max_lines):
+    if size * LINE_SPACING > height:
+        return False, 1
+    if text_width(name, size, text) <= width:
+        return True, 1
+    if max_lines < 2:
+        return False, 1
+    lines = wrap_lines(name, size, text, width)
+    fits = (len(lines) <= max_lines and len(lines) * size * LINE_SPACING <= height
+            and all(text_width(name, size, line) <= width for line in lines))
+    return fits, len(lines)
+
+
+@lru_cache(maxsize=16384)
+def fit_font_size(name, max_size, text, width, height, max_lines=1, min_size=MIN_FONT_SIZE):
+    """
+    Подбирает наибольший размер шрифта, при котором текст помещается в область.
+
+    Размеры перебираются с шагом 1 пункт от max_size вниз; одна строка сразу
+    начинает с оценки по ширине текста при max_size. Результат кэшируется,
+    поэтому повторяющиеся наименования и цвета в выгрузке подбираются один раз.
+
+    Args:
+        name (str): Имя шрифта.
+        max_size (float): Размер из макета — больше него шрифт не увеличивается.
+        text (str): Текст.
+        width (float): Ширина области, пункты.
+        height (float): Высота области, пункты.
+        max_lines (int): Сколько строк разрешено при переносе по словам.
+        min_size (float): Меньше этого размера шрифт не уменьшается, даже если текст не помещается.
+
+    Returns:
+        tuple[float, bool]: Размер шрифта и нужен ли перенос строк.
+    """
+    width -= CELL_PADDING
+    height -= CELL_PADDING
+    size = max_size
+    if max_lines < 2:
+        # Ширина текста почти пропорциональна размеру шрифта
+        full = text_width(name, max_size, text)
+        if full > width:
+            size = min(max_size, max(min_size, int(max_size * width / full)))
+    while size > min_size:
+        fits, lines = _fits(name, size, text, width, height, max_lines)
+        if fits:
+            return size, lines > 1
+        size -= 1
+    size = max(size, min_size)
+    return size, max_lines > 1 and _fits(name, size, text, width, height, max_lines)[1] > 1
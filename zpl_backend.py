@@ -0,0 +1,204 @@
+import os
+import socket
+from functools import lru_cache
+
+from PIL import Image as PILImage, ImageOps
+
+from label_layout import LabelContext
+
+
+DPI = 203
+DOTS_PER_MM = DPI / 25.4
+# Термоэтикетка 100 x 150 мм
+LABEL_WIDTH_MM = 100
+LABEL_HEIGHT_MM = 150
+
+# Изображение → (x, y, ширина в точках) на этикетке
+LOGOS = [
+    ("images/Logo.png", 20, 20, 560),
+    ("images/EAC.png", 650, 30, 140),
+    ("images/Contacts.png", 20, 1060, 400),
+]
+
+# (x, y, высота шрифта в точках, ширина блока для переноса или None, шаблон)
+FIELDS = [
+    (20, 210, 60, None, "№ {order_number}"),
+    (20, 290, 40, 772, "{item_name}"),
+    (20, 390, 50, None, "{label_type}"),
+    (20, 460, 36, 772, "Цвет: {color}"),
+    (20, 560, 36, 772, "Заказчик: {client}/{store_number}"),
+    (20, 660, 36, None, "В x Ш x Г: {height} x {width} x {depth} мм"),
+    (20, 720, 36, None, "Вес: {weight_kg} кг"),
+    (20, 800, 90, None, "{package_num} / {package_total}"),
+    (20, 1010, 36, None, "{date}"),
+    (420, 1010, 30, None, "ГОСТ 16371-2014"),
+]
+
+# (x, y, высота штрихов в точках, шаблон значения) — Code 128, рисуется самим принтером
+BARCODES = [
+    (20, 900, 70, "{order_number}-{package_num}/{package_total}"),
+]
+
+# Номер упаковки подставляется в готовый текст этикетки при тиражировании
+_PACKAGE_MARK = "\x00"
+
+
+class _ZplContext(LabelContext):
+    """Поля этикетки для ZPL: пустые значения — пустая строка, спецсимволы экранированы для ^FH."""
+
+    def __getitem__(self, name):
+        value = super().__getitem__(name)
+        if value is None or value != value:
+            return ''
+        return str(value).replace('_', '_5F').replace('^', '_5E').replace('~', '_7E')
+
+
+def _graphic_name(path):
+    return f"R:{os.path.splitext(os.path.basename(path))[0][:8].upper()}.GRF"
+
+
+@lru_cache(maxsize=None)
+def _download_graphic(path, mtime, width):
+    # mtime входит в ключ кэша, чтобы заменённый файл логотипа перечитывался
+    with PILImage.open(path) as source:
+        image = source.convert('L')
+    height = max(1, round(image.height * width / image.width))
+    image = image.resize((width, height))
+    # В ZPL единичный бит — чёрная точка, в режиме '1' Pillow — белая
+    bitmap = ImageOps.invert(image).point(lambda v: 255 if v >= 128 else 0).convert('1')
+    bytes_per_row = (width + 7) // 8
+    data = bitmap.tobytes()
+    return f"~DG{_graphic_name(path)},{len(data)},{bytes_per_row},{data.hex().upper()}\n"
+
+
+def graphic_fields(logos=None):
+    """
+    Возвращает команды загрузки логотипов в память принтера.
+
+    Каждое изображение переводится в монохромное графическое поле один раз
+    (результат кэшируется до изменения файла), а этикетки ссылаются на него
+    через ^XG вместо того, чтобы передавать растр в каждой этикетке.
+
+    Args:
+        logos (list|None): Список (путь, x, y, ширина) (по умолчанию LOGOS).
+
+    Returns:
+        str: Команды ~DG для существующих файлов.
+    """
+    commands = []
+    for path, _, _, width in (LOGOS if logos is None else logos):
+        if os.path.exists(path):
+            commands.append(_download_graphic(path, os.path.getmtime(path), width))
+    return ''.join(commands)
+
+
+class ZplRenderer:
+    """
+    Формирует ZPL для термопринтера из того же плана этикеток, что и LabelSheet.
+
+    Текст этикетки собирается один раз на позицию плана, а для каждой упаковки
+    в него подставляется только номер упаковки.
+    """
+
+    def __init__(self, font='0', logos=None, fields=None, barcodes=None):
+        """
+        Инициализация ZplRenderer.
+
+        Args:
+            font (str): Шрифт принтера для ^A (должен содержать кириллицу).
+            logos (list|None): Изображения (по умолчанию LOGOS).
+            fields (list|None): Текстовые поля (по умолчанию FIELDS).
+            barcodes (list|None): Штрихкоды (по умолчанию BARCODES).
+        """
+        self.font = font
+        self.logos = LOGOS if logos is None else logos
+        self.fields = FIELDS if fields is None else fields
+        self.barcodes = BARCODES if barcodes is None else barcodes
+
+    def _label_template(self, label_data):
+        context = _ZplContext(dict(label_data, package_num=_PACKAGE_MARK))
+        parts = [
+            "^XA^CI28",
+            f"^PW{round(LABEL_WIDTH_MM * DOTS_PER_MM)}^LL{round(LABEL_HEIGHT_MM * DOTS_PER_MM)}",
+        ]
+        for path, x, y, _ in self.logos:
+            if os.path.exists(path):
+                parts.append(f"^FO{x},{y}^XG{_graphic_name(path)},1,1^FS")
+        for x, y, size, block_width, template in self.fields:
+            text = template.format_map(context)
+            block = f"^FB{block_width},2,0,L" if block_width else ""
+            parts.append(f"^FO{x},{y}^A{self.font}N,{size},{size}{block}^FH^FD{text}^FS")
+        for x, y, height, template in self.barcodes:
+            parts.append(f"^FO{x},{y}^BY2^BCN,{height},Y,N,N^FH^FD{template.format_map(context)}^FS")
+        parts.append("^XZ\n")
+        return ''.join(parts).split(_PACKAGE_MARK)
+
+    def render_label(self, label_data):
+        """
+        Возвращает ZPL одной этикетки (без загрузки логотипов).
+
+        Args:
+            label_data (dict): Данные этикетки в формате LabelSheet._label_data.
+
+        Returns:
+            str: Текст от ^XA до ^XZ.
+        """
+        return str(label_data.get('package_num', 1)).join(self._label_template(label_data))
+
+    def iter_zpl(self, labels_data, packages=None):
+        """
+        Последовательно выдаёт ZPL для плана этикеток.
+
+        Args:
+            labels_data (dict): План в формате LabelSheet.
+            packages (Iterable[int]|None): Номера упаковок для печати (None — все).
+
+        Yields:
+            str: Сначала загрузка логотипов, затем по одной этикетке.
+        """
+        selected = set(packages) if packages is not None else None
+        yield graphic_fields(self.logos)
+
+        package_num = 1
+        for label_info in labels_data['labels']:
+            numbers = [n for n in range(package_num, package_num + label_info['count'])
+                       if selected is None or n in selected]
+            package_num += label_info['count']
+            if not numbers:
+                continue
+
+            label_data = dict(label_info, package_total=labels_data['package_total'])
+            template = self._label_template(label_data)
+            for num in numbers:
+                yield str(num).join(template)
+
+
+def render_zpl(labels_data, file_path, packages=None):
+    """
+    Сохраняет план этикеток в ZPL-файл.
+
+    Args:
+        labels_data (dict): План в формате LabelSheet.
+        file_path (str): Путь к файлу .zpl.
+        packages (Iterable[int]|None): Номера упаковок для печати (None — все).
+    """
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.writelines(ZplRenderer().iter_zpl(labels_data, packages))
+    os.replace(tmp_path, file_path)
+
+
+def send_zpl(labels_data, host, port=9100, packages=None, timeout=10):
+    """
+    Отправляет план этикеток на сетевой термопринтер (порт RAW 9100).
+
+    Args:
+        labels_data (dict): План в формате LabelSheet.
+        host (str): Адрес принтера.
+        port (int): Порт RAW-печати.
+        packages (Iterable[int]|None): Номера упаковок для печати (None — все).
+        timeout (float): Таймаут соединения в секундах.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        for chunk in ZplRenderer().iter_zpl(labels_data, packages):
+            connection.sendall(chunk.encode('utf-8'))